@@ -0,0 +1,65 @@
+"""Microbenchmarks for cube arithmetic.
+
+Compares the validated public 'hex.Cube' constructor with the trusted, interned constructor used by the
+cube operators, and measures the memory retained by repeatedly walking a board sized spiral.
+
+Run from the repository root with 'python -m benchmarks.bench_hex'.
+"""
+import timeit
+import tracemalloc
+
+from ti4_mapgen import hex
+
+NUMBER = 100_000
+
+
+def _validated_add(hex1: hex.Cube, hex2: hex.Cube) -> hex.Cube:
+    """Add two cubes through the validated constructor, as the operators did before interning."""
+    return hex.Cube(q=hex1.q + hex2.q, r=hex1.r + hex2.r, s=hex1.s + hex2.s)
+
+
+def _validated_spiral(center: hex.Cube, radius: int) -> list[hex.Cube]:
+    """Copy every position of a spiral through the validated constructor."""
+    return [hex.Cube(q=cube.q, r=cube.r, s=cube.s) for cube in hex.spiral(center, radius)]
+
+
+def _per_call(statement) -> float:
+    """Return the mean time per call in microseconds."""
+    return timeit.timeit(statement, number=NUMBER) / NUMBER * 1e6
+
+
+def _retained(factory, repeat: int = 100) -> tuple[int, int]:
+    """Return the bytes and blocks retained by holding 'repeat' results of factory."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    results = [factory() for _ in range(repeat)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del results
+    return sum(stat.size_diff for stat in stats), sum(stat.count_diff for stat in stats)
+
+
+def main() -> None:
+    hex1 = hex.Cube(0, -1, 1)
+    hex2 = hex.Cube(1, 0, -1)
+    center = hex.Cube(0, 0, 0)
+
+    validated = _per_call(lambda: _validated_add(hex1, hex2))
+    trusted = _per_call(lambda: hex1 + hex2)
+    print(f"add       validated {validated:7.2f} us  trusted {trusted:7.2f} us  speed-up {validated / trusted:5.1f}x")
+
+    rotate = _per_call(lambda: hex.rotate(hex1, center, angle=120))
+    print(f"rotate    {rotate:7.2f} us per call (120 degrees)")
+
+    spiral = _per_call(lambda: list(hex.spiral(center, 4))) / 61
+    print(f"spiral    {spiral:7.2f} us per position (radius 4)")
+
+    size, count = _retained(lambda: _validated_spiral(center, 4))
+    print(f"retained  validated {size / 1024:8.1f} KiB in {count:6d} blocks")
+    size, count = _retained(lambda: list(hex.spiral(center, 4)))
+    print(f"retained  interned  {size / 1024:8.1f} KiB in {count:6d} blocks")
+
+
+if __name__ == "__main__":
+    main()
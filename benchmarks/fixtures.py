@@ -0,0 +1,85 @@
+"""Synthetic map templates and tile catalogs for the benchmark suite.
+
+The templates have the shape of real maps, i.e. the board size, home count and hyperlanes of each player
+count, but not the layout of any published map.
+"""
+import functools
+import random
+
+from ti4_mapgen import board, hex, schemas
+
+PLAYERS = range(3, 9)
+CENTER = hex.Cube(0, 0, 0)
+
+# Hyperlane tile which passes straight through in every direction.
+THROUGH_LANES = [[direction.value, direction.value * -1] for direction in list(hex.Adjacent)[:3]]
+
+
+@functools.lru_cache(maxsize=None)
+def template(players: int) -> tuple[schemas.Tile, ...]:
+    """Create the template of a map for a number of players.
+
+    Maps for up to 6 players have 3 rings and larger maps 4. Homes are spread evenly over the outer ring,
+    and maps for fewer than 6 players close the gaps between homes with hyperlane tiles.
+    """
+    radius = 3 if players <= 6 else 4
+    outer = list(hex.ring(CENTER, radius))
+    homes = {outer[round(index * len(outer) / players)] for index in range(players)}
+    gap = len(outer) // players
+    hyperlanes = set()
+    if players < 6:
+        hyperlanes = {outer[(round(index * len(outer) / players) + gap // 2) % len(outer)] for index in range(players)}
+        hyperlanes -= homes
+
+    layout = []
+    for position in hex.spiral(CENTER, radius):
+        if position == CENTER:
+            tile = schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE)
+        elif position in homes:
+            tile = schemas.Tile(type=schemas.Type.HOME, number=0, release=schemas.Release.BASE)
+        elif position in hyperlanes:
+            tile = schemas.Tile(
+                type=schemas.Type.HYPERLANE, number=83, release=schemas.Release.POK, hyperlanes=THROUGH_LANES
+            )
+        else:
+            tile = schemas.Tile(type=schemas.Type.SYSTEM, number=0, release=schemas.Release.BASE)
+        layout.append(tile.copy(update={"position": position}))
+    return tuple(layout)
+
+
+@functools.lru_cache(maxsize=None)
+def tiles(seed: int = 0) -> tuple[schemas.TileInDB, ...]:
+    """Create a catalog sized like the full game: 8 homes and 60 systems with random planets and anomalies."""
+    rng = random.Random(seed)
+    tiles = [
+        schemas.TileInDB(key=f"{number:03}", type=schemas.Type.HOME, number=number, release=schemas.Release.BASE)
+        for number in range(1, 9)
+    ]
+    for number in range(19, 79):
+        planets = rng.choice([0, 1, 1, 2, 2, 3])
+        system = schemas.System(
+            resources=sum(rng.randint(0, 3) for _ in range(planets)),
+            influence=sum(rng.randint(0, 3) for _ in range(planets)),
+            planets=planets,
+            traits=[rng.choice(list(schemas.Trait)) for _ in range(planets)],
+            techs=[rng.choice(list(schemas.Tech))] if planets and rng.random() < 0.3 else [],
+            anomaly=rng.choice(list(schemas.Anomaly)) if not planets and rng.random() < 0.6 else None,
+            wormhole=rng.choice([schemas.Wormhole.ALPHA, schemas.Wormhole.BETA]) if rng.random() < 0.08 else None,
+            legendary=planets == 1 and rng.random() < 0.05,
+        )
+        tiles.append(
+            schemas.TileInDB(
+                key=f"{number:03}",
+                type=schemas.Type.SYSTEM,
+                number=number,
+                release=schemas.Release.BASE if number < 51 else schemas.Release.POK,
+                back=schemas.Color.BLUE if planets else schemas.Color.RED,
+                system=system,
+            )
+        )
+    return tuple(tiles)
+
+
+@functools.lru_cache(maxsize=None)
+def catalog() -> board.Catalog:
+    return board.Catalog(tiles())
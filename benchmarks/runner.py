@@ -0,0 +1,126 @@
+"""Runner of the benchmark suite: times registered cases and compares them with a stored baseline."""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import pathlib
+import platform
+import sys
+import time
+from collections.abc import Callable, Sequence
+from typing import Optional
+
+BASELINE = pathlib.Path(__file__).with_name("baseline.json")
+
+# Seconds each timed repeat should take, the number of calls per repeat is chosen to fill it.
+REPEAT_TIME = 0.05
+REPEATS = 5
+
+
+@dataclasses.dataclass(frozen=True)
+class Case:
+    name: str
+    function: Callable[[], object]
+
+
+@dataclasses.dataclass(frozen=True)
+class Result:
+    name: str
+    # Fastest mean time per call of the repeats, in seconds.
+    seconds: float
+    calls: int
+
+
+_cases: list[Case] = []
+
+
+def benchmark(name: str) -> Callable[[Callable[[], object]], Callable[[], object]]:
+    """Register a function as a benchmark case."""
+
+    def register(function: Callable[[], object]) -> Callable[[], object]:
+        _cases.append(Case(name, function))
+        return function
+
+    return register
+
+
+def cases(pattern: Optional[str] = None) -> list[Case]:
+    return [case for case in _cases if pattern is None or pattern in case.name]
+
+
+def measure(case: Case, *, repeats: int = REPEATS, repeat_time: float = REPEAT_TIME) -> Result:
+    """Time a case, calling it enough times per repeat to fill 'repeat_time'."""
+    start = time.perf_counter()
+    case.function()
+    # The first call includes warm up, e.g. filling caches, so it only sizes the repeats.
+    first = max(time.perf_counter() - start, 1e-7)
+    calls = max(1, int(repeat_time / first))
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            case.function()
+        timings.append((time.perf_counter() - start) / calls)
+    return Result(case.name, min(timings), calls)
+
+
+def compare(results: Sequence[Result], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Report every result against the baseline and return the names of the regressed cases."""
+    regressions = []
+    for result in results:
+        line = f"{result.name:44} {_format(result.seconds):>10}"
+        if result.name in baseline:
+            ratio = result.seconds / baseline[result.name]
+            line += f"  baseline {_format(baseline[result.name]):>10}  {ratio:6.2f}x"
+            if ratio > 1 + threshold:
+                line += "  REGRESSION"
+                regressions.append(result.name)
+        print(line)
+    return regressions
+
+
+def load_baseline(path: pathlib.Path = BASELINE) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["results"]
+
+
+def save_baseline(results: Sequence[Result], path: pathlib.Path = BASELINE) -> None:
+    """Store results as the baseline, keeping the baseline of cases which were not run."""
+    stored = {**load_baseline(path), **{result.name: result.seconds for result in results}}
+    data = {
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "results": dict(sorted(stored.items())),
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare it with the baseline.")
+    parser.add_argument("pattern", nargs="?", help="only run cases whose name contains the pattern")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="slow down reported as a regression")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args(argv)
+
+    results = [measure(case, repeats=args.repeats) for case in cases(args.pattern)]
+    regressions = compare(results, load_baseline(), args.threshold)
+    if args.save:
+        save_baseline(results)
+        print(f"baseline stored in {BASELINE}")
+        return 0
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
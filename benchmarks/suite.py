@@ -0,0 +1,232 @@
+"""Benchmark suite for hex math, board setup, generation, app startup and the API routes.
+
+Run from the repository root with 'python -m benchmarks.suite'. Pass a pattern to only run the cases
+whose name contains it, '--save' to store the results as the baseline in 'benchmarks/baseline.json',
+and '--threshold' to change the slow down which is reported as a regression (default 25%). The exit
+status is 1 if any case regressed.
+
+The routes are called through an in-process ASGI client against the embedded SQLite storage, seeded
+with the synthetic catalog of 'benchmarks.fixtures', so no outside service is needed.
+"""
+import asyncio
+import atexit
+import functools
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+import httpx
+
+from benchmarks import fixtures, runner
+from benchmarks.runner import benchmark
+from ti4_mapgen import (
+    board,
+    config,
+    draft,
+    generator,
+    graph,
+    hex,
+    hexarray,
+    mapstring,
+    render,
+    schemas,
+    solver,
+    sqlite,
+    symmetry,
+)
+
+# Hex math.
+
+for radius in (1, 2, 3, 4):
+    benchmark(f"hex.ring[r={radius}]")(lambda radius=radius: list(hex.ring(fixtures.CENTER, radius)))
+    benchmark(f"hex.spiral[r={radius}]")(lambda radius=radius: list(hex.spiral(fixtures.CENTER, radius)))
+
+for radius in (2, 4):
+    positions = list(hex.spiral(fixtures.CENTER, radius))
+    benchmark(f"hex.rotate[r={radius}]")(
+        lambda positions=positions: [hex.rotate(position, fixtures.CENTER, angle=120) for position in positions]
+    )
+    benchmark(f"hex.distance[r={radius}]")(
+        lambda positions=positions: [hex.distance(first, second) for first in positions for second in positions]
+    )
+
+for radius in (4, 8):
+    cubes = hexarray.spiral(fixtures.CENTER, radius)
+    benchmark(f"hexarray.spiral[r={radius}]")(lambda radius=radius: hexarray.spiral(fixtures.CENTER, radius))
+    benchmark(f"hexarray.rotate[r={radius}]")(lambda cubes=cubes: hexarray.rotate(cubes, fixtures.CENTER, angle=120))
+    benchmark(f"hexarray.distance_matrix[r={radius}]")(lambda cubes=cubes: hexarray.distance_matrix(cubes, cubes))
+
+# Boards.
+
+for players in fixtures.PLAYERS:
+    template = fixtures.template(players)
+    rng = random.Random(0)
+    benchmark(f"board.setup[{players}p]")(
+        lambda template=template, rng=rng: board.Board.setup(template, fixtures.catalog(), rng=rng)
+    )
+
+board_ = board.Board.setup(fixtures.template(6), fixtures.catalog(), rng=random.Random(0))
+benchmark("board.layout[6p]")(lambda: board_.layout)
+benchmark("graph.from_layout[6p]")(lambda: graph.BoardGraph.from_layout(board_.layout))
+benchmark("symmetry.signature[6p]")(lambda: symmetry.signature(board_))
+benchmark("render.svg[6p]")(lambda: render.svg(board_))
+
+for players in (6, 8):
+    template = fixtures.template(players)
+    rng = random.Random(0)
+    benchmark(f"board.setup tournament[{players}p]")(
+        lambda template=template, rng=rng: board.Board.setup(
+            template, fixtures.catalog(), constraints=solver.TOURNAMENT, rng=rng
+        )
+    )
+
+# Map strings. The fixture catalog is extended with the center and hyperlane tiles of the templates.
+
+MAP_CATALOG = board.Catalog(
+    (
+        *fixtures.tiles(),
+        schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE),
+        schemas.Tile(
+            type=schemas.Type.HYPERLANE, number=83, release=schemas.Release.POK, hyperlanes=fixtures.THROUGH_LANES
+        ),
+    )
+)
+map_layouts = [
+    board.Board.setup(fixtures.template(players), MAP_CATALOG, rng=random.Random(players)).layout
+    for players in fixtures.PLAYERS
+]
+map_strings = [mapstring.encode(layout, MAP_CATALOG) for layout in map_layouts] * 200
+benchmark("mapstring.encode[5p]")(lambda: mapstring.encode(map_layouts[2], MAP_CATALOG))
+benchmark("mapstring.decode[5p]")(lambda: mapstring.decode(map_strings[2], MAP_CATALOG))
+benchmark("mapstring.decode_all[1200 maps]")(lambda: mapstring.decode_all(map_strings, MAP_CATALOG))
+
+# Generation. The time limit is far above the run time, so every case spends all of its evaluations.
+
+OPTIONS = schemas.GenerateOptions(evaluations=20_000, time_limit=10)
+
+for players in (3, 6, 8):
+    benchmark(f"generator.generate[{players}p]")(
+        lambda players=players: generator.generate(fixtures.template(players), fixtures.catalog(), OPTIONS, seed=0)
+    )
+
+# The fixture catalog has seven red systems, enough for three slices.
+DRAFT_OPTIONS = schemas.DraftOptions(evaluations=20_000, time_limit=10)
+
+benchmark("draft.generate[3 slices]")(lambda: draft.generate(fixtures.catalog(), 3, DRAFT_OPTIONS, seed=0))
+
+
+# Startup. Imports run in a fresh interpreter without credentials, the time includes starting the interpreter.
+
+benchmark("startup python")(lambda: subprocess.run([sys.executable, "-c", "pass"], check=True))
+benchmark("startup import ti4_mapgen.app")(
+    lambda: subprocess.run([sys.executable, "-c", "import ti4_mapgen.app"], check=True)
+)
+
+
+def _create_app():
+    from ti4_mapgen import app
+
+    return app.create_app(config.Settings(storage="sqlite", sqlite_path=":memory:"))
+
+
+async def _start_app():
+    app_ = _create_app()
+    await app_.router.startup()
+    await app_.router.shutdown()
+
+
+benchmark("startup create_app")(_create_app)
+benchmark("startup create_app+startup[sqlite]")(lambda: asyncio.run(_start_app()))
+
+
+# Routes.
+
+
+class Client:
+    """In-process ASGI client of an app backed by a temporary SQLite database, created on first use."""
+
+    def __init__(self) -> None:
+        self._loop = None
+        self._client = None
+        self._seeds = itertools.count()
+
+    def get(self, url: str, **headers: str) -> httpx.Response:
+        """Send a GET request, with headers passed by their names in snake case, e.g. 'if_none_match'."""
+        if self._client is None:
+            self._start()
+        headers = {name.replace("_", "-"): value for name, value in headers.items()}
+        response = self._loop.run_until_complete(self._client.get(url, headers=headers))
+        if response.is_error:
+            response.raise_for_status()
+        return response
+
+    def seed(self) -> int:
+        return next(self._seeds)
+
+    def _start(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "storage.sqlite3")
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(_seed_storage(path))
+
+        os.environ.update(STORAGE="sqlite", SQLITE_PATH=path)
+        from ti4_mapgen import app, config
+
+        config.get_settings.cache_clear()
+        app_ = app.create_app()
+        self._loop.run_until_complete(app_.router.startup())
+        self._client = httpx.AsyncClient(app=app_, base_url="http://benchmark")
+
+        def stop() -> None:
+            self._loop.run_until_complete(self._client.aclose())
+            self._loop.run_until_complete(app_.router.shutdown())
+            self._loop.close()
+            directory.cleanup()
+
+        atexit.register(stop)
+
+
+async def _seed_storage(path: str) -> None:
+    engine = sqlite.SQLite(path)
+    await engine.AsyncBase("tile").put_many([json.loads(tile.json()) for tile in fixtures.tiles()])
+    maps = [
+        {
+            "key": f"{players}p",
+            "players": players,
+            "style": "benchmark",
+            "description": f"Synthetic {players} player map",
+            "source": "benchmarks.fixtures",
+            "layout": [json.loads(tile.json()) for tile in fixtures.template(players)],
+        }
+        for players in fixtures.PLAYERS
+    ]
+    await engine.AsyncBase("map").put_many(maps)
+    factions = [{"name": name.value, "release": schemas.Release.BASE.value} for name in schemas.Name]
+    await engine.AsyncBase("faction").put_many(factions)
+    engine.close()
+
+
+client = Client()
+
+benchmark("route GET /tiles/")(lambda: client.get("/tiles/"))
+benchmark("route GET /tiles/?type=system&release=pok")(lambda: client.get("/tiles/?type=system&release=pok"))
+benchmark("route GET /tiles/ gzip")(lambda: client.get("/tiles/", accept_encoding="gzip"))
+tiles_etag = functools.cache(lambda: client.get("/tiles/").headers["etag"])
+benchmark("route GET /tiles/ not modified")(lambda: client.get("/tiles/", if_none_match=tiles_etag()))
+benchmark("route GET /maps/")(lambda: client.get("/maps/"))
+benchmark("route GET /maps/?limit=2")(lambda: client.get("/maps/?limit=2"))
+benchmark("route GET /factions/")(lambda: client.get("/factions/"))
+benchmark("route GET /generate/ cached")(
+    lambda: client.get("/generate/?players=6&style=benchmark&seed=0&evaluations=2000&time_limit=10")
+)
+benchmark("route GET /generate/")(
+    lambda: client.get(f"/generate/?players=6&style=benchmark&seed={client.seed()}&evaluations=2000&time_limit=10")
+)
+
+
+if __name__ == "__main__":
+    sys.exit(runner.main())
@@ -0,0 +1,45 @@
+"""Compile the JSON tile, map and faction catalogs to a binary snapshot.
+
+Usage: python -m scripts.build_snapshot [output] [--data DIRECTORY]
+
+The JSON files stay the interchange format, the snapshot is a build artifact which the app loads when
+'SNAPSHOT_PATH' points to it.
+"""
+import argparse
+import json
+import pathlib
+import time
+
+from ti4_mapgen import schemas, snapshot
+
+
+def load(path: pathlib.Path) -> list[dict]:
+    """Load the records of a JSON file, either a list or a mapping of keys to records."""
+    with open(path) as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        return [{"key": key, **record} for key, record in data.items()]
+    return [{"key": str(index), **record} if "key" not in record else record for index, record in enumerate(data)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", nargs="?", default="ti4_mapgen/data/catalog.snapshot")
+    parser.add_argument("--data", type=pathlib.Path, default=pathlib.Path("ti4_mapgen/data"))
+    args = parser.parse_args()
+
+    tiles = [schemas.TileInDB.parse_obj(record) for record in load(args.data / "tile_data.json")]
+    maps = [schemas.MapInDB.parse_obj(record) for record in load(args.data / "map_data.json")]
+    factions = [schemas.Faction.parse_obj(record) for record in load(args.data / "faction_data.json")]
+    snapshot.write(args.output, tiles, maps, factions)
+
+    start = time.perf_counter()
+    snapshot.Snapshot(args.output)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.output}: {len(tiles)} tiles, {len(maps)} maps, {len(factions)} factions, mapped in {elapsed * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
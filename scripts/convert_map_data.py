@@ -35,8 +35,6 @@ def to_layout(data) -> list[schema.TileBase]:
     data_systems = data["primary_tiles"] + data["secondary_tiles"] + data["tertiary_tiles"]
     data_hyperlanes = data["hyperlane_tiles"]
 
-    index_to_position = {index: position for index, position in enumerate(hex.spiral(hex.Cube(0, 0, 0), 4))}
-
     file = "./ti4_mapgen/data/tile_data.json"
     tiles = util.dataclass_container_from_file(schema.TileBase, file)
 
@@ -48,13 +46,13 @@ def to_layout(data) -> list[schema.TileBase]:
     layout.append(tile)
 
     for index in data_homes:
-        position = index_to_position[index]
+        position = hex.spiral_position(index)
         back = schema.Back(color=schema.Color.GREEN)
         tile = schema.TileBase(position=position, type=schema.Type.HOME, back=back)
         layout.append(tile)
 
     for index in data_systems:
-        position = index_to_position[index]
+        position = hex.spiral_position(index)
         back = schema.Back(color=schema.Color.BLUE)
         tile = schema.TileBase(position=position, type=schema.Type.SYSTEM, back=back)
         layout.append(tile)
@@ -65,7 +63,7 @@ def to_layout(data) -> list[schema.TileBase]:
         angle = rotation * 60
 
         tile = next(tile for tile in tiles if tile.front.number == number and tile.front.letter == letter)
-        tile.position = index_to_position[index]
+        tile.position = hex.spiral_position(index)
 
         for hyperlane in tile.front.hyperlanes:
             for index, vector in enumerate(hyperlane):
@@ -126,7 +126,7 @@ def to_system(number: int, data: dict[str, Any]) -> schema.System | None:
 def to_hyperlanes(data: dict[str, Any]) -> list[list[hex.Cube]]:
     """Parse hyperlanes to internal dataclass schema."""
     data_hyperlanes = data.get("hyperlanes", list())
-    index_to_vector = {index: vector for index, vector in enumerate(hex.ring(hex.Cube(0, 0, 0), 1))}
+    index_to_vector = hex.ring_table(1)
     hyperlanes = []
     for data_hyperlane in data_hyperlanes:
         hyperlane = [index_to_vector[index] for index in data_hyperlane]
@@ -0,0 +1,37 @@
+import asyncio
+import sys
+
+import pydantic
+
+from ti4_mapgen import config, database, sqlite
+
+TABLES = ("map", "faction", "tile")
+
+
+async def copy(source: database.Database, target: database.Database) -> None:
+    """Copy every table of the source storage to the target storage."""
+    for name in TABLES:
+        count = 0
+        async for page in source.base(name).pages():
+            await target.base(name).put_many(page.items)
+            count += len(page.items)
+        print(f"{name}: {count} records")
+
+
+async def main(path: str) -> None:
+    # The settings are validated for Deta storage, so missing credentials are reported before the copy starts.
+    try:
+        settings = config.Settings(storage="deta")
+    except pydantic.ValidationError as error:
+        sys.exit("; ".join(str(error_["msg"]) for error_ in error.errors()))
+    source = database.connect(settings)
+    target = database.Database(sqlite.SQLite(path), limit=settings.connection_limit)
+    try:
+        await copy(source, target)
+    finally:
+        await source.close()
+        await target.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else config.get_settings().sqlite_path))
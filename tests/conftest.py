@@ -0,0 +1,75 @@
+from collections.abc import Mapping, Sequence
+from typing import Optional, Union
+
+import pytest
+
+from ti4_mapgen import board, hex, schemas
+
+CENTER = hex.Cube(0, 0, 0)
+
+
+def make_template(
+    radius: int, *, homes: Sequence[int] = (), tiles: Optional[Mapping[int, schemas.Tile]] = None
+) -> list[schemas.Tile]:
+    """Create a map template of a spiral around the center, with system slots unless a position is set.
+
+    Args:
+        radius: Radius of the spiral.
+        homes (optional): Spiral indexes of the home slots.
+        tiles (optional): Tiles by spiral index, e.g. hyperlane tiles.
+    """
+    tiles = {} if tiles is None else tiles
+    layout = []
+    for index, position in enumerate(hex.spiral(CENTER, radius)):
+        if index in tiles:
+            tile = tiles[index]
+        elif index == 0:
+            tile = schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE)
+        elif index in homes:
+            tile = schemas.Tile(type=schemas.Type.HOME, number=0, release=schemas.Release.BASE)
+        else:
+            tile = schemas.Tile(type=schemas.Type.SYSTEM, number=0, release=schemas.Release.BASE)
+        layout.append(tile.copy(update={"position": position}))
+    return layout
+
+
+def make_catalog(
+    systems: Union[int, Sequence[schemas.System]],
+    *,
+    homes: int = 0,
+    backs: Optional[Sequence[Optional[schemas.Color]]] = None,
+    tiles: Sequence[schemas.Tile] = (),
+) -> board.Catalog:
+    """Create a catalog of tiles, then home tiles numbered from 1, then system tiles numbered from 19.
+
+    Args:
+        systems: Systems of the system tiles, or a number of systems with a single planet.
+        homes (optional): Number of home tiles.
+        backs (optional): Backs of the system tiles.
+        tiles (optional): Tiles which come first, e.g. hyperlane tiles.
+    """
+    if isinstance(systems, int):
+        systems = [schemas.System(resources=1, influence=1, planets=1)] * systems
+    backs = [None] * len(systems) if backs is None else backs
+    catalog = list(tiles)
+    catalog += [
+        schemas.Tile(type=schemas.Type.HOME, number=number, release=schemas.Release.BASE)
+        for number in range(1, homes + 1)
+    ]
+    catalog += [
+        schemas.Tile(
+            type=schemas.Type.SYSTEM, number=19 + number, release=schemas.Release.BASE, back=back, system=system
+        )
+        for number, (system, back) in enumerate(zip(systems, backs))
+    ]
+    return board.Catalog(catalog)
+
+
+@pytest.fixture(name="make_template")
+def make_template_fixture():
+    return make_template
+
+
+@pytest.fixture(name="make_catalog")
+def make_catalog_fixture():
+    return make_catalog
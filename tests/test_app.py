@@ -0,0 +1,53 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from ti4_mapgen import app, cache, config, generator, jobs, metrics, views
+
+
+def test_import_needs_no_settings(tmp_path):
+    # Run from an empty directory without credentials, so neither the environment nor a '.env' file has any.
+    environment = {name: value for name, value in os.environ.items() if not name.startswith(("DETA_", "STORAGE"))}
+    environment["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", "import ti4_mapgen.app"], cwd=tmp_path, env=environment, check=True)
+
+
+def test_import_defers_numpy():
+    code = "import sys, ti4_mapgen.app; assert 'numpy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_create_app_reads_settings_on_startup(monkeypatch):
+    def get_settings():
+        raise AssertionError("settings read when the app was created")
+
+    monkeypatch.setattr(config, "get_settings", get_settings)
+    app_ = app.create_app()
+    assert not hasattr(app_.state, "database")
+
+
+def test_startup_creates_state():
+    settings = config.Settings(storage="sqlite", sqlite_path=":memory:", metrics_enabled=True)
+
+    async def run():
+        app_ = app.create_app(settings)
+        await app_.router.startup()
+        state = (
+            app_.state.settings,
+            app_.state.catalogs,
+            app_.state.generated_maps,
+            app_.state.jobs,
+            app_.state.batch_pool,
+        )
+        await app_.router.shutdown()
+        return state
+
+    settings_, catalogs, generated_maps, jobs_, batch_pool = asyncio.run(run())
+    assert settings_ is settings
+    assert isinstance(catalogs, views.Catalogs)
+    assert isinstance(generated_maps, cache.TTLCache)
+    assert isinstance(jobs_, jobs.JobQueue)
+    assert isinstance(batch_pool, generator.BatchPool)
+    assert batch_pool.workers == generator.cpu_count()
+    assert metrics.REGISTRY.enabled
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from ti4_mapgen import board, schemas
+
+
+@pytest.fixture
+def template(make_template):
+    return make_template(1, homes=(1, 4))
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    return make_catalog(6, homes=2)
+
+
+class TestCatalog:
+    def test_catalog_ids(self, catalog):
+        tiles = catalog
+        assert tiles.ids(schemas.Type.HOME).tolist() == [0, 1]
+        assert tiles.ids(schemas.Type.SYSTEM).tolist() == [2, 3, 4, 5, 6, 7]
+        assert tiles[2].number == 19
+
+    def test_catalog_query(self, catalog):
+        tiles = catalog
+        numbers = [tile.number for tile in tiles.query(schemas.TileQuery(type=schemas.Type.HOME))]
+        assert numbers == [1, 2]
+        assert tiles.select(type=schemas.Type.SYSTEM, number=21).tolist() == [4]
+
+
+class TestBoard:
+    def test_board_setup(self, template, catalog):
+        board_ = board.Board.setup(template, catalog, homes=[0, 1], rng=random.Random(0))
+        assert board_.tiles[0] == board.EMPTY
+        assert board_.tiles[board_.slots(schemas.Type.HOME)].tolist() == [0, 1]
+        systems = board_.tiles[board_.slots(schemas.Type.SYSTEM)].tolist()
+        assert len(systems) == 4
+        assert sorted(systems + board_.stack.tolist()) == [2, 3, 4, 5, 6, 7]
+
+    def test_board_setup_is_seeded(self, template, catalog):
+        board1 = board.Board.setup(template, catalog, rng=random.Random(5))
+        board2 = board.Board.setup(template, catalog, rng=random.Random(5))
+        assert board1.tiles.tolist() == board2.tiles.tolist()
+
+    def test_board_setup_small_stack(self, template, catalog):
+        board_ = board.Board.setup(template, catalog, stack=[2, 3], rng=random.Random(0))
+        systems = board_.tiles[board_.slots(schemas.Type.SYSTEM)].tolist()
+        assert sorted(systems) == [board.EMPTY, board.EMPTY, 2, 3]
+        assert board_.stack.tolist() == []
+
+    def test_board_layout(self, template, catalog):
+        tiles = catalog
+        board_ = board.Board.setup(template, tiles, homes=[0, 1], rng=random.Random(0))
+        layout = board_.layout
+        assert [tile.position for tile in layout] == [tile.position for tile in template]
+        assert layout[0].number == 18
+        assert layout[1].number == 1
+        assert layout[4].number == 2
+
+    def test_board_layout_does_not_modify_catalog(self, template, catalog):
+        tiles = catalog
+        board_ = board.Board.setup(template, tiles, rng=random.Random(0))
+        _ = board_.layout
+        assert all(tile.position is None for tile in tiles.tiles)
+
+    def test_boards_share_positions(self, template, catalog):
+        layout = template
+        board1 = board.Board.setup(layout, catalog)
+        board2 = board.Board.setup(layout, catalog)
+        assert board1.positions is board2.positions
@@ -0,0 +1,60 @@
+from ti4_mapgen import cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_cache_hit_and_miss(self):
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10)
+        assert ttl_cache.get("a") is None
+        ttl_cache.put("a", 1)
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.stats() == cache.CacheStats(hits=1, misses=1, size=1, maxsize=2)
+
+    def test_cache_evicts_least_recently_used(self):
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10)
+        ttl_cache.put("a", 1)
+        ttl_cache.put("b", 2)
+        ttl_cache.get("a")
+        ttl_cache.put("c", 3)
+        assert ttl_cache.get("b") is None
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.get("c") == 3
+        assert len(ttl_cache) == 2
+
+    def test_cache_expires(self):
+        clock = Clock()
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10, timer=clock)
+        ttl_cache.put("a", 1)
+        clock.now = 9.9
+        assert ttl_cache.get("a") == 1
+        clock.now = 10.0
+        assert ttl_cache.get("a") is None
+        assert len(ttl_cache) == 0
+
+    def test_cache_put_refreshes_expiry(self):
+        clock = Clock()
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10, timer=clock)
+        ttl_cache.put("a", 1)
+        clock.now = 5
+        ttl_cache.put("a", 2)
+        clock.now = 12
+        assert ttl_cache.get("a") == 2
+
+    def test_cache_disabled(self):
+        ttl_cache = cache.TTLCache(maxsize=0, ttl=10)
+        ttl_cache.put("a", 1)
+        assert ttl_cache.get("a") is None
+
+    def test_cache_clear(self):
+        ttl_cache = cache.TTLCache(maxsize=2, ttl=10)
+        ttl_cache.put("a", 1)
+        ttl_cache.get("a")
+        ttl_cache.clear()
+        assert ttl_cache.stats() == cache.CacheStats(hits=0, misses=0, size=0, maxsize=2)
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from ti4_mapgen import catalog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return self.calls
+
+
+class TestCatalogCache:
+    def test_concurrent_gets_load_once(self):
+        async def run():
+            load = Loader()
+            load.release = asyncio.Event()
+            catalog_cache = catalog.CatalogCache(load, ttl=10)
+            pending = asyncio.gather(*(catalog_cache.get() for _ in range(5)))
+            await asyncio.sleep(0)
+            load.release.set()
+            return await pending, catalog_cache.loads
+
+        values, loads = asyncio.run(run())
+        assert values == [1] * 5
+        assert loads == 1
+
+    def test_expired_catalog_is_reloaded(self):
+        async def run():
+            clock = Clock()
+            catalog_cache = catalog.CatalogCache(Loader(), ttl=10, timer=clock)
+            first = await catalog_cache.get()
+            clock.now = 5
+            second = await catalog_cache.get()
+            clock.now = 10
+            third = await catalog_cache.get()
+            return first, second, third
+
+        assert asyncio.run(run()) == (1, 1, 2)
+
+    def test_invalidated_catalog_is_reloaded(self):
+        async def run():
+            catalog_cache = catalog.CatalogCache(Loader(), ttl=10)
+            first = await catalog_cache.get()
+            catalog_cache.invalidate()
+            assert not catalog_cache.fresh
+            return first, await catalog_cache.get()
+
+        assert asyncio.run(run()) == (1, 2)
+
+    def test_invalidation_during_load_is_not_lost(self):
+        async def run():
+            load = Loader()
+            load.release = asyncio.Event()
+            catalog_cache = catalog.CatalogCache(load, ttl=10)
+            pending = asyncio.ensure_future(catalog_cache.get())
+            await asyncio.sleep(0)
+            catalog_cache.invalidate()
+            load.release.set()
+            await pending
+            return catalog_cache.fresh
+
+        assert asyncio.run(run()) is False
+
+    def test_failed_load_is_raised_and_retried(self):
+        async def run():
+            calls = []
+
+            async def load():
+                calls.append(None)
+                if len(calls) == 1:
+                    raise ConnectionError("unavailable")
+                return "tiles"
+
+            catalog_cache = catalog.CatalogCache(load, ttl=10)
+            with pytest.raises(ConnectionError):
+                await catalog_cache.get()
+            return await catalog_cache.get()
+
+        assert asyncio.run(run()) == "tiles"
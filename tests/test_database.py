@@ -0,0 +1,147 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ti4_mapgen import config, database, sqlite
+
+
+class FakeBase:
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.closed = False
+
+    async def fetch(self, query=None):
+        self.engine.in_flight += 1
+        self.engine.peak = max(self.engine.peak, self.engine.in_flight)
+        await asyncio.sleep(0)
+        self.engine.in_flight -= 1
+        return self.name
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeEngine:
+    def __init__(self):
+        self.opened = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def AsyncBase(self, name):
+        base = FakeBase(name, self)
+        self.opened.append(base)
+        return base
+
+
+class PagedBase:
+    def __init__(self, keys):
+        self.keys = keys
+        self.fetches = []
+
+    async def fetch(self, query=None, *, limit=1000, last=None):
+        self.fetches.append((limit, last))
+        start = 0 if last is None else self.keys.index(last) + 1
+        keys = self.keys[start : start + limit]
+        more = start + limit < len(self.keys)
+        return SimpleNamespace(items=[{"key": key} for key in keys], last=keys[-1] if more else None)
+
+
+class TestDatabase:
+    def test_base_is_opened_once(self):
+        async def run():
+            engine = FakeEngine()
+            database_ = database.Database(engine, limit=4)
+            assert database_.base("tile") is database_.base("tile")
+            assert await database_.base("map").fetch() == "map"
+            return engine
+
+        engine = asyncio.run(run())
+        assert [base.name for base in engine.opened] == ["tile", "map"]
+
+    def test_requests_share_connection_limit(self):
+        async def run():
+            engine = FakeEngine()
+            database_ = database.Database(engine, limit=2)
+            await asyncio.gather(*(database_.base(name).fetch() for name in ["tile", "map", "faction"] * 3))
+            return engine
+
+        assert asyncio.run(run()).peak == 2
+
+    def test_close_closes_every_base(self):
+        async def run():
+            engine = FakeEngine()
+            database_ = database.Database(engine, limit=2)
+            database_.base("tile")
+            database_.base("map")
+            await database_.close()
+            reopened = database_.base("tile")
+            return engine, reopened
+
+        engine, reopened = asyncio.run(run())
+        assert [base.closed for base in engine.opened] == [True, True, False]
+        assert reopened._base is engine.opened[2]
+
+    def test_pages_follow_cursor(self):
+        async def run():
+            paged = PagedBase([str(key) for key in range(5)])
+            base = database.Base(paged, asyncio.Semaphore(1))
+            pages = [[item["key"] for item in page.items] async for page in base.pages(limit=2)]
+            return paged, pages
+
+        paged, pages = asyncio.run(run())
+        assert pages == [["0", "1"], ["2", "3"], ["4"]]
+        assert paged.fetches == [(2, None), (2, "1"), (2, "3")]
+
+    def test_iterate_starts_after_last(self):
+        async def run():
+            base = database.Base(PagedBase([str(key) for key in range(2500)]), asyncio.Semaphore(1))
+            return [item["key"] async for item in base.iterate(last="9")]
+
+        keys = asyncio.run(run())
+        assert keys == [str(key) for key in range(10, 2500)]
+
+    def test_connect_sqlite(self):
+        async def run():
+            database_ = database.connect(config.Settings(storage="sqlite", sqlite_path=":memory:"))
+            assert isinstance(database_._engine, sqlite.SQLite)
+            await database_.base("map").put({"key": "a"})
+            items = [item async for item in database_.base("map").iterate()]
+            await database_.close()
+            return items
+
+        assert asyncio.run(run()) == [{"key": "a"}]
+
+    def test_deta_requires_project_key(self, monkeypatch):
+        monkeypatch.delenv("DETA_PROJECT_KEY", raising=False)
+        with pytest.raises(ValueError):
+            config.Settings(storage="deta", _env_file=None)
+
+
+class TestUniqueBase:
+    def test_skips_stored_signatures(self):
+        async def run():
+            engine = sqlite.SQLite()
+            database_ = database.Database(engine, limit=1)
+            store = database.UniqueBase(database_.base("generated"))
+            stored = [
+                await store.put({"score": score}, signature) for score, signature in [(1, "a"), (2, "a"), (3, "b")]
+            ]
+            items = [item async for item in database_.base("generated").iterate()]
+            await database_.close()
+            return stored, items
+
+        stored, items = asyncio.run(run())
+        assert stored == [True, False, True]
+        assert items == [{"key": "a", "score": 1}, {"key": "b", "score": 3}]
+
+    def test_failed_put_is_not_remembered(self):
+        class FailingBase:
+            async def put(self, record, key):
+                raise ConnectionError
+
+        store = database.UniqueBase(database.Base(FailingBase(), asyncio.Semaphore(1)))
+        with pytest.raises(ConnectionError):
+            asyncio.run(store.put({}, "a"))
+        assert "a" not in store
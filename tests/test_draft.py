@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from ti4_mapgen import draft, schemas
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    def create(blue=12, red=8, anomalies=0, wormholes=0):
+        """Create a catalog of blue planet systems and red systems, the first red systems are anomalies and
+        wormholes."""
+        systems = [schemas.System(resources=number % 4, influence=3 - number % 4, planets=1) for number in range(blue)]
+        for number in range(red):
+            if number < anomalies:
+                system = schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.NEBULA)
+            elif number < anomalies + wormholes:
+                system = schemas.System(resources=0, influence=0, planets=0, wormhole=schemas.Wormhole.ALPHA)
+            else:
+                system = schemas.System(resources=0, influence=0, planets=0)
+            systems.append(system)
+        return make_catalog(systems, backs=[schemas.Color.BLUE] * blue + [schemas.Color.RED] * red)
+
+    return create
+
+
+def factions(count):
+    return [schemas.Faction(name=name, release=schemas.Release.BASE) for name in list(schemas.Name)[:count]]
+
+
+class TestGenerate:
+    def test_generate_slices(self, catalog):
+        tiles = catalog()
+        slices = draft.generate(tiles, 4, schemas.DraftOptions(evaluations=2_000), seed=0)
+        assert slices.tiles.shape == (4, draft.SIZE)
+        ids = slices.tiles.ravel().tolist()
+        assert len(set(ids)) == len(ids)
+        for row in slices.tiles.tolist():
+            backs = [tiles[id].back for id in row]
+            assert backs == [schemas.Color.BLUE] * draft.BLUE + [schemas.Color.RED] * draft.RED
+
+    def test_generate_balances_slices(self, catalog):
+        tiles = catalog()
+        slices = draft.generate(tiles, 3, schemas.DraftOptions(evaluations=5_000), seed=0)
+        totals = {sum(tiles[id].system.resources for id in row) for row in slices.tiles.tolist()}
+        assert slices.score == 0
+        assert len(totals) == 1
+
+    def test_generate_keeps_limits(self, catalog):
+        tiles = catalog(red=8, anomalies=4, wormholes=4)
+        options = schemas.DraftOptions(evaluations=5_000, max_anomalies=1, max_wormholes=1)
+        for seed in range(5):
+            slices = draft.generate(tiles, 4, options, seed=seed)
+            for row in slices.tiles.tolist():
+                systems = [tiles[id].system for id in row]
+                assert sum(system.anomaly is not None for system in systems) <= 1
+                assert sum(system.wormhole is not None for system in systems) <= 1
+
+    def test_generate_is_reproducible(self, catalog):
+        options = schemas.DraftOptions(evaluations=1_000)
+        slices1 = draft.generate(catalog(), 3, options, seed=3)
+        slices2 = draft.generate(catalog(), 3, options, seed=3)
+        assert slices1.seed == 3
+        assert slices1.tiles.tolist() == slices2.tiles.tolist()
+        assert slices1.score == slices2.score
+        assert slices1.evaluations == 1_000
+
+    def test_generate_too_few_systems(self, catalog):
+        with pytest.raises(ValueError, match="5 slices need 15 blue and 10 red systems"):
+            draft.generate(catalog(blue=12, red=8), 5, seed=0)
+
+    def test_generate_impossible_limits(self, catalog):
+        tiles = catalog(red=8, anomalies=8)
+        options = schemas.DraftOptions(evaluations=1_000, max_anomalies=1)
+        with pytest.raises(ValueError, match="no slices which satisfy the draft limits"):
+            draft.generate(tiles, 4, options, seed=0)
+
+
+class TestSliceScore:
+    def test_score_matches_slice_totals(self, catalog):
+        tiles = catalog()
+        blue, red = draft.select_systems(tiles, schemas.DraftOptions())
+        importance = np.array([draft.DEFAULT_WEIGHTS[attribute] for attribute in draft.BALANCED])
+        score = draft.SliceScore(draft._attribute_table(tiles), blue, red, 3, schemas.DraftOptions(), importance)
+        rng = np.random.default_rng(0)
+        blue_orders = np.array([rng.permutation(len(blue)) for _ in range(4)])
+        red_orders = np.array([rng.permutation(len(red)) for _ in range(4)])
+        scores, violations = score(blue_orders, red_orders)
+
+        for candidate, ids in enumerate(score.tiles(blue_orders, red_orders).tolist()):
+            totals = np.array([[draft.attributes(tiles[id])[:3] for id in row] for row in ids]).sum(axis=1)
+            expected = (((totals - totals.mean(axis=0)) ** 2).sum(axis=0) * importance).sum()
+            assert scores[candidate] == pytest.approx(expected)
+            assert violations[candidate] == 0
+
+
+class TestChooseFactions:
+    def test_choose_factions(self):
+        names = draft.choose_factions(factions(10), 6, seed=0)
+        assert len(set(names)) == 6
+        assert names == draft.choose_factions(factions(10), 6, seed=0)
+
+    def test_choose_too_many_factions(self):
+        with pytest.raises(ValueError, match="7 factions were asked for, but there are 6 factions"):
+            draft.choose_factions(factions(6), 7, seed=0)
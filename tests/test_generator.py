@@ -0,0 +1,315 @@
+import itertools
+import random
+import time
+
+import numpy as np
+import pytest
+
+from ti4_mapgen import board, generator, graph, schemas, solver
+
+
+@pytest.fixture
+def template(make_template):
+    # A home in every corner of the outer ring.
+    return make_template(3, homes=range(19, 37, 3))
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    def create(size, seed=0):
+        rng = random.Random(seed)
+        systems = [
+            schemas.System(
+                resources=rng.randint(0, 4),
+                influence=rng.randint(0, 4),
+                planets=1,
+                techs=[schemas.Tech.BIOTIC] * rng.randint(0, 1),
+                traits=[schemas.Trait.CULTURAL] * rng.randint(0, 1),
+            )
+            for _ in range(size)
+        ]
+        return make_catalog(systems)
+
+    return create
+
+
+def stalled_clock(after, seconds):
+    """Create a clock which jumps ahead once, like a process which stalls after a number of readings."""
+    readings = itertools.count()
+    clock = time.perf_counter
+    return lambda: clock() + (seconds if next(readings) >= after else 0.0)
+
+
+def balance_score(seed=0):
+    rng = np.random.default_rng(seed)
+    weights = np.hstack([rng.random((4, 10)), np.zeros((4, 5))])
+    tiles = rng.integers(0, 4, size=(15, len(generator.ATTRIBUTES)))
+    return generator.BalanceScore(weights, tiles, np.ones(len(generator.ATTRIBUTES)))
+
+
+class TestAttributes:
+    def test_attributes(self):
+        system = schemas.System(
+            resources=3,
+            influence=1,
+            planets=2,
+            techs=[schemas.Tech.WARFARE],
+            traits=[schemas.Trait.HAZARDOUS, schemas.Trait.HAZARDOUS],
+        )
+        tile = schemas.Tile(type=schemas.Type.SYSTEM, number=19, release=schemas.Release.BASE, system=system)
+        assert generator.attributes(tile) == (3, 1, 1, 0, 2, 0)
+
+    def test_attributes_without_system(self):
+        tile = schemas.Tile(type=schemas.Type.SYSTEM, number=19, release=schemas.Release.BASE)
+        assert generator.attributes(tile) == (0,) * len(generator.ATTRIBUTES)
+
+    def test_distance_weights(self):
+        weights = generator.distance_weights(np.array([1, 2, 3, graph.UNREACHABLE]))
+        assert weights.tolist() == [1.0, 0.5, 0.25, 0.0]
+
+
+class TestBalanceScore:
+    def test_delta_matches_rescore(self):
+        balance = balance_score()
+        for first, second in [(0, 1), (3, 9), (2, 12), (9, 14)]:
+            before = balance.rescore()
+            delta = balance.delta(first, second)
+            balance.swap(first, second, delta)
+            assert balance.rescore() == pytest.approx(before + delta)
+            assert balance.score == pytest.approx(balance.rescore())
+
+    def test_deltas_match_delta(self):
+        balance = balance_score()
+        first, second = np.array([0, 4, 7]), np.array([5, 11, 2])
+        deltas = balance.deltas(first, second)
+        assert deltas.tolist() == pytest.approx([balance.delta(a, b) for a, b in zip(first, second)])
+
+    def test_swap_updates_placement(self):
+        balance = balance_score()
+        balance.swap(2, 12)
+        assert balance.placement[2] == 12
+        assert balance.placement[12] == 2
+
+
+class TestAnneal:
+    def test_anneal_improves_score(self):
+        balance = balance_score()
+        initial = balance.score
+        result = generator.anneal(balance, 10, evaluations=5_000, time_limit=5, rng=np.random.default_rng(0))
+        assert result.score < initial
+        assert result.evaluations == 5_000
+        assert sorted(result.placement.tolist()) == list(range(15))
+
+    def test_anneal_best_placement_matches_score(self):
+        balance = balance_score()
+        result = generator.anneal(balance, 10, evaluations=2_000, time_limit=5, rng=np.random.default_rng(1))
+        rescored = generator.BalanceScore(balance.weights, balance._tiles[result.placement], balance.importance)
+        assert rescored.score == pytest.approx(result.score)
+
+    def test_anneal_reports_progress(self):
+        reports = []
+        result = generator.anneal(
+            balance_score(),
+            10,
+            evaluations=35_000,
+            time_limit=5,
+            rng=np.random.default_rng(0),
+            progress=lambda score, evaluations: reports.append((score, evaluations)),
+        )
+        scores, evaluations = zip(*reports)
+        assert len(reports) == 4
+        assert list(scores) == sorted(scores, reverse=True)
+        # Reports are at least a chunk apart, except the last one when the budget is spent.
+        chunks = zip(evaluations[:-2], evaluations[1:-1])
+        assert all(later - earlier >= generator.REPORT_EVERY for earlier, later in chunks)
+        assert reports[-1] == (result.score, 35_000)
+
+    def test_anneal_progress_keeps_result(self):
+        results = [
+            generator.anneal(
+                balance_score(), 10, evaluations=25_000, time_limit=5, rng=np.random.default_rng(0), progress=progress
+            )
+            for progress in (None, lambda score, evaluations: None)
+        ]
+        assert results[0].placement.tolist() == results[1].placement.tolist()
+
+    def test_anneal_schedule_ignores_stalls(self, monkeypatch):
+        expected = generator.anneal(balance_score(), 10, evaluations=25_000, time_limit=5, rng=np.random.default_rng(0))
+        monkeypatch.setattr(generator.time, "perf_counter", stalled_clock(after=20, seconds=2.0))
+        result = generator.anneal(balance_score(), 10, evaluations=25_000, time_limit=5, rng=np.random.default_rng(0))
+        assert result.evaluations == 25_000
+        assert result.placement.tolist() == expected.placement.tolist()
+
+    def test_anneal_without_slots(self):
+        balance = balance_score()
+        result = generator.anneal(balance, 0, evaluations=1_000, time_limit=5)
+        assert result.evaluations == 0
+
+
+class TestGenerate:
+    def test_generate_fills_system_slots(self, template, catalog):
+        tiles = catalog(40)
+        generated = generator.generate(template, tiles, schemas.GenerateOptions(evaluations=2_000), seed=0)
+        layout = generated.board.layout
+        systems = [tile for tile in layout if tile.type is schemas.Type.SYSTEM]
+        assert len(systems) == 30
+        assert all(tile.system is not None for tile in systems)
+        assert [tile.position for tile in layout] == [tile.position for tile in template]
+        assert len(generated.board.stack) == 10
+        numbers = [tile.number for tile in systems] + [tiles[id].number for id in generated.board.stack]
+        assert sorted(numbers) == [tile.number for tile in tiles.tiles]
+
+    def test_generate_with_small_stack(self, template, catalog):
+        generated = generator.generate(template, catalog(20), schemas.GenerateOptions(evaluations=2_000), seed=0)
+        systems = [tile for tile in generated.board.layout if tile.type is schemas.Type.SYSTEM]
+        assert sum(tile.system is not None for tile in systems) == 20
+        assert len(generated.board.stack) == 0
+
+    def test_generate_selects_stack(self, template, catalog):
+        tiles = catalog(40)
+        tiles = board.Catalog(
+            tile.copy(update={"release": schemas.Release.POK}) if tile.number % 2 else tile for tile in tiles.tiles
+        )
+        options = schemas.GenerateOptions(evaluations=2_000, releases=(schemas.Release.POK,))
+        generated = generator.generate(template, tiles, options, seed=0)
+        systems = [tile for tile in generated.board.layout if tile.type is schemas.Type.SYSTEM]
+        assert sum(tile.system is not None for tile in systems) == 20
+        assert all(tile.release is schemas.Release.POK for tile in systems if tile.system is not None)
+
+    def test_select_stack_without_anomalies(self, catalog):
+        tiles = catalog(4)
+        tiles = board.Catalog(
+            [
+                *tiles.tiles,
+                schemas.Tile(
+                    type=schemas.Type.SYSTEM,
+                    number=41,
+                    release=schemas.Release.BASE,
+                    system=schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.NEBULA),
+                ),
+            ]
+        )
+        assert generator.select_stack(tiles, schemas.GenerateOptions()).tolist() == [0, 1, 2, 3, 4]
+        assert generator.select_stack(tiles, schemas.GenerateOptions(anomalies=False)).tolist() == [0, 1, 2, 3]
+
+    def test_generate_is_reproducible(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=2_000, time_limit=10)
+        generated1 = generator.generate(template, catalog(40), options, seed=3)
+        generated2 = generator.generate(template, catalog(40), options, seed=3)
+        assert generated1.seed == 3
+        assert generated1.board.tiles.tolist() == generated2.board.tiles.tolist()
+        assert generated1.score == generated2.score
+
+    def test_generate_is_reproducible_despite_stalls(self, monkeypatch, template, catalog):
+        options = schemas.GenerateOptions(evaluations=20_000, time_limit=10)
+        generated1 = generator.generate(template, catalog(40), options, seed=7)
+        monkeypatch.setattr(generator.time, "perf_counter", stalled_clock(after=10, seconds=4.0))
+        generated2 = generator.generate(template, catalog(40), options, seed=7)
+        assert generated2.evaluations == 20_000
+        assert generated1.board.tiles.tolist() == generated2.board.tiles.tolist()
+        assert generated1.score == generated2.score
+
+    def test_generate_draws_seed(self, template, catalog):
+        generated = generator.generate(template, catalog(40), schemas.GenerateOptions(evaluations=100))
+        reproduced = generator.generate(
+            template, catalog(40), schemas.GenerateOptions(evaluations=100), seed=generated.seed
+        )
+        assert generated.board.tiles.tolist() == reproduced.board.tiles.tolist()
+
+    def test_generate_tournament_keeps_constraints(self, template, catalog):
+        tiles = catalog(40)
+        nebula = schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.NEBULA)
+        anomalies = [
+            schemas.Tile(type=schemas.Type.SYSTEM, number=number, release=schemas.Release.BASE, system=nebula)
+            for number in range(60, 70)
+        ]
+        tiles = board.Catalog([*tiles.tiles, *anomalies])
+        options = schemas.GenerateOptions(evaluations=5_000, time_limit=10, tournament=True)
+        generated = generator.generate(template, tiles, options, seed=0)
+        board_ = generated.board
+        slots = board_.slots(schemas.Type.SYSTEM)
+        stack = tiles.ids(schemas.Type.SYSTEM)
+        solver_ = solver.Solver(board_.template, tiles.index, stack, solver.TOURNAMENT)
+        assert solver_.check(board_.tiles[slots])
+        assert generated.evaluations == 5_000
+
+    def test_generate_improves_balance(self, template, catalog):
+        unoptimized = generator.generate(template, catalog(40), schemas.GenerateOptions(evaluations=0), seed=0)
+        optimized = generator.generate(template, catalog(40), schemas.GenerateOptions(evaluations=20_000), seed=0)
+        assert optimized.score < unoptimized.score
+
+
+class TestGenerateBatch:
+    def test_generate_batch_returns_best_first(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=1_000)
+        batch = generator.generate_batch(template, catalog(40), options, count=4, top=3, seed=0, workers=2)
+        assert len(batch) == 3
+        scores = [generated.score for generated in batch]
+        assert scores == sorted(scores)
+
+    def test_generate_batch_is_reproducible(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=1_000, time_limit=10)
+        batch1 = generator.generate_batch(template, catalog(40), options, count=3, top=3, seed=42, workers=2)
+        batch2 = generator.generate_batch(template, catalog(40), options, count=3, top=3, seed=42, workers=2)
+        assert [generated.score for generated in batch1] == [generated.score for generated in batch2]
+
+    def test_generate_batch_boards_are_reproducible_alone(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=1_000, time_limit=10)
+        best, *_ = generator.generate_batch(template, catalog(40), options, count=2, seed=7, workers=1)
+        generated = generator.generate(template, catalog(40), options, seed=best.seed)
+        assert generated.board.tiles.tolist() == best.board.tiles.tolist()
+
+    def test_generate_batch_in_shared_pool(self, template, catalog):
+        tiles = catalog(40)
+        options = schemas.GenerateOptions(evaluations=1_000, time_limit=10)
+        pool = generator.BatchPool(2)
+        try:
+            batch1 = generator.generate_batch(template, tiles, options, count=5, top=5, seed=42, pool=pool)
+            batch2 = generator.generate_batch(template, tiles, options, count=5, top=5, seed=42, pool=pool)
+        finally:
+            pool.shutdown()
+        assert [generated.seed for generated in batch1] == [generated.seed for generated in batch2]
+        # Boards are rebuilt over the catalog of the caller instead of a copy sent back by the workers.
+        assert all(generated.board.catalog is tiles for generated in batch1)
+
+    def test_generate_batch_in_shared_pool_with_another_catalog(self, template, catalog):
+        # The workers of the pool are replaced, so they do not draw from the catalog of the first batch.
+        options = schemas.GenerateOptions(evaluations=1_000, time_limit=10)
+        alone = generator.generate_batch(template, catalog(50), options, count=3, top=3, seed=42, workers=1)
+        pool = generator.BatchPool(2)
+        try:
+            generator.generate_batch(template, catalog(40), options, count=3, top=3, seed=42, pool=pool)
+            shared = generator.generate_batch(template, catalog(50), options, count=3, top=3, seed=42, pool=pool)
+        finally:
+            pool.shutdown()
+        assert [generated.board.tiles.tolist() for generated in shared] == [
+            generated.board.tiles.tolist() for generated in alone
+        ]
+
+    def test_generate_batch_top_exceeds_count(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=100)
+        batch = generator.generate_batch(template, catalog(40), options, count=2, top=5, seed=0, workers=1)
+        assert len(batch) == 2
+
+    def test_generate_batch_skips_equivalent_boards(self, template, catalog):
+        # Without system tiles every board is the empty template.
+        options = schemas.GenerateOptions(evaluations=100)
+        batch = generator.generate_batch(template, catalog(0), options, count=3, top=3, seed=0, workers=1)
+        assert len(batch) == 1
+
+    def test_unique(self, template, catalog):
+        generated = generator.generate(template, catalog(40), schemas.GenerateOptions(evaluations=100), seed=0)
+        other = generator.generate(template, catalog(40), schemas.GenerateOptions(evaluations=100), seed=1)
+        assert list(generator.unique([generated, other, generated])) == [generated, other]
+
+
+class TestDeriveSeed:
+    def test_derive_seed_is_stable(self):
+        assert generator.derive_seed(1, 0) == generator.derive_seed(1, 0)
+
+    def test_derive_seed_differs_by_index_and_seed(self):
+        seeds = {generator.derive_seed(seed, index) for seed in range(3) for index in range(100)}
+        assert len(seeds) == 300
+
+    def test_derive_seed_fits_63_bits(self):
+        assert all(0 <= generator.derive_seed(seed, 0) < 2**63 for seed in range(100))
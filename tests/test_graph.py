@@ -0,0 +1,109 @@
+import pytest
+
+from ti4_mapgen import graph, hex, schemas
+
+
+def system_tile(position, number=19, **system):
+    system = schemas.System(**{"resources": 1, "influence": 1, "planets": 1, **system})
+    return schemas.Tile(
+        type=schemas.Type.SYSTEM, number=number, release=schemas.Release.BASE, system=system, position=position
+    )
+
+
+def hyperlane_tile(position, *hyperlanes):
+    return schemas.Tile(
+        type=schemas.Type.HYPERLANE,
+        number=83,
+        letter=schemas.Letter.A,
+        release=schemas.Release.POK,
+        hyperlanes=[[direction.value for direction in hyperlane] for hyperlane in hyperlanes],
+        position=position,
+    )
+
+
+def spiral_layout(radius):
+    return [system_tile(position) for position in hex.spiral(hex.Cube(0, 0, 0), radius)]
+
+
+class TestBoardGraph:
+    def test_graph_adjacency(self):
+        board_graph = graph.BoardGraph.from_layout(spiral_layout(1))
+        neighbors = board_graph.neighbors(hex.Cube(0, 0, 0))
+        assert set(neighbors) == set(hex.ring(hex.Cube(0, 0, 0), 1))
+        assert len(board_graph.neighbors(hex.Cube(0, -1, 1))) == 3
+
+    def test_graph_distances_match_hex_distance(self):
+        layout = spiral_layout(3)
+        board_graph = graph.BoardGraph.from_layout(layout)
+        for tile1 in layout:
+            for tile2 in layout:
+                assert board_graph.distance(tile1.position, tile2.position) == hex.distance(
+                    tile1.position, tile2.position
+                )
+
+    def test_graph_wormholes(self):
+        alpha = {hex.Cube(0, -3, 3), hex.Cube(0, 3, -3)}
+        layout = [
+            system_tile(position, wormhole=schemas.Wormhole.ALPHA if position in alpha else None)
+            for position in hex.spiral(hex.Cube(0, 0, 0), 3)
+        ]
+        board_graph = graph.BoardGraph.from_layout(layout)
+        assert board_graph.distance(hex.Cube(0, -3, 3), hex.Cube(0, 3, -3)) == 1
+        assert board_graph.distance(hex.Cube(0, -2, 2), hex.Cube(0, 2, -2)) == 3
+
+    def test_graph_supernova_blocks(self):
+        # A line of three systems where the middle one is a supernova.
+        layout = [
+            system_tile(hex.Cube(0, -1, 1)),
+            system_tile(hex.Cube(0, 0, 0), anomaly=schemas.Anomaly.SUPERNOVA),
+            system_tile(hex.Cube(0, 1, -1)),
+        ]
+        board_graph = graph.BoardGraph.from_layout(layout)
+        assert board_graph.distance(hex.Cube(0, -1, 1), hex.Cube(0, 1, -1)) is None
+        assert board_graph.neighbors(hex.Cube(0, 0, 0)) == []
+
+    def test_graph_custom_blocking(self):
+        layout = [
+            system_tile(hex.Cube(0, -1, 1)),
+            system_tile(hex.Cube(0, 0, 0), anomaly=schemas.Anomaly.ASTEROID_FIELD),
+            system_tile(hex.Cube(0, 1, -1)),
+        ]
+        assert graph.BoardGraph.from_layout(layout).distance(hex.Cube(0, -1, 1), hex.Cube(0, 1, -1)) == 2
+        blocking = frozenset({schemas.Anomaly.ASTEROID_FIELD})
+        board_graph = graph.BoardGraph.from_layout(layout, blocking=blocking)
+        assert board_graph.distance(hex.Cube(0, -1, 1), hex.Cube(0, 1, -1)) is None
+
+    def test_graph_hyperlane(self):
+        # Two systems joined by a hyperlane running north to south through the center.
+        layout = [
+            system_tile(hex.Cube(0, -1, 1)),
+            hyperlane_tile(hex.Cube(0, 0, 0), [hex.Adjacent.N, hex.Adjacent.S]),
+            system_tile(hex.Cube(0, 1, -1)),
+            system_tile(hex.Cube(1, -1, 0)),
+        ]
+        board_graph = graph.BoardGraph.from_layout(layout)
+        assert len(board_graph) == 3
+        assert board_graph.distance(hex.Cube(0, -1, 1), hex.Cube(0, 1, -1)) == 1
+        assert board_graph.distance(hex.Cube(1, -1, 0), hex.Cube(0, 1, -1)) == 2
+
+    def test_graph_chained_hyperlanes(self):
+        layout = [
+            system_tile(hex.Cube(0, -1, 1)),
+            hyperlane_tile(hex.Cube(0, 0, 0), [hex.Adjacent.N, hex.Adjacent.S]),
+            hyperlane_tile(hex.Cube(0, 1, -1), [hex.Adjacent.N, hex.Adjacent.S]),
+            system_tile(hex.Cube(0, 2, -2)),
+        ]
+        board_graph = graph.BoardGraph.from_layout(layout)
+        assert board_graph.distance(hex.Cube(0, -1, 1), hex.Cube(0, 2, -2)) == 1
+
+    def test_graph_distances_are_cached(self):
+        board_graph1 = graph.BoardGraph.from_layout(spiral_layout(2))
+        board_graph2 = graph.BoardGraph.from_layout(spiral_layout(2))
+        assert board_graph1.distances is board_graph2.distances
+        assert not board_graph1.distances.flags.writeable
+
+    def test_graph_raises_without_position(self):
+        layout = [system_tile(None)]
+        with pytest.raises(ValueError) as exc_info:
+            graph.BoardGraph.from_layout(layout)
+        assert str(exc_info.value) == "tile 19 in layout must have a position"
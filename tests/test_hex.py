@@ -260,6 +260,22 @@ class TestHexRotate:
         expected = hex.Cube(-2, 0, 2)
         assert hex_rotated == expected
 
+    @pytest.mark.parametrize(
+        ["angle", "expected"],
+        [
+            (120, hex.Cube(2, 0, -2)),
+            (180, hex.Cube(0, 2, -2)),
+            (-120, hex.Cube(-2, 2, 0)),
+            (360, hex.Cube(0, -2, 2)),
+            (-360, hex.Cube(0, -2, 2)),
+        ],
+    )
+    def test_rotate_angle_multiple_steps(self, angle, expected):
+        hex_ = hex.Cube(0, -2, 2)
+        hex_center = hex.Cube(0, 0, 0)
+        hex_rotated = hex.rotate(hex_, hex_center, angle=angle)
+        assert hex_rotated == expected
+
     def test_rotate_raises_angle_increment(self):
         hex_ = hex.Cube(0, -2, 2)
         center = hex.Cube(0, 0, 0)
@@ -271,6 +287,28 @@ class TestHexRotate:
         assert message == expected
 
 
+class TestHexReflect:
+    @pytest.mark.parametrize(
+        ["hex_", "expected"],
+        [
+            (hex.Cube(0, -2, 2), hex.Cube(0, -2, 2)),
+            (hex.Cube(1, -1, 0), hex.Cube(-1, 0, 1)),
+            (hex.Cube(2, 0, -2), hex.Cube(-2, 2, 0)),
+        ],
+    )
+    def test_reflect(self, hex_, expected):
+        assert hex.reflect(hex_, hex.Cube(0, 0, 0)) == expected
+
+    def test_reflect_around_center(self):
+        center = hex.Cube(1, 0, -1)
+        assert hex.reflect(hex.Cube(2, -1, -1), center) == hex.Cube(0, 0, 0)
+
+    def test_reflect_twice(self):
+        hex_ = hex.Cube(3, -1, -2)
+        center = hex.Cube(0, 0, 0)
+        assert hex.reflect(hex.reflect(hex_, center), center) == hex_
+
+
 class TestHexDistance:
     @pytest.mark.parametrize(
         ["vector", "expected"],
@@ -352,3 +390,76 @@ class TestSpiral:
             hex.Cube(1, 0, -1),
         ]
         assert spiral == expected
+
+
+class TestHexInterning:
+    def test_arithmetic_returns_shared_instance(self):
+        hex1 = hex.Cube(0, 1, -1) + hex.Cube(1, -1, 0)
+        hex2 = hex.Cube(1, 0, -1) - hex.Cube(0, 0, 0)
+        assert hex1 is hex2
+
+    def test_arithmetic_result_equals_validated_cube(self):
+        result = hex.Cube(0, 1, -1) * 3
+        expected = hex.Cube(0, 3, -3)
+        assert result == expected
+        assert hash(result) == hash(expected)
+
+    def test_arithmetic_outside_intern_radius(self):
+        radius = hex._INTERN_RADIUS + 1
+        hex1 = hex.Cube(0, -1, 1) * radius
+        hex2 = hex.Cube(0, -1, 1) * radius
+        assert hex1 == hex2
+        assert hex1 is not hex2
+
+    def test_public_construction_validates(self):
+        with pytest.raises(ValueError):
+            _ = hex.Cube(1, 1, 1)
+
+    def test_public_construction_is_not_interned(self):
+        assert hex.Cube(0, 0, 0) is not hex.Cube(0, 0, 0)
+
+
+class TestLookupTables:
+    def test_spiral_table_matches_spiral(self):
+        table = hex.spiral_table(3)
+        assert table.positions == tuple(hex.spiral(hex.Cube(0, 0, 0), 3))
+        assert all(table.indices[position] == index for index, position in enumerate(table.positions))
+
+    def test_spiral_table_is_cached(self):
+        assert hex.spiral_table(2) is hex.spiral_table(2)
+
+    def test_spiral_table_direction(self):
+        table = hex.spiral_table(1, direction=hex.Adjacent.S, move=hex.Move.COUNTERCLOCKWISE)
+        expected = tuple(hex.spiral(hex.Cube(0, 0, 0), 1, direction=hex.Adjacent.S, move=hex.Move.COUNTERCLOCKWISE))
+        assert table.positions == expected
+
+    @pytest.mark.parametrize(
+        ["index", "expected"],
+        [
+            (0, hex.Cube(0, 0, 0)),
+            (1, hex.Cube(0, -1, 1)),
+            (7, hex.Cube(0, -2, 2)),
+            (60, hex.Cube(-1, -3, 4)),
+        ],
+    )
+    def test_spiral_position(self, index, expected):
+        assert hex.spiral_position(index) == expected
+        assert hex.spiral_index(expected) == index
+
+    def test_spiral_position_raises(self):
+        with pytest.raises(IndexError) as exc_info:
+            hex.spiral_position(61)
+        assert str(exc_info.value) == "spiral index 61 is outside a spiral of radius 4"
+
+    def test_spiral_index_raises(self):
+        with pytest.raises(ValueError) as exc_info:
+            hex.spiral_index(hex.Cube(0, -5, 5))
+        assert str(exc_info.value) == "position Cube(q=0, r=-5, s=5) is outside a spiral of radius 4"
+
+    def test_spiral_index_radius(self):
+        assert hex.spiral_index(hex.Cube(0, -5, 5), radius=5) == 61
+
+    def test_ring_table(self):
+        table = hex.ring_table(2, direction=hex.Adjacent.SE)
+        assert table == tuple(hex.ring(hex.Cube(0, 0, 0), 2, direction=hex.Adjacent.SE))
+        assert hex.ring_table(2, direction=hex.Adjacent.SE) is table
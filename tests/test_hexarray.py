@@ -0,0 +1,151 @@
+import math
+
+import numpy as np
+import pytest
+
+from ti4_mapgen import hex, hexarray
+
+
+class TestCubeArray:
+    def test_cube_array_from_cubes(self):
+        cubes = [hex.Cube(0, 0, 0), hex.Cube(0, -1, 1)]
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        assert len(hexes) == 2
+        assert hexes.to_cubes() == cubes
+
+    def test_cube_array_fields(self):
+        hexes = hexarray.CubeArray([(1, -1, 0), (0, 2, -2)])
+        assert hexes.q.tolist() == [1, 0]
+        assert hexes.r.tolist() == [-1, 2]
+        assert hexes.s.tolist() == [0, -2]
+
+    def test_cube_array_getitem(self):
+        hexes = hexarray.CubeArray([(1, -1, 0), (0, 2, -2)])
+        assert hexes[1] == hex.Cube(0, 2, -2)
+        assert hexes[:1] == hexarray.CubeArray([(1, -1, 0)])
+
+    def test_cube_array_raises(self):
+        with pytest.raises(ValueError) as exc_info:
+            _ = hexarray.CubeArray([(0, 0, 0), (1, 0, 1)])
+        error_message = str(exc_info.value)
+        assert error_message == "attributes 'q', 'r', 's' must have a sum of 0, not 2"
+
+    def test_cube_array_array_is_read_only(self):
+        hexes = hexarray.CubeArray([(1, -1, 0)])
+        with pytest.raises(ValueError):
+            hexes.array[0, 0] = 2
+
+
+class TestCubeArrayOperators:
+    def test_cube_array_add(self):
+        hexes = hexarray.CubeArray([(0, 1, -1), (1, 0, -1)])
+        expected = hexarray.CubeArray([(0, 0, 0), (1, -1, 0)])
+        assert hexes + hex.Cube(0, -1, 1) == expected
+
+    def test_cube_array_sub(self):
+        hexes1 = hexarray.CubeArray([(0, 1, -1), (1, 0, -1)])
+        hexes2 = hexarray.CubeArray([(0, -1, 1), (1, 0, -1)])
+        expected = hexarray.CubeArray([(0, 2, -2), (0, 0, 0)])
+        assert hexes1 - hexes2 == expected
+
+    def test_cube_array_mul(self):
+        hexes = hexarray.CubeArray([(0, 1, -1), (1, 0, -1)])
+        expected = hexarray.CubeArray([(0, 2, -2), (2, 0, -2)])
+        assert hexes * 2 == expected
+
+    @pytest.mark.parametrize(
+        ["other", "exception", "message"],
+        [
+            ((0, -1, 1), TypeError, "unsupported operand type(s) for +: 'CubeArray' and 'tuple'"),
+            ("0, -1, 1", TypeError, "unsupported operand type(s) for +: 'CubeArray' and 'str'"),
+        ],
+    )
+    def test_cube_array_add_raises(self, other, exception, message):
+        hexes = hexarray.CubeArray([(0, 1, -1)])
+        with pytest.raises(exception) as exc_info:
+            _ = hexes + other
+        assert str(exc_info.value) == message
+
+    def test_cube_array_abs(self):
+        hexes = hexarray.CubeArray([(0, 0, 0), (0, -2, 2), (3, -1, -2)])
+        assert abs(hexes).tolist() == [0, 2, 3]
+
+
+class TestCubeArrayMatchesScalar:
+    @pytest.mark.parametrize("direction", list(hex.Adjacent))
+    def test_adjacent(self, direction):
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 2))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        expected = [hex.adjacent(cube, direction=direction) for cube in cubes]
+        assert hexarray.adjacent(hexes, direction=direction).to_cubes() == expected
+
+    @pytest.mark.parametrize("direction", list(hex.Diagonal))
+    def test_diagonal(self, direction):
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 2))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        expected = [hex.diagonal(cube, direction=direction) for cube in cubes]
+        assert hexarray.diagonal(hexes, direction=direction).to_cubes() == expected
+
+    @pytest.mark.parametrize("radius", [0, 1, 2, 4])
+    @pytest.mark.parametrize("direction", list(hex.Adjacent))
+    @pytest.mark.parametrize("move", list(hex.Move))
+    def test_ring(self, radius, direction, move):
+        center = hex.Cube(1, -2, 1)
+        expected = list(hex.ring(center, radius, direction=direction, move=move))
+        assert hexarray.ring(center, radius, direction=direction, move=move).to_cubes() == expected
+
+    @pytest.mark.parametrize("radius", [0, 1, 3, 4])
+    @pytest.mark.parametrize("direction", [hex.Adjacent.N, hex.Adjacent.SW])
+    @pytest.mark.parametrize("move", list(hex.Move))
+    def test_spiral(self, radius, direction, move):
+        center = hex.Cube(0, -1, 1)
+        expected = list(hex.spiral(center, radius, direction=direction, move=move))
+        assert hexarray.spiral(center, radius, direction=direction, move=move).to_cubes() == expected
+
+    @pytest.mark.parametrize("angle", [-360, -240, -120, -60, 0, 60, 120, 180, 300, 360, 420])
+    def test_rotate(self, angle):
+        center = hex.Cube(1, 0, -1)
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 2))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        expected = [hex.rotate(cube, center, angle=angle) for cube in cubes]
+        assert hexarray.rotate(hexes, center, angle=angle).to_cubes() == expected
+
+    def test_rotate_raises_angle_increment(self):
+        hexes = hexarray.CubeArray([(0, -2, 2)])
+        with pytest.raises(ValueError) as exc_info:
+            hexarray.rotate(hexes, hex.Cube(0, 0, 0), angle=30)
+        message, *_ = exc_info.value.args
+        assert message == "argument 'angle' must be in 60 degree increments"
+
+    def test_length(self):
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 3))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        assert hexarray.length(hexes).tolist() == [hex.length(cube) for cube in cubes]
+
+    def test_distance(self):
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 3))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        other = hex.Cube(2, -3, 1)
+        assert hexarray.distance(hexes, other).tolist() == [hex.distance(cube, other) for cube in cubes]
+
+    def test_distance_matrix(self):
+        cubes = list(hex.spiral(hex.Cube(0, 0, 0), 2))
+        hexes = hexarray.CubeArray.from_cubes(cubes)
+        expected = np.array([[hex.distance(cube1, cube2) for cube2 in cubes] for cube1 in cubes])
+        assert (hexarray.distance_matrix(hexes, hexes) == expected).all()
+
+
+class TestToPixels:
+    def test_to_pixels(self):
+        hexes = hexarray.CubeArray([(0, 0, 0), (0, -1, 1), (1, -1, 0), (2, -1, -1)])
+        expected = [(0, 0), (0, -math.sqrt(3)), (1.5, -math.sqrt(3) / 2), (3, 0)]
+        assert hexarray.to_pixels(hexes) == pytest.approx(np.array(expected))
+
+    def test_to_pixels_scales_with_size(self):
+        hexes = hexarray.spiral(hex.Cube(0, 0, 0), 2)
+        assert hexarray.to_pixels(hexes, 10) == pytest.approx(hexarray.to_pixels(hexes) * 10)
+
+    def test_adjacent_centers_are_equidistant(self):
+        hexes = hexarray.ring(hex.Cube(0, 0, 0), 1)
+        distances = np.linalg.norm(hexarray.to_pixels(hexes), axis=1)
+        assert distances == pytest.approx(np.full(6, math.sqrt(3)))
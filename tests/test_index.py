@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from ti4_mapgen import index, schemas
+
+
+def tiles():
+    return [
+        schemas.Tile(type=schemas.Type.HOME, number=1, release=schemas.Release.BASE),
+        schemas.Tile(
+            type=schemas.Type.SYSTEM,
+            number=19,
+            release=schemas.Release.BASE,
+            back=schemas.Color.BLUE,
+            system=schemas.System(resources=1, influence=2, planets=1),
+        ),
+        schemas.Tile(
+            type=schemas.Type.SYSTEM,
+            number=41,
+            release=schemas.Release.BASE,
+            back=schemas.Color.RED,
+            system=schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.GRAVITY_RIFT),
+        ),
+        schemas.Tile(
+            type=schemas.Type.SYSTEM,
+            number=59,
+            release=schemas.Release.POK,
+            back=schemas.Color.BLUE,
+            system=schemas.System(resources=3, influence=1, planets=1),
+        ),
+        schemas.Tile(
+            type=schemas.Type.SYSTEM,
+            number=67,
+            release=schemas.Release.POK,
+            back=schemas.Color.RED,
+            system=schemas.System(resources=1, influence=0, planets=1, anomaly=schemas.Anomaly.GRAVITY_RIFT),
+        ),
+        schemas.Tile(type=schemas.Type.HYPERLANE, number=83, letter=schemas.Letter.A, release=schemas.Release.POK),
+    ]
+
+
+class TestTileIndex:
+    def test_index_single_field(self):
+        tile_index = index.TileIndex(tiles())
+        assert len(tile_index) == 6
+        assert tile_index.ids(type=schemas.Type.SYSTEM).tolist() == [1, 2, 3, 4]
+        assert tile_index.ids(letter=schemas.Letter.A).tolist() == [5]
+
+    def test_index_intersects_fields(self):
+        tile_index = index.TileIndex(tiles())
+        ids = tile_index.ids(
+            type=schemas.Type.SYSTEM, release=schemas.Release.POK, back=schemas.Color.BLUE, anomaly=None
+        )
+        assert ids.tolist() == [3]
+
+    def test_index_unions_values(self):
+        tile_index = index.TileIndex(tiles())
+        ids = tile_index.ids(release=[schemas.Release.POK, schemas.Release.CODEX_3], back=schemas.Color.RED)
+        assert ids.tolist() == [4]
+
+    def test_index_matches_string_values(self):
+        tile_index = index.TileIndex(tiles())
+        assert tile_index.ids(type="home").tolist() == [0]
+
+    def test_index_without_criteria_selects_every_tile(self):
+        assert index.TileIndex(tiles()).ids().tolist() == [0, 1, 2, 3, 4, 5]
+
+    def test_index_without_matches(self):
+        ids = index.TileIndex(tiles()).ids(number=1, type=schemas.Type.SYSTEM)
+        assert ids.tolist() == []
+        assert ids.dtype == np.int16
+
+    def test_index_unknown_field(self):
+        with pytest.raises(ValueError):
+            index.TileIndex(tiles()).ids(resources=1)
+
+    def test_index_query_ignores_unset_fields(self):
+        tile_index = index.TileIndex(tiles())
+        query = schemas.TileQuery(type=schemas.Type.SYSTEM, back=schemas.Color.RED)
+        assert tile_index.query(query).tolist() == [2, 4]
+        assert tile_index.query(schemas.TileQuery()).tolist() == [0, 1, 2, 3, 4, 5]
+
+    def test_index_matches_scan(self):
+        tiles_ = tiles() * 30
+        tile_index = index.TileIndex(tiles_)
+        expected = [
+            id
+            for id, tile in enumerate(tiles_)
+            if tile.release is schemas.Release.POK and (tile.system is None or tile.system.anomaly is None)
+        ]
+        assert tile_index.ids(release=schemas.Release.POK, anomaly=None).tolist() == expected
+
+    def test_bitmap_ids(self):
+        assert index.bitmap_ids(0b1011).tolist() == [0, 1, 3]
+        assert index.bitmap_ids(0, 10).tolist() == []
@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import os
+import time
+
+import pytest
+
+from ti4_mapgen import generator, jobs, schemas
+
+
+@pytest.fixture
+def template(make_template):
+    return make_template(2, homes=(7, 11, 15))
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    return make_catalog(
+        [schemas.System(resources=number % 4, influence=number % 3, planets=1) for number in range(19, 40)]
+    )
+
+
+def square(value, *, progress):
+    progress(float(value), 10)
+    return value * value
+
+
+def slow(seconds, *, progress):
+    progress(1.5, 100)
+    time.sleep(seconds)
+    return seconds
+
+
+def fail(*, progress):
+    raise ValueError("no placement")
+
+
+def crash(seconds, *, progress):
+    time.sleep(seconds)
+    os._exit(1)
+
+
+def run(coroutine):
+    async def main():
+        queue = jobs.JobQueue(workers=1, depth=2)
+        await queue.start()
+        try:
+            return await coroutine(queue)
+        finally:
+            await queue.stop()
+
+    return asyncio.run(main())
+
+
+class TestJobQueue:
+    def test_job_runs(self):
+        async def main(queue):
+            job = queue.submit(functools.partial(square, 3))
+            assert queue.get(job.id).status is schemas.JobStatus.QUEUED
+            await queue.wait(job, 10)
+            return queue.get(job.id)
+
+        job = run(main)
+        assert job.status is schemas.JobStatus.DONE
+        assert job.result == 9
+        assert (job.score, job.evaluations) == (3.0, 10)
+
+    def test_finish(self):
+        async def main(queue):
+            async def finish(result):
+                return f"result {result}"
+
+            job = queue.submit(functools.partial(square, 2), finish=finish)
+            await queue.wait(job, 10)
+            return job
+
+        assert run(main).result == "result 4"
+
+    def test_running_job_reports_progress(self):
+        async def main(queue):
+            job = queue.submit(functools.partial(slow, 0.5))
+            while queue.get(job.id).evaluations == 0:
+                await asyncio.sleep(0.01)
+            running = queue.get(job.id)
+            return running.status, running.score, running.evaluations
+
+        assert run(main) == (schemas.JobStatus.RUNNING, 1.5, 100)
+
+    def test_wait_times_out(self):
+        async def main(queue):
+            job = queue.submit(functools.partial(slow, 0.5))
+            await queue.wait(job, 0.01)
+            return job.done.is_set()
+
+        assert not run(main)
+
+    def test_failed_job(self):
+        async def main(queue):
+            job = queue.submit(fail)
+            await queue.wait(job, 10)
+            return job
+
+        job = run(main)
+        assert job.status is schemas.JobStatus.FAILED
+        assert job.error == "no placement"
+
+    def test_dead_worker_replaces_pool_once(self):
+        async def main():
+            queue = jobs.JobQueue(workers=2, depth=2)
+            await queue.start()
+            created = []
+            create_executor = queue._create_executor
+            queue._create_executor = lambda: created.append(create_executor()) or created[-1]
+            try:
+                # Both jobs run in the pool when one of its workers dies, so both fail.
+                crashed = queue.submit(functools.partial(crash, 0.2))
+                running = queue.submit(functools.partial(slow, 2))
+                await queue.wait(crashed, 10)
+                await queue.wait(running, 10)
+                after = queue.submit(functools.partial(square, 2))
+                await queue.wait(after, 10)
+                return crashed, running, after, created, queue._executor
+            finally:
+                await queue.stop()
+
+        crashed, running, after, created, executor = asyncio.run(main())
+        assert crashed.status is running.status is schemas.JobStatus.FAILED
+        assert after.status is schemas.JobStatus.DONE
+        assert len(created) == 1
+        assert created[0] is executor
+
+    def test_full_queue_refuses_jobs(self):
+        async def main(queue):
+            # The worker task does not take a job before the event loop runs it.
+            for _ in range(queue.depth):
+                queue.submit(functools.partial(square, 1))
+            with pytest.raises(jobs.QueueFull, match="the job queue is full with 2 waiting jobs"):
+                queue.submit(functools.partial(square, 1))
+            return queue.queued
+
+        assert run(main) == 2
+
+    def test_unknown_job(self):
+        async def main(queue):
+            return queue.get("unknown")
+
+        assert run(main) is None
+
+    def test_submit_before_start(self):
+        async def main():
+            jobs.JobQueue(workers=1, depth=1).submit(functools.partial(square, 1))
+
+        with pytest.raises(RuntimeError, match="job queue is not started"):
+            asyncio.run(main())
+
+    def test_generate(self, template, catalog):
+        options = schemas.GenerateOptions(evaluations=25_000, time_limit=10)
+
+        async def main(queue):
+            job = queue.submit(functools.partial(generator.generate, template, catalog, options, seed=0))
+            await queue.wait(job, 30)
+            return job
+
+        job = run(main)
+        expected = generator.generate(template, catalog, options, seed=0)
+        assert job.status is schemas.JobStatus.DONE
+        assert job.result.board.tiles.tolist() == expected.board.tiles.tolist()
+        assert (job.score, job.evaluations) == (expected.score, 25_000)
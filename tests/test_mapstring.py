@@ -0,0 +1,126 @@
+import random
+
+import numpy as np
+import pytest
+
+from ti4_mapgen import board, hex, mapstring, schemas
+
+CENTER = hex.Cube(0, 0, 0)
+
+# A bend from the north edge to the south east edge, and a straight lane from the north east edge.
+LANES = [[hex.Adjacent.N.value, hex.Adjacent.SE.value], [hex.Adjacent.NE.value, hex.Adjacent.SW.value]]
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    tiles = [
+        schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE),
+        schemas.Tile(type=schemas.Type.EXTERIOR, number=82, release=schemas.Release.POK),
+        schemas.Tile(
+            type=schemas.Type.HYPERLANE,
+            number=84,
+            letter=schemas.Letter.B,
+            release=schemas.Release.POK,
+            hyperlanes=LANES,
+        ),
+    ]
+    return make_catalog(21, tiles=tiles)
+
+
+@pytest.fixture
+def template(make_template):
+    hyperlane = schemas.Tile(
+        type=schemas.Type.HYPERLANE,
+        number=84,
+        letter=schemas.Letter.B,
+        release=schemas.Release.POK,
+        hyperlanes=[[hex.rotate(end, CENTER, angle=120) for end in lane] for lane in LANES],
+    )
+    return make_template(2, homes=(1, 4), tiles={7: hyperlane})
+
+
+def lanes(tile):
+    return {frozenset(lane) for lane in tile.hyperlanes}
+
+
+class TestEncode:
+    def test_encode(self, template, catalog):
+        tiles = catalog
+        board_ = board.Board.setup(template, tiles, rng=random.Random(0))
+        tokens = mapstring.encode(board_.layout, tiles).split()
+        assert len(tokens) == 18
+        assert tokens[0] == tokens[3] == "0"
+        assert tokens[6] == "84B2"
+        numbers = [int(token) for index, token in enumerate(tokens) if index not in (0, 3, 6)]
+        assert numbers == [tiles[id].number for id in board_.tiles.tolist() if id != board.EMPTY]
+
+    def test_encode_other_center(self, catalog):
+        layout = [
+            schemas.Tile(type=schemas.Type.EXTERIOR, number=82, release=schemas.Release.POK, position=CENTER),
+            catalog[3].copy(update={"position": hex.Cube(0, -1, 1)}),
+        ]
+        assert mapstring.encode(layout, catalog) == "{82} 19"
+
+    def test_trailing_positions_are_left_out(self, catalog):
+        layout = [
+            catalog[0].copy(update={"position": CENTER}),
+            catalog[3].copy(update={"position": hex.Cube(1, -1, 0)}),
+        ]
+        assert mapstring.encode(layout, catalog) == "-1 19"
+
+    def test_encode_empty_system_slot(self, template, catalog):
+        with pytest.raises(ValueError, match="system slot at .* has no tile"):
+            mapstring.encode(template, catalog)
+
+    def test_encode_unknown_hyperlanes(self, template, catalog):
+        layout = list(template)
+        layout[7] = layout[7].copy(update={"hyperlanes": [[hex.Adjacent.N.value, hex.Adjacent.S.value]]})
+        tiles = board.Board.setup(layout, catalog, rng=random.Random(0)).layout
+        with pytest.raises(ValueError, match="hyperlanes of tile 84 are not a rotation of a catalog tile"):
+            mapstring.encode(tiles, catalog)
+
+
+class TestDecode:
+    def test_round_trip(self, template, catalog):
+        tiles = catalog
+        layout = board.Board.setup(template, tiles, rng=random.Random(0)).layout
+        decoded = mapstring.decode(mapstring.encode(layout, tiles), tiles)
+        assert [(tile.position, tile.type, tile.number) for tile in decoded] == [
+            (tile.position, tile.type, tile.number) for tile in layout
+        ]
+        assert [lanes(tile) for tile in decoded] == [lanes(tile) for tile in layout]
+
+    def test_decode_tokens(self, catalog):
+        decoded = mapstring.decode("{82} 0 -1 84b1", catalog)
+        assert [(tile.type, tile.number) for tile in decoded] == [
+            (schemas.Type.EXTERIOR, 82),
+            (schemas.Type.HOME, 0),
+            (schemas.Type.HYPERLANE, 84),
+        ]
+        assert [tile.position for tile in decoded] == [CENTER, hex.Cube(0, -1, 1), hex.Cube(1, 0, -1)]
+        turned = [[hex.rotate(end, CENTER, angle=60) for end in lane] for lane in LANES]
+        assert lanes(decoded[2]) == {frozenset(lane) for lane in turned}
+
+    def test_decode_unknown_tile(self, catalog):
+        with pytest.raises(ValueError, match="tile '91' in map string 1 is not in the catalog"):
+            mapstring.decode("19 91", catalog)
+
+
+class TestDecodeAll:
+    def test_decode_all(self, catalog):
+        tiles = catalog
+        decoded = mapstring.decode_all(["19 20", "21 84B3 -1 0", ""], tiles)
+        assert decoded.tiles.shape == decoded.rotations.shape == (3, 5)
+        numbers = np.array([-1] + [tile.number for tile in tiles.tiles])[decoded.tiles + 1]
+        assert numbers[:, :3].tolist() == [[18, 19, 20], [18, 21, 84], [18, -1, -1]]
+        assert decoded.tiles[1, 3:].tolist() == [board.EMPTY, mapstring.HOME_SLOT]
+        assert decoded.rotations[1].tolist() == [0, 0, 3, 0, 0]
+
+    def test_decode_all_reports_line(self, catalog):
+        with pytest.raises(ValueError, match="in map string 2"):
+            mapstring.decode_all(["19", "19 1"], catalog)
+
+    def test_center_must_be_in_catalog(self, catalog):
+        tiles = board.Catalog(catalog.tiles[1:])
+        with pytest.raises(ValueError, match="tile '18' in map string 1 is not in the catalog"):
+            mapstring.decode_all(["19"], tiles)
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from ti4_mapgen import metrics
+
+
+class TestHistogram:
+    def test_render(self):
+        histogram = metrics.Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+        histogram.observe(0.1, '/"b"')
+        assert list(histogram.render()) == [
+            "# HELP latency_seconds Latency.",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{route="/\\"b\\"",le="0.1"} 1',
+            'latency_seconds_bucket{route="/\\"b\\"",le="1.0"} 1',
+            'latency_seconds_bucket{route="/\\"b\\"",le="+Inf"} 1',
+            'latency_seconds_sum{route="/\\"b\\""} 0.1',
+            'latency_seconds_count{route="/\\"b\\""} 1',
+            'latency_seconds_bucket{route="/a",le="0.1"} 1',
+            'latency_seconds_bucket{route="/a",le="1.0"} 2',
+            'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+            'latency_seconds_sum{route="/a"} 5.55',
+            'latency_seconds_count{route="/a"} 3',
+        ]
+
+
+class TestRegistry:
+    def test_stage(self):
+        registry = metrics.Registry()
+        with registry.stage("fetch"):
+            pass
+        assert 'ti4_mapgen_stage_duration_seconds_count{stage="fetch"} 1' in registry.render()
+
+    def test_disabled_stage_records_nothing(self):
+        registry = metrics.Registry(enabled=False)
+        with registry.stage("fetch"):
+            pass
+        assert "stage=" not in registry.render()
+
+    def test_timed(self, monkeypatch):
+        registry = metrics.Registry()
+        monkeypatch.setattr(metrics, "REGISTRY", registry)
+        double = metrics.timed("generate")(lambda value: value * 2)
+        assert double(2) == 4
+        assert 'ti4_mapgen_stage_duration_seconds_count{stage="generate"} 1' in registry.render()
+
+
+class TestTimingMiddleware:
+    def test_records_route_and_status(self):
+        async def endpoint():
+            ...
+
+        class App:
+            routes = [SimpleNamespace(endpoint=endpoint, path="/tiles/")]
+
+        async def app(scope, receive, send):
+            scope["endpoint"] = endpoint if scope["path"] == "/tiles/" else None
+            assert registry.in_flight.value == 1
+            await send({"type": "http.response.start", "status": 200 if scope["endpoint"] else 404})
+
+        async def send(message):
+            pass
+
+        registry = metrics.Registry()
+        middleware = metrics.TimingMiddleware(app, registry)
+        for path in ["/tiles/", "/tiles/", "/missing"]:
+            asyncio.run(middleware({"type": "http", "method": "GET", "path": path, "app": App()}, None, send))
+
+        rendered = registry.render()
+        assert 'ti4_mapgen_request_duration_seconds_count{method="GET",route="/tiles/",status="200"} 2' in rendered
+        assert 'ti4_mapgen_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in rendered
+        assert registry.in_flight.value == 0
+
+    def test_disabled_registry_records_nothing(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200})
+
+        async def send(message):
+            pass
+
+        registry = metrics.Registry(enabled=False)
+        middleware = metrics.TimingMiddleware(app, registry)
+        asyncio.run(middleware({"type": "http", "method": "GET", "path": "/tiles/"}, None, send))
+        assert "route=" not in registry.render()
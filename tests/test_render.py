@@ -0,0 +1,70 @@
+import xml.dom.minidom
+
+import pytest
+
+from ti4_mapgen import board, hex, render, schemas
+
+
+@pytest.fixture
+def template(make_template):
+    lanes = [[hex.Adjacent.N.value, hex.Adjacent.S.value], [hex.Adjacent.NE.value, hex.Adjacent.SW.value]]
+    hyperlane = schemas.Tile(type=schemas.Type.HYPERLANE, number=83, release=schemas.Release.POK, hyperlanes=lanes)
+    return make_template(1, tiles={1: hyperlane})
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    system = schemas.System(resources=2, influence=1, planets=1, wormhole=schemas.Wormhole.ALPHA)
+    return make_catalog([system] * 5, backs=[schemas.Color.BLUE] * 5)
+
+
+def parse(document):
+    return xml.dom.minidom.parseString(document).documentElement
+
+
+class TestSvg:
+    def test_every_tile_is_placed(self, template, catalog):
+        board_ = board.Board.setup(template, catalog)
+        root = parse(render.svg(board_, size=10))
+        uses = root.getElementsByTagName("use")
+        assert len(uses) == 7
+        assert (uses[0].getAttribute("x"), uses[0].getAttribute("y")) == ("0", "0")
+        # The first tile of the ring is north of the center.
+        assert (uses[1].getAttribute("x"), uses[1].getAttribute("y")) == ("0", "-17.3")
+
+    def test_distinct_tiles_are_defined_once(self, template):
+        board_ = render.from_layout(template)
+        root = parse(render.svg(board_))
+        # The center, the hyperlane tile and the empty system slots.
+        assert len(root.getElementsByTagName("g")) == 3
+        assert len(root.getElementsByTagName("path")) == 2
+
+    def test_systems_show_resources_and_wormholes(self, template, catalog):
+        board_ = board.Board.setup(template, catalog)
+        texts = [text.firstChild.data for text in parse(render.svg(board_)).getElementsByTagName("text")]
+        assert "2/1" in texts
+        assert "α" in texts
+
+    def test_view_box_holds_every_tile(self, template):
+        root = parse(render.svg(render.from_layout(template), size=10))
+        x, y, width, height = map(float, root.getAttribute("viewBox").split())
+        assert (x, y) == pytest.approx((-30, -32.3))
+        assert (width, height) == pytest.approx((60, 64.6))
+
+    def test_from_layout_needs_positions(self, template):
+        layout = template
+        layout[0] = layout[0].copy(update={"position": None})
+        with pytest.raises(ValueError, match="tile 18 in layout must have a position"):
+            render.from_layout(layout)
+
+
+class TestEncode:
+    def test_svg(self, template):
+        encoded = render.encode(render.from_layout(template), schemas.ImageFormat.SVG)
+        assert encoded.media_type == "image/svg+xml"
+        assert encoded.body.startswith(b"<svg")
+
+    def test_png_needs_cairosvg(self, monkeypatch, template):
+        monkeypatch.setattr(render, "cairosvg", None)
+        with pytest.raises(RuntimeError, match="cairosvg"):
+            render.encode(render.from_layout(template), schemas.ImageFormat.PNG)
@@ -0,0 +1,99 @@
+import gzip
+
+import pytest
+from fastapi import Request
+
+from ti4_mapgen import responses, schemas
+
+
+def request(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    }
+    return Request(scope)
+
+
+def encoded(size=100):
+    factions = [schemas.Faction(name=schemas.Name.SOL, release=schemas.Release.BASE)] * size
+    return responses.Encoded.json(factions, headers={"X-Next-Cursor": "a"})
+
+
+class TestEncoded:
+    def test_json_matches_models(self):
+        factions = [schemas.Faction(name=schemas.Name.SOL, release=schemas.Release.BASE)]
+        assert responses.Encoded.json(factions).body == b'[{"name":"The Federation of Sol","release":"base"}]'
+
+    def test_etag_is_stable(self):
+        assert encoded().etag == encoded().etag
+        assert encoded().etag != encoded(size=99).etag
+
+    def test_response(self):
+        response = encoded().response(request())
+        assert response.status_code == 200
+        assert response.body == encoded().body
+        assert response.headers["etag"] == encoded().etag
+        assert response.headers["x-next-cursor"] == "a"
+        assert "content-encoding" not in response.headers
+
+    def test_not_modified(self):
+        etag = encoded().etag
+        for if_none_match in [etag, f'"other", W/{etag}', "*"]:
+            response = encoded().response(request(if_none_match=if_none_match))
+            assert response.status_code == 304
+            assert response.body == b""
+            assert response.headers["etag"] == etag
+
+    def test_gzip(self):
+        encoded_ = encoded()
+        response = encoded_.response(request(accept_encoding="gzip, deflate"))
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(response.body) == encoded_.body
+        assert response.headers["etag"] != encoded_.etag
+        assert encoded_.compressed("gzip") is encoded_.compressed("gzip")
+        cached = encoded_.response(request(accept_encoding="gzip", if_none_match=response.headers["etag"]))
+        assert cached.status_code == 304
+
+    def test_small_bodies_are_not_compressed(self):
+        response = encoded(size=1).response(request(accept_encoding="gzip"))
+        assert "content-encoding" not in response.headers
+
+    def test_incompressible_bodies_are_not_compressed(self):
+        encoded_ = responses.Encoded(bytes(1000), media_type="image/png", compressible=False)
+        response = encoded_.response(request(accept_encoding="gzip"))
+        assert "content-encoding" not in response.headers
+        assert response.headers["etag"] == encoded_.etag
+
+
+class TestNegotiate:
+    @pytest.mark.parametrize(
+        "accept_encoding, coding",
+        [
+            ("", None),
+            ("identity", None),
+            ("gzip", "gzip"),
+            ("GZIP;q=0.5, identity", "gzip"),
+            ("gzip;q=0", None),
+            ("*", "gzip"),
+            ("*, gzip;q=0", None),
+        ],
+    )
+    def test_negotiate(self, accept_encoding, coding, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", None)
+        assert responses.negotiate(accept_encoding) == coding
+
+    def test_negotiate_prefers_brotli(self, monkeypatch):
+        monkeypatch.setattr(responses, "brotli", object())
+        assert responses.negotiate("gzip, br") == "br"
+        assert responses.negotiate("gzip, br;q=0.5") == "gzip"
+
+
+class TestEncodedCache:
+    def test_entries_follow_source(self):
+        encoded_cache = responses.EncodedCache(maxsize=4)
+        source, other = object(), object()
+        first = encoded_cache.get("key", source, encoded)
+        assert encoded_cache.get("key", source, lambda: pytest.fail("encoded twice")) is first
+        assert encoded_cache.get("key", other, encoded) is not first
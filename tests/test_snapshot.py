@@ -0,0 +1,121 @@
+import pickle
+
+import pytest
+
+from ti4_mapgen import board, hex, schemas, snapshot
+
+
+def tiles():
+    return [
+        schemas.TileInDB(
+            key="a1", type=schemas.Type.HOME, number=1, release=schemas.Release.BASE, faction=schemas.Name.JOL_NAR
+        ),
+        schemas.TileInDB(
+            key="b2",
+            type=schemas.Type.SYSTEM,
+            number=25,
+            release=schemas.Release.BASE,
+            back=schemas.Color.BLUE,
+            system=schemas.System(
+                resources=2,
+                influence=3,
+                planets=2,
+                traits=[schemas.Trait.CULTURAL, schemas.Trait.CULTURAL],
+                techs=[schemas.Tech.WARFARE],
+                wormhole=schemas.Wormhole.BETA,
+            ),
+        ),
+        schemas.TileInDB(
+            key="c3",
+            type=schemas.Type.SYSTEM,
+            number=67,
+            release=schemas.Release.POK,
+            back=schemas.Color.RED,
+            system=schemas.System(
+                resources=1,
+                influence=2,
+                planets=1,
+                anomaly=schemas.Anomaly.GRAVITY_RIFT,
+                legendary=True,
+            ),
+        ),
+        schemas.TileInDB(
+            key="d4",
+            type=schemas.Type.HYPERLANE,
+            number=83,
+            letter=schemas.Letter.A,
+            release=schemas.Release.POK,
+            hyperlanes=[[hex.Cube(1, -1, 0), hex.Cube(-1, 1, 0)], [hex.Cube(0, -1, 1), hex.Cube(0, 1, -1)]],
+        ),
+    ]
+
+
+def maps():
+    layout = [
+        schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE, position=hex.Cube(0, 0, 0)),
+        schemas.Tile(type=schemas.Type.HOME, number=1, release=schemas.Release.BASE, position=hex.Cube(0, -3, 3)),
+    ]
+    return [
+        schemas.MapInDB(
+            key="m1",
+            players=schemas.Players.SIX,
+            style="normal",
+            description="Standard map",
+            source="rules",
+            layout=[tile.dict() for tile in layout],
+        )
+    ]
+
+
+def factions():
+    return [
+        schemas.Faction(name=schemas.Name.SOL, release=schemas.Release.BASE),
+        schemas.Faction(name=schemas.Name.KELERES, release=schemas.Release.CODEX_3),
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    snapshot.write(path, tiles(), maps(), factions())
+    return path
+
+
+class TestSnapshot:
+    def test_tiles_round_trip(self, path):
+        catalog = snapshot.Snapshot(path).catalog()
+        assert [tile.dict() for tile in catalog.tiles] == [tile.dict() for tile in tiles()]
+        assert catalog.ids(schemas.Type.SYSTEM).tolist() == [1, 2]
+
+    def test_maps_round_trip(self, path):
+        (map_,) = snapshot.Snapshot(path).map_list()
+        expected = maps()[0]
+        assert map_.dict(exclude={"layout"}) == expected.dict(exclude={"layout"})
+        assert [schemas.Tile.parse_obj(tile).dict() for tile in map_.layout] == expected.layout
+
+    def test_factions_round_trip(self, path):
+        assert snapshot.Snapshot(path).faction_list() == factions()
+
+    def test_records_are_read_only_views(self, path):
+        snapshot_ = snapshot.Snapshot(path)
+        assert snapshot_.tiles["number"].tolist() == [1, 25, 67, 83]
+        assert not snapshot_.tiles.flags.writeable
+
+    def test_catalog_pickles_as_path(self, path):
+        catalog = snapshot.Snapshot(path).catalog()
+        data = pickle.dumps(catalog)
+        assert len(data) < 200
+        restored = pickle.loads(data)
+        assert isinstance(restored, board.Catalog)
+        assert [tile.number for tile in restored.tiles] == [1, 25, 67, 83]
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "other"
+        path.write_bytes(b"\0" * 64)
+        with pytest.raises(ValueError):
+            snapshot.Snapshot(str(path))
+
+    def test_rejects_values_which_do_not_fit(self, tmp_path):
+        tile = tiles()[1].copy(update={"number": 40_000})
+        with pytest.raises(ValueError):
+            snapshot.write(str(tmp_path / "catalog.snapshot"), [tile], [], [])
@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+
+from ti4_mapgen import board, hex, schemas, solver
+
+
+def systems(anomalies, wormholes=0, planets=0):
+    """Create anomalies, alpha wormholes and single planet systems, in that order."""
+    return (
+        [schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.NEBULA)] * anomalies
+        + [schemas.System(resources=0, influence=0, planets=0, wormhole=schemas.Wormhole.ALPHA)] * wormholes
+        + [schemas.System(resources=1, influence=1, planets=1)] * planets
+    )
+
+
+def adjacent_pairs(layout, tiles, selection):
+    """Count the adjacent slots which both hold a tile of a selection."""
+    positions = {tile.position: id for tile, id in zip(layout, tiles)}
+    return sum(
+        positions.get(hex.adjacent(position, direction=direction), -1) in selection
+        for position, id in positions.items()
+        if id in selection
+        for direction in hex.Adjacent
+    )
+
+
+class TestSolver:
+    def test_solve_separates_anomalies(self, make_template, make_catalog):
+        # Random placements of 10 anomalies on 36 slots almost never keep them apart.
+        tiles = make_catalog(systems(anomalies=10, planets=26))
+        stack = tiles.ids(schemas.Type.SYSTEM)
+        solver_ = solver.Solver(make_template(3), tiles.index, stack, solver.TOURNAMENT)
+        for seed in range(5):
+            placement = solver_.solve(random.Random(seed))
+            assert sorted(placement.tolist()) == stack.tolist()
+            assert solver_.check(placement)
+            layout = make_template(3)[1:]
+            assert adjacent_pairs(layout, placement.tolist(), set(range(10))) == 0
+
+    def test_solve_is_random(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=6, planets=30))
+        solver_ = solver.Solver(make_template(3), tiles.index, tiles.ids(schemas.Type.SYSTEM), solver.TOURNAMENT)
+        placements = {tuple(solver_.solve(random.Random(seed)).tolist()) for seed in range(5)}
+        assert len(placements) == 5
+
+    def test_solve_unsatisfiable(self, make_template, make_catalog):
+        # Every slot of the first ring is adjacent to two others, so seven wormholes do not fit on it.
+        tiles = make_catalog(systems(anomalies=0, wormholes=4, planets=2))
+        solver_ = solver.Solver(make_template(1), tiles.index, tiles.ids(schemas.Type.SYSTEM), solver.TOURNAMENT)
+        assert solver_.solve(random.Random(0)) is None
+
+    def test_solve_with_small_stack(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=0, planets=3))
+        solver_ = solver.Solver(make_template(1), tiles.index, tiles.ids(schemas.Type.SYSTEM), solver.TOURNAMENT)
+        assert solver_.solve(random.Random(0)) is None
+
+    def test_distance(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=2, planets=4))
+        constraints = [solver.Apart({"anomaly": tuple(schemas.Anomaly)}, distance=2)]
+        solver_ = solver.Solver(make_template(1), tiles.index, tiles.ids(schemas.Type.SYSTEM), constraints)
+        # Every slot of the first ring is within two steps of every other slot.
+        assert solver_.solve(random.Random(0)) is None
+
+    def test_directions(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=3, planets=3))
+        directions = (hex.Adjacent.NE, hex.Adjacent.SE)
+        constraints = [solver.Apart({"anomaly": schemas.Anomaly.NEBULA}, directions=directions)]
+        solver_ = solver.Solver(make_template(1), tiles.index, tiles.ids(schemas.Type.SYSTEM), constraints)
+        # Ring slots which are neighbors along the north-east or south-east axis, from north clockwise.
+        conflicts = [{0, 1}, {2, 3}, {3, 4}, {5, 0}]
+        for seed in range(5):
+            placement = solver_.solve(random.Random(seed))
+            anomalies = {slot for slot, id in enumerate(placement.tolist()) if id < 3}
+            assert not any(conflict <= anomalies for conflict in conflicts)
+
+    def test_check(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=2, planets=4))
+        solver_ = solver.Solver(make_template(1), tiles.index, tiles.ids(schemas.Type.SYSTEM), solver.TOURNAMENT)
+        # The ring slots are in order, so consecutive slots are adjacent.
+        assert not solver_.check(np.array([0, 1, 2, 3, 4, 5]))
+        assert solver_.check(np.array([0, 2, 1, 3, 4, 5]))
+        assert solver_.check(np.array([0, 2, board.EMPTY, 3, 4, 5]))
+
+
+class TestBoardSetup:
+    def test_setup_with_constraints(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=10, planets=28))
+        board_ = board.Board.setup(make_template(3), tiles, constraints=solver.TOURNAMENT, rng=random.Random(0))
+        slots = board_.slots(schemas.Type.SYSTEM)
+        assert adjacent_pairs(board_.template[1:], board_.tiles[slots].tolist(), set(range(10))) == 0
+        assert sorted([*board_.tiles[slots].tolist(), *board_.stack.tolist()]) == list(range(38))
+
+    def test_setup_unsatisfiable(self, make_template, make_catalog):
+        tiles = make_catalog(systems(anomalies=7))
+        with pytest.raises(ValueError):
+            board.Board.setup(make_template(1), tiles, constraints=solver.TOURNAMENT, rng=random.Random(0))
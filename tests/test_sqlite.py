@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from ti4_mapgen import schemas, sqlite
+
+
+def tile(number, type_="system", release="base", **fields):
+    return {"key": f"{number:03}", "type": type_, "number": number, "release": release, **fields}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncBase:
+    def test_put_and_get(self):
+        async def main():
+            base = sqlite.SQLite().AsyncBase("tile")
+            stored = await base.put(tile(19))
+            generated = await base.put({"number": 20})
+            return stored, generated, await base.get("019"), await base.get(generated["key"]), await base.get("x")
+
+        stored, generated, found, found_generated, missing = run(main())
+        assert stored == found == tile(19)
+        assert found_generated == generated
+        assert missing is None
+
+    def test_put_replaces_and_insert_does_not(self):
+        async def main():
+            base = sqlite.SQLite().AsyncBase("tile")
+            await base.put(tile(19))
+            await base.put(tile(19, release="pok"))
+            with pytest.raises(KeyError):
+                await base.insert(tile(19))
+            return await base.get("019")
+
+        assert run(main())["release"] == "pok"
+
+    def test_delete(self):
+        async def main():
+            base = sqlite.SQLite().AsyncBase("tile")
+            await base.put(tile(19))
+            await base.delete("019")
+            return await base.get("019")
+
+        assert run(main()) is None
+
+    def test_fetch_pages_by_key(self):
+        async def main():
+            base = sqlite.SQLite().AsyncBase("tile")
+            await base.put_many([tile(number) for number in range(25, 19, -1)])
+            first = await base.fetch(limit=4)
+            second = await base.fetch(limit=4, last=first.last)
+            return first, second
+
+        first, second = run(main())
+        assert [item["number"] for item in first.items] == [20, 21, 22, 23]
+        assert first.count == 4 and first.last == "023"
+        assert [item["number"] for item in second.items] == [24, 25]
+        assert second.last is None
+
+    def test_fetch_query(self):
+        async def main():
+            base = sqlite.SQLite().AsyncBase("tile")
+            await base.put_many(
+                [
+                    tile(1, "home"),
+                    tile(19, back="blue", system={"anomaly": None}),
+                    tile(41, back="red", system={"anomaly": "gravity-rift"}),
+                    tile(59, release="pok", back="blue", system={"anomaly": None}),
+                ]
+            )
+            queries = [
+                {"type": schemas.Type.SYSTEM, "back": schemas.Color.BLUE},
+                {"back": None},
+                [{"number?lt": 19}, {"release": "pok"}],
+                {"system.anomaly": "gravity-rift"},
+                {"number?gte": 41, "system.anomaly": None},
+                {"key?pfx": "05"},
+            ]
+            return [[item["number"] for item in (await base.fetch(query)).items] for query in queries]
+
+        assert run(main()) == [[19, 59], [1], [1, 59], [41], [59], [59]]
+
+    def test_fetch_rejects_unsupported_query(self):
+        base = sqlite.SQLite().AsyncBase("tile")
+        with pytest.raises(ValueError):
+            run(base.fetch({"number?r": [1, 2]}))
+        with pytest.raises(ValueError):
+            run(base.fetch({"number') OR 1 --": 1}))
+
+    def test_query_uses_index(self):
+        engine = sqlite.SQLite()
+        base = engine.AsyncBase("tile")
+        run(base.put(tile(19)))
+        where, parameters = base._where({"type": "system"})
+        ((plan,),) = engine.execute([(f"EXPLAIN QUERY PLAN SELECT key FROM tile WHERE {where}", parameters)])
+        assert "tile_type" in plan[-1]
+
+    def test_file_storage_persists(self, tmp_path):
+        path = str(tmp_path / "storage.sqlite3")
+        engine = sqlite.SQLite(path)
+        run(engine.AsyncBase("map").put({"key": "a", "players": 6, "style": "normal"}))
+        engine.close()
+        assert run(sqlite.SQLite(path).AsyncBase("map").fetch({"players": 6})).items[0]["key"] == "a"
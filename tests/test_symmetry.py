@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+import pytest
+
+from ti4_mapgen import board, hex, schemas, symmetry
+
+
+@pytest.fixture
+def template(make_template):
+    return make_template(2, homes=(1, 4))
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    return make_catalog(21)
+
+
+def transformed(board_, angle, reflected):
+    """Move every tile of a board with a symmetry."""
+    index = {position: index for index, position in enumerate(board_.positions)}
+    tiles = np.empty_like(board_.tiles)
+    for position, id in zip(board_.positions, board_.tiles):
+        tiles[index[symmetry.transform(position, angle=angle, reflected=reflected)]] = id
+    return board.Board(board_.template, board_.positions, board_.catalog, tiles, board_.stack)
+
+
+class TestSpiralPermutations:
+    def test_rows_are_permutations(self):
+        permutations = symmetry.spiral_permutations(2)
+        assert permutations.shape == (12, 19)
+        assert permutations[0].tolist() == list(range(19))
+        for row in permutations:
+            assert sorted(row.tolist()) == list(range(19))
+
+    def test_rotation_moves_along_ring(self):
+        # Rotating by 60 degrees moves each position of the first ring to the next one.
+        assert symmetry.spiral_permutations(1)[1].tolist() == [0, 2, 3, 4, 5, 6, 1]
+
+
+class TestSymmetries:
+    def test_symmetric_template(self, make_template):
+        assert len(symmetry.symmetries(make_template(2)).permutations) == 12
+
+    def test_homes_restrict_symmetries(self, make_template):
+        assert len(symmetry.symmetries(make_template(2, homes=(1, 4))).permutations) == 4
+        assert len(symmetry.symmetries(make_template(2, homes=(1, 2))).permutations) == 2
+
+    def test_hyperlanes_restrict_symmetries(self, make_template):
+        lanes = [[hex.Adjacent.N.value, hex.Adjacent.S.value]]
+        hyperlane = schemas.Tile(type=schemas.Type.HYPERLANE, number=83, release=schemas.Release.POK, hyperlanes=lanes)
+        layout = make_template(2, tiles={0: hyperlane})
+        # Only the half turn and the reflections across the axis of the lane keep it in place.
+        assert len(symmetry.symmetries(layout).permutations) == 4
+
+
+class TestSignature:
+    def test_equivalent_boards_share_signature(self, template, catalog):
+        board_ = board.Board.setup(template, catalog, rng=random.Random(0))
+        signature = symmetry.signature(board_)
+        for angle, reflected in [(180, False), (0, True), (180, True)]:
+            assert symmetry.signature(transformed(board_, angle, reflected)) == signature
+
+    def test_canonical_form_is_smallest_image(self, template, catalog):
+        board_ = board.Board.setup(template, catalog, rng=random.Random(0))
+        codes = [
+            symmetry.canonical(transformed(board_, angle, reflected)).tolist()
+            for angle, reflected in [(0, False), (180, False), (0, True), (180, True)]
+        ]
+        assert codes == [min(codes)] * 4
+
+    def test_different_boards_differ(self, template, catalog):
+        board1 = board.Board.setup(template, catalog, rng=random.Random(0))
+        board2 = board.Board.setup(template, catalog, rng=random.Random(1))
+        assert symmetry.signature(board1) != symmetry.signature(board2)
+
+    def test_templates_differ(self, template, catalog):
+        layout = [template[0].copy(update={"number": 82}), *template[1:]]
+        board1 = board.Board.setup(template, catalog, rng=random.Random(0))
+        board2 = board.Board.setup(layout, catalog, rng=random.Random(0))
+        assert board1.tiles.tolist() == board2.tiles.tolist()
+        assert symmetry.signature(board1) != symmetry.signature(board2)
+
+    def test_independent_of_catalog_order(self, template, catalog):
+        board1 = board.Board.setup(template, catalog, rng=random.Random(0))
+        reversed_ = board.Catalog(reversed(catalog.tiles))
+        tiles = np.where(board1.tiles == board.EMPTY, board.EMPTY, len(reversed_) - 1 - board1.tiles)
+        board2 = board.Board(board1.template, board1.positions, reversed_, tiles.astype(np.int16), board1.stack)
+        assert symmetry.signature(board1) == symmetry.signature(board2)
+
+
+class TestDigest:
+    def test_rotations_differ(self, template, catalog):
+        board_ = board.Board.setup(template, catalog, rng=random.Random(0))
+        assert symmetry.digest(board_) == symmetry.digest(transformed(board_, 0, False))
+        assert symmetry.digest(board_) != symmetry.digest(transformed(board_, 180, False))
+
+    def test_independent_of_catalog_order(self, template, catalog):
+        board1 = board.Board.setup(template, catalog, rng=random.Random(0))
+        reversed_ = board.Catalog(reversed(catalog.tiles))
+        tiles = np.where(board1.tiles == board.EMPTY, board.EMPTY, len(reversed_) - 1 - board1.tiles)
+        board2 = board.Board(board1.template, board1.positions, reversed_, tiles.astype(np.int16), board1.stack)
+        assert symmetry.digest(board1) == symmetry.digest(board2)
@@ -0,0 +1,269 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from ti4_mapgen import app, config, render, schemas, sqlite
+
+GENERATE = "players=3&style=test&evaluations=2000&time_limit=10"
+
+
+class Client:
+    """ASGI client of an app, which runs every request to completion on an event loop of its own."""
+
+    def __init__(self, loop, client):
+        self._loop = loop
+        self._client = client
+
+    def get(self, url, **headers):
+        """Send a GET request, with headers passed by their names in snake case, e.g. 'if_none_match'."""
+        headers = {name.replace("_", "-"): value for name, value in headers.items()}
+        return self._loop.run_until_complete(self._client.get(url, headers=headers))
+
+    def post(self, url, content):
+        return self._loop.run_until_complete(self._client.post(url, json=content))
+
+
+async def seed_storage(path, template, catalog):
+    engine = sqlite.SQLite(path)
+    tiles = []
+    for tile in catalog.tiles:
+        # Every odd system is from Prophecy of Kings, so the tiles can be filtered by release.
+        if tile.type is schemas.Type.SYSTEM and tile.number % 2:
+            tile = tile.copy(update={"release": schemas.Release.POK})
+        tiles.append({"key": f"{tile.number:03}", **json.loads(tile.json())})
+    await engine.AsyncBase("tile").put_many(tiles)
+    layout = [json.loads(tile.json()) for tile in template]
+    maps = [
+        {"key": f"{players}p", "players": players, "style": style, "description": "", "source": "", "layout": layout}
+        for players, style in ((3, "test"), (4, "other"))
+    ]
+    await engine.AsyncBase("map").put_many(maps)
+    factions = [{"name": name.value, "release": schemas.Release.BASE.value} for name in list(schemas.Name)[:4]]
+    await engine.AsyncBase("faction").put_many(factions)
+    engine.close()
+
+
+@pytest.fixture
+def catalog(request, make_catalog):
+    """Create 20 systems, 12 blue planet systems and 8 empty red systems, or only anomalies with the parameter
+    'anomalies'."""
+    if getattr(request, "param", None) == "anomalies":
+        systems = [schemas.System(resources=0, influence=0, planets=0, anomaly=schemas.Anomaly.NEBULA)] * 20
+    else:
+        systems = [schemas.System(resources=number % 3, influence=2 - number % 3, planets=1) for number in range(12)]
+        systems += [schemas.System(resources=0, influence=0, planets=0)] * 8
+    center = schemas.Tile(type=schemas.Type.CENTER, number=18, release=schemas.Release.BASE)
+    return make_catalog(systems, homes=3, backs=[schemas.Color.BLUE] * 12 + [schemas.Color.RED] * 8, tiles=[center])
+
+
+@pytest.fixture
+def client(tmp_path, make_template, catalog):
+    """Client of an app backed by a SQLite database with a map for 3 players, 24 tiles and 4 factions."""
+    template = make_template(2, homes=(7, 11, 15))
+    path = str(tmp_path / "storage.sqlite3")
+    settings = config.Settings(storage="sqlite", sqlite_path=path, job_workers=1, job_queue_depth=1, batch_workers=2)
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(seed_storage(path, template, catalog))
+    app_ = app.create_app(settings)
+    loop.run_until_complete(app_.router.startup())
+    client_ = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_), base_url="http://test")
+    yield Client(loop, client_)
+    loop.run_until_complete(client_.aclose())
+    loop.run_until_complete(app_.router.shutdown())
+    loop.close()
+
+
+class TestTiles:
+    def test_read_tiles(self, client):
+        response = client.get("/tiles/")
+        assert response.status_code == 200
+        tiles = response.json()
+        assert len(tiles) == 24
+        assert all("key" not in tile for tile in tiles)
+
+    def test_read_tiles_filters(self, client):
+        tiles = client.get("/tiles/?type=system&release=pok").json()
+        assert len(tiles) == 10
+        assert all(tile["type"] == "system" and tile["release"] == "pok" for tile in tiles)
+
+    def test_read_tiles_pages(self, client):
+        first = client.get("/tiles/?limit=20")
+        cursor = first.headers["x-next-cursor"]
+        second = client.get(f"/tiles/?limit=20&cursor={cursor}")
+        assert "x-next-cursor" not in second.headers
+        numbers = [tile["number"] for tile in first.json() + second.json()]
+        assert numbers == [tile["number"] for tile in client.get("/tiles/").json()]
+
+    def test_read_tiles_unknown_cursor(self, client):
+        assert client.get("/tiles/?limit=5&cursor=999").status_code == 400
+
+    def test_not_modified(self, client):
+        etag = client.get("/tiles/").headers["etag"]
+        response = client.get("/tiles/", if_none_match=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_gzip(self, client):
+        response = client.get("/tiles/", accept_encoding="gzip")
+        identity = client.get("/tiles/", accept_encoding="identity")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == identity.headers["etag"][:-1] + '-gzip"'
+        assert "content-encoding" not in identity.headers
+        # The client decodes the body.
+        assert response.content == identity.content
+
+
+class TestMaps:
+    def test_read_maps(self, client):
+        maps = client.get("/maps/").json()
+        assert [(map_["players"], map_["style"]) for map_ in maps] == [(3, "test"), (4, "other")]
+
+    def test_read_maps_pages(self, client):
+        first = client.get("/maps/?limit=1")
+        assert [map_["style"] for map_ in first.json()] == ["test"]
+        second = client.get(f"/maps/?limit=1&cursor={first.headers['x-next-cursor']}")
+        assert [map_["style"] for map_ in second.json()] == ["other"]
+
+    def test_read_factions(self, client):
+        names = [faction["name"] for faction in client.get("/factions/").json()]
+        assert sorted(names) == sorted(name.value for name in list(schemas.Name)[:4])
+
+
+class TestGenerate:
+    def test_generate(self, client):
+        response = client.get(f"/generate/?{GENERATE}&seed=1")
+        assert response.status_code == 200
+        generated = response.json()
+        assert (generated["seed"], generated["evaluations"]) == (1, 2000)
+        systems = [tile for tile in generated["layout"] if tile["type"] == "system"]
+        assert len(systems) == 15
+        assert all(tile["system"] is not None for tile in systems)
+
+    def test_generate_is_cached(self, client):
+        first = client.get(f"/generate/?{GENERATE}&seed=2")
+        second = client.get(f"/generate/?{GENERATE}&seed=2")
+        assert first.content == second.content
+        stats = client.get("/generate/cache").json()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+    def test_generate_with_default_options_is_cached(self, client):
+        first = client.get("/generate/?players=3&style=test&seed=42")
+        second = client.get("/generate/?players=3&style=test&seed=42")
+        assert first.json()["evaluations"] == schemas.GenerateOptions().evaluations
+        assert first.content == second.content
+        stats = client.get("/generate/cache").json()
+        assert (stats["hits"], stats["size"]) == (1, 1)
+
+    def test_generate_validates_parameters(self, client):
+        assert client.get("/generate/?players=3&style=test&evaluations=-1").status_code == 422
+        assert client.get("/generate/?players=3&style=test&evaluations=5000001").status_code == 422
+        assert client.get("/generate/batch?players=3&style=test&time_limit=11").status_code == 422
+        assert client.get("/generate/?players=3&style=test&seed=-1").status_code == 422
+        assert client.get("/generate/?players=3&style=unknown").status_code == 404
+
+    def test_generate_batch(self, client):
+        response = client.get(f"/generate/batch?{GENERATE}&count=3&top=2&seed=0")
+        assert response.status_code == 200
+        scores = [generated["score"] for generated in response.json()]
+        assert len(scores) == 2
+        assert scores == sorted(scores)
+
+    def test_generate_stream(self, client):
+        response = client.get(f"/generate/stream?{GENERATE}&count=3&seed=0")
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = response.text.splitlines()
+        assert 1 <= len(lines) <= 3
+        assert len({json.loads(line)["signature"] for line in lines}) == len(lines)
+
+    @pytest.mark.parametrize("catalog", ["anomalies"], indirect=True)
+    def test_tournament_stack_can_not_be_placed(self, client):
+        # Every system is an anomaly, so they can not be kept apart.
+        for route in ("/generate/", "/generate/batch", "/generate/stream", "/generate/render"):
+            response = client.get(f"{route}?{GENERATE}&seed=0&tournament=true")
+            assert response.status_code == 422, route
+            assert response.json()["detail"] == "no placement of the stack satisfies the constraints"
+
+
+class TestJobs:
+    def test_background_job(self, client):
+        response = client.get(f"/generate/?{GENERATE}&seed=3&background=true")
+        assert response.status_code == 202
+        job = client.get(f"{response.headers['location']}?wait=30").json()
+        assert job["status"] == "done"
+        assert job["evaluations"] == 2000
+        assert job["result"] == client.get(f"/generate/?{GENERATE}&seed=3").json()
+
+    def test_full_queue_refuses_jobs(self, client):
+        # The first job runs for a second, so the next one waits and fills the queue.
+        url = "/generate/?players=3&style=test&evaluations=5000000&time_limit=1&background=true"
+        statuses = [client.get(f"{url}&seed={seed}").status_code for seed in range(3)]
+        assert statuses[0] == 202
+        assert statuses[-1] == 429
+
+    @pytest.mark.parametrize("budget", ["evaluations=6000000&time_limit=0.5", "evaluations=2000&time_limit=20"])
+    def test_background_job_above_the_limits_of_a_request(self, client, budget):
+        url = f"/generate/?players=3&style=test&{budget}&seed=4"
+        assert client.get(url).status_code == 422
+        response = client.get(f"{url}&background=true")
+        assert response.status_code == 202
+        assert client.get(f"{response.headers['location']}?wait=30").json()["status"] == "done"
+
+    def test_background_job_above_the_limits_of_a_job(self, client):
+        url = "/generate/?players=3&style=test&time_limit=301&background=true"
+        response = client.get(url)
+        assert response.status_code == 422
+        assert response.json()["detail"] == "time_limit must be at most 300.0"
+
+    def test_unknown_job(self, client):
+        assert client.get("/jobs/unknown").status_code == 404
+
+
+class TestRender:
+    def test_render_map(self, client):
+        response = client.get("/maps/render?players=3&style=test")
+        assert response.headers["content-type"] == "image/svg+xml"
+        assert response.text.startswith("<svg")
+
+    @pytest.mark.skipif(render.cairosvg is not None, reason="cairosvg is installed")
+    def test_render_png_without_cairosvg(self, client):
+        assert client.get("/maps/render?players=3&style=test&format=png").status_code == 501
+
+    def test_render_generated_map(self, client):
+        response = client.get(f"/generate/render?{GENERATE}&seed=0")
+        assert response.status_code == 200
+        assert response.text.startswith("<svg")
+
+
+class TestMapString:
+    def test_round_trip(self, client):
+        layout = client.get("/mapstring/decode?map_string=19 20 0 -1 21").json()
+        assert [tile["number"] for tile in layout] == [18, 19, 20, 0, 21]
+        assert client.post("/mapstring/encode", layout).json() == {"map_string": "19 20 0 -1 21"}
+
+    def test_decode_unknown_tile(self, client):
+        response = client.get("/mapstring/decode?map_string=19 91")
+        assert response.status_code == 422
+        assert "not in the catalog" in response.json()["detail"]
+
+
+class TestDraft:
+    def test_draft(self, client):
+        response = client.get("/draft/?players=3&evaluations=2000&time_limit=10&seed=0")
+        assert response.status_code == 200
+        package = response.json()
+        assert len(package["slices"]) == len(package["factions"]) == 3
+        assert all(len(slice_["tiles"]) == 5 for slice_ in package["slices"])
+
+    def test_draft_too_many_slices(self, client):
+        assert client.get("/draft/?players=3&slices=5&evaluations=100").status_code == 422
+
+
+class TestMetrics:
+    def test_metrics(self, client):
+        client.get("/tiles/")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert 'route="/tiles/"' in response.text
@@ -1,9 +1,53 @@
+import math
+from typing import Optional
+
 from fastapi import FastAPI
 
-import views
+from ti4_mapgen import cache, config, database, jobs, metrics, views
+
 
+def create_app(settings: Optional[config.Settings] = None) -> FastAPI:
+    """Create the app without doing any I/O.
 
-def create_app() -> FastAPI:
+    Settings are read, and the storage, catalogs and caches are created, when the app starts up. Routes
+    receive them through the dependencies in 'views'.
+
+    Args:
+        settings (optional): Settings of the app, read from the environment on startup if 'None'.
+    """
     app = FastAPI(debug=True)
     app.include_router(views.router)
+    # The middleware is always installed, it only records requests while metrics are enabled.
+    app.add_middleware(metrics.TimingMiddleware)
+    app.add_api_route("/metrics", metrics.read_metrics, include_in_schema=False)
+
+    @app.on_event("startup")
+    async def start() -> None:
+        settings_ = config.get_settings() if settings is None else settings
+        metrics.REGISTRY.enabled = settings_.metrics_enabled
+        app.state.settings = settings_
+        app.state.database = database.connect(settings_)
+        app.state.catalogs = views.Catalogs(
+            app.state.database, settings_.catalog_ttl, snapshot_path=settings_.snapshot_path
+        )
+        app.state.generated_maps = cache.TTLCache(settings_.generate_cache_size, settings_.generate_cache_ttl)
+        app.state.rendered = cache.TTLCache(settings_.render_cache_size, math.inf)
+        app.state.generated_store = (
+            database.UniqueBase(app.state.database.base("generated")) if settings_.store_generated else None
+        )
+        # The generator imports numpy, so it is imported when the app starts up rather than with the module.
+        from ti4_mapgen import generator
+
+        # Worker processes are started on first use.
+        app.state.batch_pool = generator.BatchPool(settings_.batch_workers)
+        app.state.jobs = jobs.JobQueue(settings_.job_workers, settings_.job_queue_depth, ttl=settings_.job_ttl)
+        await app.state.jobs.start()
+        await app.state.catalogs.refresh()
+
+    @app.on_event("shutdown")
+    async def stop() -> None:
+        await app.state.jobs.stop()
+        app.state.batch_pool.shutdown(wait=False)
+        await app.state.database.close()
+
     return app
@@ -1,34 +1,150 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import random
+from collections.abc import Iterable, Sequence
+from typing import Any, Optional
 
-from ti4_mapgen import schemas
+import numpy as np
 
+from ti4_mapgen import hexarray, index, schemas, solver
 
-@dataclasses.dataclass()
-class Board(dataclass_wizard.JSONWizard):
-    """Class representing a board."""
+# Tile id of a layout index which shows its template tile.
+EMPTY = -1
 
-    class _(dataclass_wizard.JSONWizard.Meta):
-        skip_defaults = True
 
-    layout: list[schemas.Tile]
-    stack: list[schemas.Tile]
-    homes: dataclasses.InitVar[list[schemas.Tile]]
+class Catalog:
+    """Immutable tile catalog shared between boards.
 
-    def __post_init__(self, homes):
-        self._setup(self.layout, self.stack, homes)
+    A tile id is the index of a tile in 'tiles'. The tiles are never modified, boards copy them when
+    they are expanded. Selections are answered by an index built once with the catalog.
+    """
 
-    def _setup(self, layout: list[schemas.Tile], stack: list[schemas.Tile], homes: list[schemas.Tile]):
-        """Populate the layout with tiles from the stack."""
-        for index, tile in enumerate(layout):
-            if homes and tile.type is schemas.Type.HOME:
-                home_system = homes.pop(0)
-                home_system.position = tile.position
-                layout[index] = home_system
-            elif tile.type is schemas.Type.SYSTEM and stack:
-                random_index = random.randint(0, len(stack) - 1)
-                system = stack.pop(random_index)
-                system.position = tile.position
-                layout[index] = system
+    def __init__(self, tiles: Iterable[schemas.Tile]) -> None:
+        self.tiles: tuple[schemas.Tile, ...] = tuple(tiles)
+        self.index = index.TileIndex(self.tiles)
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def __getitem__(self, id: int) -> schemas.Tile:
+        return self.tiles[id]
+
+    def ids(self, type: schemas.Type) -> np.ndarray:
+        """Find the ids of every tile of a type."""
+        return self.index.ids(type=type)
+
+    def select(self, **criteria: Any) -> np.ndarray:
+        """Find the ids of the tiles which match every criterion, see 'index.TileIndex.bitmap'."""
+        return self.index.ids(**criteria)
+
+    def query(self, query: schemas.TileQuery) -> list[schemas.Tile]:
+        """Find the tiles which match a query."""
+        return [self.tiles[id] for id in self.index.query(query).tolist()]
+
+
+@dataclasses.dataclass(eq=False)
+class Board:
+    """Class representing a board.
+
+    The layout is stored as the id of the catalog tile at each index of the template, where 'EMPTY'
+    shows the template tile itself, e.g. a system slot which is not filled, the center tile or a
+    hyperlane tile. Tiles are only expanded to models by 'layout'.
+    """
+
+    template: tuple[schemas.Tile, ...]
+    positions: hexarray.CubeArray
+    catalog: Catalog
+    tiles: np.ndarray
+    stack: np.ndarray
+
+    @classmethod
+    def setup(
+        cls,
+        template: Sequence[schemas.Tile],
+        catalog: Catalog,
+        *,
+        stack: Optional[Sequence[int]] = None,
+        homes: Sequence[int] = (),
+        constraints: Sequence[solver.Apart] = (),
+        rng: Optional[random.Random] = None,
+    ) -> Board:
+        """Populate a template with tiles from the catalog.
+
+        Home tiles are placed on the home slots in order. System slots are filled from a random
+        permutation of the stack, drawn with a single partial Fisher-Yates shuffle. With constraints the
+        system slots are filled by 'solver.Solver' instead, so the placement satisfies them.
+
+        Args:
+            template: Map layout with positioned tiles.
+            catalog: Tile catalog the ids refer to.
+            stack (optional): Ids of the tiles to draw systems from, defaults to every system tile.
+            homes (optional): Ids of the home tiles to place.
+            constraints (optional): Constraints the placement of the systems must satisfy.
+            rng (optional): Random number generator, defaults to the 'random' module.
+
+        Raises:
+            ValueError: If no placement of the stack satisfies the constraints.
+        """
+        rng = random if rng is None else rng
+        template = tuple(template)
+        stack_ = np.asarray(catalog.ids(schemas.Type.SYSTEM) if stack is None else stack).tolist()
+        tiles = np.full(len(template), EMPTY, dtype=np.int16)
+
+        home_slots = _slots(template, schemas.Type.HOME)
+        placed = min(len(home_slots), len(homes))
+        tiles[home_slots[:placed]] = homes[:placed]
+
+        system_slots = _slots(template, schemas.Type.SYSTEM)
+        if constraints:
+            placement = solver.Solver(template, catalog.index, stack_, constraints).solve(rng)
+            if placement is None:
+                raise ValueError("no placement of the stack satisfies the constraints")
+            tiles[system_slots] = placement
+            used = set(placement.tolist())
+            spare = np.array([id for id in stack_ if id not in used], dtype=np.int16)
+            return cls(template, _positions(template), catalog, tiles, spare)
+
+        drawn = min(len(system_slots), len(stack_))
+        for index in range(drawn):
+            other = rng.randrange(index, len(stack_))
+            stack_[index], stack_[other] = stack_[other], stack_[index]
+        tiles[system_slots[:drawn]] = stack_[:drawn]
+
+        return cls(template, _positions(template), catalog, tiles, np.array(stack_[drawn:], dtype=np.int16))
+
+    @classmethod
+    def from_ids(
+        cls, template: Sequence[schemas.Tile], catalog: Catalog, tiles: np.ndarray, stack: np.ndarray
+    ) -> Board:
+        """Create a board from the tile ids of its layout and stack, e.g. of a board built in another process."""
+        template = tuple(template)
+        return cls(template, _positions(template), catalog, np.asarray(tiles), np.asarray(stack))
+
+    @property
+    def layout(self) -> list[schemas.Tile]:
+        """Expand the board to positioned tile models."""
+        layout = []
+        for template_tile, id, position in zip(self.template, self.tiles.tolist(), self.positions):
+            tile = template_tile if id == EMPTY else self.catalog[id]
+            layout.append(tile.copy(update={"position": position}))
+        return layout
+
+    def slots(self, type: schemas.Type) -> np.ndarray:
+        """Find the layout indexes of the template tiles of a type."""
+        return _slots(self.template, type)
+
+
+def _slots(template: tuple[schemas.Tile, ...], type: schemas.Type) -> np.ndarray:
+    return np.array([index for index, tile in enumerate(template) if tile.type is type], dtype=np.intp)
+
+
+def _positions(template: tuple[schemas.Tile, ...]) -> hexarray.CubeArray:
+    """Find the positions of a template, shared between every board created from it."""
+    return _cached_positions(tuple(tile.position for tile in template))
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_positions(positions: tuple) -> hexarray.CubeArray:
+    return hexarray.CubeArray.from_cubes(positions)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, Optional, TypeVar
+
+from pydantic import BaseModel
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(BaseModel):
+    """Counters of a cache."""
+
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded least recently used cache whose entries expire a fixed time after they are stored."""
+
+    def __init__(self, maxsize: int, ttl: float, *, timer: Callable[[], float] = time.monotonic) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """Find the value stored for a key and mark it as recently used, or return 'None' on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if self._timer() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: K, value: V) -> None:
+        """Store a value for a key, evicting the least recently used entry when the cache is full."""
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (self._timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self._entries), maxsize=self.maxsize)
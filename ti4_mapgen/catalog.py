@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CatalogCache(Generic[T]):
+    """In-process cache of a catalog which is loaded as a whole, e.g. every tile in the database.
+
+    The catalog is served from memory until its time to live has passed or it is invalidated, and is
+    then loaded again on the next access. Concurrent loads are coalesced, so every caller which needs
+    a fresh catalog at the same time waits for the same single load.
+    """
+
+    def __init__(self, load: Callable[[], Awaitable[T]], ttl: float, *, timer: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.loads = 0
+        self._load = load
+        self._timer = timer
+        self._value: Optional[T] = None
+        self._expires = float("-inf")
+        self._pending: Optional[asyncio.Future[T]] = None
+        # Incremented by every invalidation, so a load which started before it is not considered fresh.
+        self._version = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._value is not None and self._timer() < self._expires
+
+    async def get(self) -> T:
+        """Return the catalog, loading it first if it is missing, expired or invalidated."""
+        if self.fresh:
+            return self._value
+        return await self.refresh()
+
+    async def refresh(self) -> T:
+        """Load the catalog, or wait for a load which is already in progress."""
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._refresh(self._version))
+        # Shield the load, so a caller which is cancelled does not cancel it for the other callers.
+        return await asyncio.shield(self._pending)
+
+    def invalidate(self) -> None:
+        """Mark the catalog as expired, so it is loaded again on the next access."""
+        self._version += 1
+        self._expires = float("-inf")
+
+    async def _refresh(self, version: int) -> T:
+        try:
+            value = await self._load()
+            self.loads += 1
+            self._value = value
+            if version == self._version:
+                self._expires = self._timer() + self.ttl
+            return value
+        finally:
+            self._pending = None
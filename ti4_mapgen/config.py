@@ -1,10 +1,43 @@
-from pydantic import BaseSettings
+from pydantic import BaseSettings, validator
 from functools import lru_cache
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
-    deta_project_key = str
-    deta_project_id = str
+    # Storage backend, the Deta project or an embedded SQLite database at 'sqlite_path'.
+    storage: Literal["deta", "sqlite"] = "deta"
+    deta_project_key: Optional[str] = None
+    deta_project_id: Optional[str] = None
+    sqlite_path: str = "ti4_mapgen.sqlite3"
+    # Maximum number of storage requests in flight at a time.
+    connection_limit: int = 8
+    # Catalog snapshot built by 'scripts/build_snapshot.py', the catalogs are loaded from storage if 'None'.
+    snapshot_path: Optional[str] = None
+    catalog_ttl: float = 3600.0
+    # Record request and stage latencies and serve them at '/metrics'.
+    metrics_enabled: bool = True
+    generate_cache_size: int = 1024
+    generate_cache_ttl: float = 3600.0
+    # Number of rendered board images kept, by layout and format.
+    render_cache_size: int = 256
+    # Worker processes shared by every '/generate/batch' request, the number of processors if 'None'.
+    batch_workers: Optional[int] = None
+    # Background generation jobs: worker processes, jobs which may wait for a worker before new jobs are
+    # refused, seconds a finished job is kept, and the budget of a job, which may exceed the budget of a
+    # request that waits for its map.
+    job_workers: int = 2
+    job_queue_depth: int = 32
+    job_ttl: float = 3600.0
+    job_max_evaluations: int = 50_000_000
+    job_max_time_limit: float = 300.0
+    # Store every distinct generated map in the 'generated' table, keyed by its signature.
+    store_generated: bool = False
+
+    @validator("deta_project_key", always=True)
+    def deta_project_key_required(cls, value: Optional[str], values: dict) -> Optional[str]:
+        if value is None and values.get("storage") == "deta":
+            raise ValueError("deta_project_key is required when storage is 'deta'")
+        return value
 
     class Config:
         env_file = ".env"
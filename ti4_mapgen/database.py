@@ -1,11 +1,146 @@
-from deta import Deta
-from asyncstdlib import contextmanager
+from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any, Optional, Protocol
 
-@contextmanager
-async def AsyncBase(engine: Deta, db_name: str):
-    async_base = engine.AsyncBase(db_name)
-    try:
-        yield async_base
-    finally:
-        await async_base.close()
+from ti4_mapgen import config, metrics, sqlite
+
+# Largest number of records Deta returns in one page.
+PAGE_SIZE = 1000
+
+
+class Engine(Protocol):
+    """Storage engine which opens async bases, i.e. 'deta.Deta' or 'sqlite.SQLite'."""
+
+    def AsyncBase(self, name: str) -> Any:
+        ...
+
+
+class Base:
+    """Async base of a table whose requests share the connection limit of its database."""
+
+    def __init__(self, base: Any, semaphore: asyncio.Semaphore) -> None:
+        self._base = base
+        self._semaphore = semaphore
+
+    async def fetch(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._semaphore:
+            with metrics.stage("fetch"):
+                return await self._base.fetch(*args, **kwargs)
+
+    async def pages(
+        self, query: Any = None, *, limit: int = PAGE_SIZE, last: Optional[str] = None
+    ) -> AsyncIterator[Any]:
+        """Fetch the records matching a query one page at a time, following the 'last' cursor of each page.
+
+        Args:
+            query (optional): Deta query, matches every record if 'None'.
+            limit (optional): Number of records in each page.
+            last (optional): Key of the record to start after, starts at the first record if 'None'.
+        """
+        while True:
+            page = await self.fetch(query, limit=limit, last=last)
+            yield page
+            last = page.last
+            if last is None:
+                return
+
+    async def iterate(self, query: Any = None, *, last: Optional[str] = None) -> AsyncIterator[dict]:
+        """Fetch every record matching a query, yielding the records of each page as it arrives."""
+        async for page in self.pages(query, last=last):
+            for item in page.items:
+                yield item
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._semaphore:
+            with metrics.stage("fetch"):
+                return await self._base.get(*args, **kwargs)
+
+    async def put(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._semaphore:
+            with metrics.stage("store"):
+                return await self._base.put(*args, **kwargs)
+
+    async def put_many(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._semaphore:
+            with metrics.stage("store"):
+                return await self._base.put_many(*args, **kwargs)
+
+    async def delete(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._semaphore:
+            with metrics.stage("store"):
+                return await self._base.delete(*args, **kwargs)
+
+    async def close(self) -> None:
+        await self._base.close()
+
+
+class UniqueBase:
+    """Base which stores every record once, under a signature as its key, e.g. generated boards.
+
+    The signatures stored through it are kept in a set, so a duplicate is skipped without a request.
+    Duplicates stored by other processes replace the record with the same key instead.
+    """
+
+    def __init__(self, base: Base) -> None:
+        self._base = base
+        self._stored: set[str] = set()
+
+    def __contains__(self, signature: str) -> bool:
+        return signature in self._stored
+
+    async def put(self, record: Any, signature: str) -> bool:
+        """Store a record unless a record with the same signature was stored, and return if it was stored."""
+        if signature in self._stored:
+            return False
+        # The signature is added before the request, so concurrent duplicates are skipped as well.
+        self._stored.add(signature)
+        try:
+            await self._base.put(record, signature)
+        except BaseException:
+            self._stored.discard(signature)
+            raise
+        return True
+
+
+class Database:
+    """Long-lived async bases of a storage engine, one per table, shared by every request.
+
+    A base and its HTTP session are opened on first use and kept until 'close', so requests do not
+    pay for connection setup. At most 'limit' requests to the engine are in flight at a time.
+    """
+
+    def __init__(self, engine: Engine, *, limit: int) -> None:
+        self.limit = limit
+        self._engine = engine
+        self._bases: dict[str, Base] = {}
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def base(self, name: str) -> Base:
+        """Find the base of a table, opening it if it is not open."""
+        base = self._bases.get(name)
+        if base is None:
+            base = self._bases[name] = Base(self._engine.AsyncBase(name), self._semaphore)
+        return base
+
+    async def close(self) -> None:
+        """Close every open base, and the engine if it holds a connection of its own."""
+        bases = list(self._bases.values())
+        self._bases.clear()
+        await asyncio.gather(*(base.close() for base in bases))
+        close = getattr(self._engine, "close", None)
+        if close is not None:
+            close()
+
+
+def connect(settings: config.Settings) -> Database:
+    """Open the storage backend chosen in the settings."""
+    if settings.storage == "sqlite":
+        engine: Engine = sqlite.SQLite(settings.sqlite_path)
+    else:
+        # Deta is only imported when it is used, so the SQLite backend runs without it.
+        from deta import Deta
+
+        engine = Deta(settings.deta_project_key, project_id=settings.deta_project_id)
+    return Database(engine, limit=settings.connection_limit)
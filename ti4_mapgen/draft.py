@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import random
+import secrets
+import time
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
+
+import numpy as np
+
+from ti4_mapgen import board, metrics, schemas
+
+# Blue and red systems of every slice, as in a Milty draft. Blue systems come first in a slice.
+BLUE = 3
+RED = 2
+SIZE = BLUE + RED
+
+# Attributes of a system which are balanced between the slices.
+BALANCED = ("resources", "influence", "techs")
+# Attributes of a system which are counted in a slice and limited by the draft options.
+COUNTED = ("anomalies", "wormholes", "legendaries")
+
+# Relative importance of each balanced attribute in the score.
+DEFAULT_WEIGHTS: Mapping[str, float] = {"resources": 1.0, "influence": 1.0, "techs": 0.5}
+
+# Candidate partitions scored at a time.
+BATCH = 256
+
+# Weight of a violated limit in the score, so a partition which violates the limits less is always better.
+_PENALTY = 1e9
+
+
+def attributes(tile: schemas.Tile) -> tuple[float, ...]:
+    """Extract the attributes of a tile, in the order of 'BALANCED' followed by 'COUNTED'."""
+    system = tile.system
+    if system is None:
+        return (0.0,) * (len(BALANCED) + len(COUNTED))
+    return (
+        system.resources,
+        system.influence,
+        len(system.techs),
+        system.anomaly is not None,
+        system.wormhole is not None,
+        system.legendary,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _attribute_table(catalog: board.Catalog) -> np.ndarray:
+    """Tabulate the attributes of every tile in a catalog by tile id."""
+    table = np.zeros((len(catalog), len(BALANCED) + len(COUNTED)), dtype=np.float64)
+    for id, tile in enumerate(catalog.tiles):
+        table[id] = attributes(tile)
+    table.flags.writeable = False
+    return table
+
+
+def select_systems(catalog: board.Catalog, options: schemas.DraftOptions) -> tuple[np.ndarray, np.ndarray]:
+    """Select the ids of the blue and the red system tiles a draft draws from."""
+    criteria: dict[str, Any] = {"type": schemas.Type.SYSTEM}
+    if options.releases is not None:
+        criteria["release"] = options.releases
+    return catalog.select(**criteria, back=schemas.Color.BLUE), catalog.select(**criteria, back=schemas.Color.RED)
+
+
+class SliceScore:
+    """Score of many candidate partitions of the blue and red systems into slices at once.
+
+    A partition is an order of the blue systems and an order of the red systems. Slice 'i' holds the
+    blue systems at 'BLUE * i' to 'BLUE * (i + 1)' of the order and the red systems at 'RED * i' to
+    'RED * (i + 1)', the systems after the last slice are not drafted. The attributes of every
+    candidate are gathered from the attribute table and summed by slice in one step.
+
+    The score is the weighted sum, over the balanced attributes, of the squared deviation of the slice
+    totals from their mean, plus a penalty for how far the slices exceed or fall short of the limits of
+    the options. Lower is better, and a partition without penalty satisfies every limit.
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        blue: np.ndarray,
+        red: np.ndarray,
+        slices: int,
+        options: schemas.DraftOptions,
+        importance: np.ndarray,
+    ) -> None:
+        """Create a slice score.
+
+        Args:
+            table: Array of shape (tiles, attributes) with the attributes of every tile by tile id.
+            blue: Ids of the blue systems.
+            red: Ids of the red systems.
+            slices: Number of slices.
+            options: Limits on the systems of every slice.
+            importance: Array of shape (len(BALANCED),) with the relative importance of each attribute.
+        """
+        self.table = table
+        self.blue = np.asarray(blue)
+        self.red = np.asarray(red)
+        self.slices = slices
+        self.importance = np.asarray(importance, dtype=np.float64)
+        self.limits = np.array([options.max_anomalies, options.max_wormholes, options.max_legendaries])
+        self.minimums = np.array([options.min_resources, options.min_influence])
+
+    def tiles(self, blue_order: np.ndarray, red_order: np.ndarray) -> np.ndarray:
+        """Find the tile ids of the slices of candidates, an array of shape (candidates, slices, SIZE)."""
+        blue_order, red_order = np.atleast_2d(blue_order), np.atleast_2d(red_order)
+        candidates = len(blue_order)
+        blue = self.blue[blue_order[:, : BLUE * self.slices]].reshape(candidates, self.slices, BLUE)
+        red = self.red[red_order[:, : RED * self.slices]].reshape(candidates, self.slices, RED)
+        return np.concatenate([blue, red], axis=2)
+
+    def __call__(self, blue_order: np.ndarray, red_order: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Score candidates.
+
+        Returns:
+            The score of every candidate, and how far its slices exceed or fall short of the limits.
+        """
+        totals = self.table[self.tiles(blue_order, red_order)].sum(axis=2)
+        balanced = totals[..., : len(BALANCED)]
+        deviation = balanced - balanced.mean(axis=1, keepdims=True)
+        scores = (deviation**2).sum(axis=1) @ self.importance
+
+        excess = np.maximum(totals[..., len(BALANCED) :] - self.limits, 0).sum(axis=(1, 2))
+        shortfall = np.maximum(self.minimums - totals[..., :2], 0).sum(axis=(1, 2))
+        violations = excess + shortfall
+        return scores + _PENALTY * violations, violations
+
+
+@dataclasses.dataclass()
+class Slices:
+    """Slices of a draft, the seed they were generated from and their balance score."""
+
+    # Tile ids of every slice, an array of shape (slices, SIZE) with the blue systems first.
+    tiles: np.ndarray
+    seed: int
+    score: float
+    evaluations: int
+
+
+@metrics.timed("draft")
+def generate(
+    catalog: board.Catalog,
+    slices: int,
+    options: schemas.DraftOptions = schemas.DraftOptions(),
+    *,
+    seed: Optional[int] = None,
+    weights: Optional[Mapping[str, float]] = None,
+) -> Slices:
+    """Split the blue and red systems of a catalog into balanced slices which satisfy the draft limits.
+
+    Candidate partitions are scored in batches of 'BATCH' by 'SliceScore'. The first batch is drawn at
+    random, and every later batch holds variations of the best partition so far, each with one or two
+    systems exchanged with a system of the same color.
+
+    The slices are a pure function of the arguments when all of 'options.evaluations' are spent, i.e.
+    when the time limit is not reached first.
+
+    Args:
+        catalog: Tile catalog to draw system tiles from.
+        slices: Number of slices.
+        options (optional): Budget of the search, selection of the system tiles and slice limits.
+        seed (optional): Seed of the random stream, drawn from the system if 'None'.
+        weights (optional): Importance of each attribute in 'BALANCED', defaults to 'DEFAULT_WEIGHTS'.
+
+    Raises:
+        ValueError: If the catalog has too few systems, or no partition satisfying the limits was found.
+
+    Returns:
+        The slices, their balance score and the number of evaluated partitions.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else {**DEFAULT_WEIGHTS, **weights}
+    seed = secrets.randbits(63) if seed is None else seed
+    rng = np.random.default_rng(seed)
+    blue, red = select_systems(catalog, options)
+    if len(blue) < BLUE * slices or len(red) < RED * slices:
+        raise ValueError(
+            f"{slices} slices need {BLUE * slices} blue and {RED * slices} red systems, "
+            f"but there are {len(blue)} blue and {len(red)} red systems"
+        )
+    score = SliceScore(
+        _attribute_table(catalog),
+        blue,
+        red,
+        slices,
+        options,
+        np.array([weights[attribute] for attribute in BALANCED]),
+    )
+
+    start = time.perf_counter()
+    size = max(1, min(BATCH, options.evaluations))
+    blue_orders = rng.permuted(np.tile(np.arange(len(blue)), (size, 1)), axis=1)
+    red_orders = rng.permuted(np.tile(np.arange(len(red)), (size, 1)), axis=1)
+    scores, violations = score(blue_orders, red_orders)
+    best = int(scores.argmin())
+    best_blue, best_red = blue_orders[best], red_orders[best]
+    best_score, best_violations = float(scores[best]), int(violations[best])
+    evaluated = size
+
+    while evaluated < options.evaluations and time.perf_counter() - start < options.time_limit:
+        size = min(BATCH, options.evaluations - evaluated)
+        blue_orders = np.tile(best_blue, (size, 1))
+        red_orders = np.tile(best_red, (size, 1))
+        # Every candidate exchanges one system, and half of them a second one, of a color drawn in
+        # proportion to the systems of that color in a slice.
+        for active in (np.ones(size, dtype=bool), rng.random(size) < 0.5):
+            blue_rows = active & (rng.random(size) < BLUE / SIZE)
+            _exchange(rng, blue_orders, BLUE * slices, blue_rows)
+            _exchange(rng, red_orders, RED * slices, active & ~blue_rows)
+        scores, violations = score(blue_orders, red_orders)
+        evaluated += size
+        index = int(scores.argmin())
+        if scores[index] < best_score:
+            best_blue, best_red = blue_orders[index], red_orders[index]
+            best_score, best_violations = float(scores[index]), int(violations[index])
+
+    if best_violations:
+        raise ValueError(f"no slices which satisfy the draft limits were found in {evaluated} partitions")
+    return Slices(score.tiles(best_blue, best_red)[0], seed, best_score, evaluated)
+
+
+def _exchange(rng: np.random.Generator, orders: np.ndarray, drafted: int, mask: np.ndarray) -> None:
+    """Exchange a drafted system with any other system in the orders of a mask."""
+    rows = np.flatnonzero(mask)
+    first = rng.integers(drafted, size=len(rows))
+    # Draw from the other systems by skipping over the first system.
+    second = rng.integers(orders.shape[1] - 1, size=len(rows))
+    second += second >= first
+    orders[rows, first], orders[rows, second] = orders[rows, second], orders[rows, first]
+
+
+def choose_factions(factions: Sequence[schemas.Faction], count: int, *, seed: int) -> list[schemas.Name]:
+    """Draw the factions of a draft package at random.
+
+    Raises:
+        ValueError: If there are fewer than 'count' factions.
+    """
+    if len(factions) < count:
+        raise ValueError(f"{count} factions were asked for, but there are {len(factions)} factions")
+    return [faction.name for faction in random.Random(seed).sample(list(factions), count)]
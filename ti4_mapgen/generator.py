@@ -0,0 +1,566 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import hashlib
+import heapq
+import os
+import pickle
+import random
+import secrets
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from ti4_mapgen import board, graph, metrics, schemas, solver, symmetry
+
+# Attributes of a system which are balanced between the players.
+ATTRIBUTES = ("resources", "influence", "techs", "cultural", "hazardous", "industrial")
+
+# Evaluations between two progress reports of 'anneal'.
+REPORT_EVERY = 10_000
+
+# Relative importance of each attribute in the balance score.
+DEFAULT_WEIGHTS: Mapping[str, float] = {
+    "resources": 1.0,
+    "influence": 1.0,
+    "techs": 0.5,
+    "cultural": 0.25,
+    "hazardous": 0.25,
+    "industrial": 0.25,
+}
+
+
+def attributes(tile: schemas.Tile) -> tuple[float, ...]:
+    """Extract the balanced attributes of a tile, in the order of 'ATTRIBUTES'."""
+    system = tile.system
+    if system is None:
+        return (0.0,) * len(ATTRIBUTES)
+    return (
+        system.resources,
+        system.influence,
+        len(system.techs),
+        system.traits.count(schemas.Trait.CULTURAL),
+        system.traits.count(schemas.Trait.HAZARDOUS),
+        system.traits.count(schemas.Trait.INDUSTRIAL),
+    )
+
+
+def distance_weights(distances: np.ndarray) -> np.ndarray:
+    """Convert move distances from a home system to how much a system counts towards that home.
+
+    An adjacent system counts fully and the weight halves with every further move. Unreachable
+    systems do not count.
+    """
+    distances = np.asarray(distances, dtype=np.float64)
+    weights = 0.5 ** np.maximum(distances - 1, 0)
+    weights[distances >= graph.UNREACHABLE] = 0.0
+    return weights
+
+
+class BalanceScore:
+    """Incrementally maintained balance score of an assignment of tiles to positions.
+
+    Positions are the system slots of a board followed by the spare tiles which are not on the board,
+    and every position holds exactly one tile. Each home values the attributes of the tile at a
+    position by the weight of that position, and spare positions have no weight. The score is the
+    weighted sum, over all attributes, of the squared deviation of the home values from their mean.
+    Lower is better and 0 is perfectly balanced.
+
+    Swapping the tiles at two positions changes the home values by the outer product of the weight
+    difference of the positions and the attribute difference of the tiles, so the change in score can
+    be computed from the current home values without rescoring the board.
+    """
+
+    def __init__(self, weights: np.ndarray, tiles: np.ndarray, importance: np.ndarray) -> None:
+        """Create a balance score.
+
+        Args:
+            weights: Array of shape (homes, positions) with how much each position counts for each home.
+            tiles: Array of shape (positions, attributes) with the attributes of the tile initially at
+                each position.
+            importance: Array of shape (attributes,) with the relative importance of each attribute.
+        """
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.importance = np.asarray(importance, dtype=np.float64)
+        self._tiles = np.asarray(tiles, dtype=np.float64)
+        # Weights by position, so the weights of a batch of positions are contiguous rows.
+        self._position_weights = np.ascontiguousarray(self.weights.T)
+        # The tile at each position, as an index into '_tiles'.
+        self.placement = np.arange(len(self._tiles))
+        self.values = self.weights @ self._tiles
+        self._sums = self.values.sum(axis=0)
+        self.score = self.rescore()
+
+    @property
+    def homes(self) -> int:
+        return self.weights.shape[0]
+
+    @property
+    def positions(self) -> int:
+        return self.weights.shape[1]
+
+    def rescore(self) -> float:
+        """Compute the score from scratch from the current home values."""
+        deviation = self.values - self.values.mean(axis=0)
+        return float((deviation**2).sum(axis=0) @ self.importance)
+
+    def deltas(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Compute the change in score of swapping the tiles at each pair of positions."""
+        # Change in weight of each home, shape (swaps, homes).
+        change = self._position_weights[first] - self._position_weights[second]
+        # Change in attributes of the first position, shape (swaps, attributes).
+        difference = self._tiles[self.placement[second]] - self._tiles[self.placement[first]]
+
+        change_sum = change.sum(axis=1, keepdims=True)
+        change_square = np.einsum("ij,ij->i", change, change)[:, np.newaxis]
+        # Change in the sum of squares, minus the change in the squared sum divided by the homes.
+        squares = difference * (2 * (change @ self.values) + difference * change_square)
+        squared_sum = difference * change_sum * (2 * self._sums + difference * change_sum)
+        return (squares - squared_sum / self.homes) @ self.importance
+
+    def delta(self, first: int, second: int) -> float:
+        """Compute the change in score of swapping the tiles at two positions."""
+        return float(self.deltas(np.array([first]), np.array([second]))[0])
+
+    def swap(self, first: int, second: int, delta: Optional[float] = None) -> None:
+        """Swap the tiles at two positions and update the score by its change."""
+        if delta is None:
+            delta = self.delta(first, second)
+        change = self._position_weights[first] - self._position_weights[second]
+        tile1, tile2 = self.placement[first], self.placement[second]
+        difference = self._tiles[tile2] - self._tiles[tile1]
+        self.values += np.multiply.outer(change, difference)
+        self._sums += change.sum() * difference
+        self.placement[first], self.placement[second] = tile2, tile1
+        self.score += delta
+
+
+@dataclasses.dataclass()
+class Anneal:
+    """Result of optimizing a balance score with simulated annealing."""
+
+    placement: np.ndarray
+    score: float
+    evaluations: int
+
+
+def anneal(
+    balance: BalanceScore,
+    slots: int,
+    *,
+    evaluations: int,
+    time_limit: float,
+    rng: Optional[np.random.Generator] = None,
+    allowed: Optional[Callable[[int, int], bool]] = None,
+    progress: Optional[Callable[[float, int], None]] = None,
+) -> Anneal:
+    """Minimize a balance score by swapping tiles with simulated annealing.
+
+    Each swap exchanges the tile in one of the first 'slots' positions with the tile in any other
+    position. Candidate swaps are evaluated in batches against the current state, and the first one
+    which passes the Metropolis criterion is applied, which is equivalent to evaluating them one at a
+    time. The temperature falls geometrically with the share of the evaluations spent, so the search only
+    depends on the random stream unless the time limit ends it early.
+
+    Args:
+        balance: Balance score to optimize in place.
+        slots: Number of positions which are on the board.
+        evaluations: Maximum number of candidate swaps to evaluate.
+        time_limit: Maximum number of seconds to spend.
+        rng (optional): Random number generator.
+        allowed (optional): Check if swapping the tiles at two positions keeps the board valid. It is
+            only called for swaps which pass the Metropolis criterion.
+        progress (optional): Report the best score and the number of evaluated swaps so far, called
+            after every chunk of 'REPORT_EVERY' evaluations. It does not change the random stream, so
+            the result is the same with or without it.
+
+    Returns:
+        The best placement found, its score and the number of evaluated swaps.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    best = Anneal(balance.placement.copy(), balance.score, 0)
+    if slots < 1 or balance.positions < 2:
+        return best
+
+    deadline = time.perf_counter() + time_limit
+    # Start at a tenth of the typical change of a random swap, and finish a thousand times colder.
+    first, second = _propose(rng, slots, balance.positions, 256)
+    initial = 0.1 * float(np.abs(balance.deltas(first, second)).mean()) or 1.0
+    final = initial * 1e-3
+
+    # Candidate swaps and their acceptance thresholds are drawn in chunks. A swap passes the
+    # Metropolis criterion when its delta is at most the temperature times an exponential variate.
+    chunk = 1 << 16
+    cursor = chunk
+    batch = 16
+    evaluated = 0
+    report = REPORT_EVERY
+    while evaluated < evaluations:
+        if progress is not None and evaluated >= report:
+            progress(best.score, evaluated)
+            report = evaluated + REPORT_EVERY
+        if time.perf_counter() >= deadline:
+            break
+        # The schedule only follows the evaluations, so a stall of the process does not change the path
+        # of a run which spends its whole budget. The time limit only ends a run early.
+        temperature = initial * (final / initial) ** (evaluated / evaluations)
+
+        size = min(batch, evaluations - evaluated, chunk)
+        if cursor + size > chunk:
+            firsts, seconds = _propose(rng, slots, balance.positions, chunk)
+            thresholds = rng.standard_exponential(chunk)
+            cursor = 0
+        first = firsts[cursor : cursor + size]
+        second = seconds[cursor : cursor + size]
+        deltas = balance.deltas(first, second)
+        # A swap with no change at all exchanges identical tiles or equally weighted positions, so it
+        # only relabels the state and is skipped.
+        accepted = (deltas != 0) & (deltas <= temperature * thresholds[cursor : cursor + size])
+        if allowed is not None:
+            for index in np.flatnonzero(accepted).tolist():
+                if allowed(int(first[index]), int(second[index])):
+                    break
+                accepted[index] = False
+
+        if not accepted.any():
+            cursor += size
+            evaluated += size
+            batch = min(batch * 2, 1024)
+            continue
+
+        # Swaps after the accepted one were never evaluated against the new state, so they are reused.
+        index = int(accepted.argmax())
+        cursor += index + 1
+        evaluated += index + 1
+        balance.swap(int(first[index]), int(second[index]), float(deltas[index]))
+        # Aim for batches which hold a few accepted swaps at the current acceptance rate.
+        batch = max(16, min(1024, 4 * (index + 1)))
+        if balance.score < best.score:
+            best.placement = balance.placement.copy()
+            best.score = balance.score
+
+    best.evaluations = evaluated
+    if progress is not None:
+        progress(best.score, evaluated)
+    return best
+
+
+def _propose(rng: np.random.Generator, slots: int, positions: int, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Draw random pairs of a slot position and a different position."""
+    first = rng.integers(slots, size=size)
+    # Draw from the other positions by skipping over the first position.
+    second = rng.integers(positions - 1, size=size)
+    second += second >= first
+    return first, second
+
+
+@dataclasses.dataclass()
+class Generated:
+    """A generated board, the seed it was generated from and its balance score.
+
+    Boards which are rotations or reflections of each other share a signature, see 'symmetry.signature'.
+    """
+
+    board: board.Board
+    seed: int
+    score: float
+    evaluations: int
+    signature: str
+
+
+@functools.lru_cache(maxsize=8)
+def _attribute_table(catalog: board.Catalog) -> np.ndarray:
+    """Tabulate the attributes of every tile in a catalog by tile id.
+
+    The table ends with a row of zeros, so the id 'board.EMPTY' selects a tile without attributes.
+    """
+    table = np.zeros((len(catalog) + 1, len(ATTRIBUTES)), dtype=np.float64)
+    for id, tile in enumerate(catalog.tiles):
+        table[id] = attributes(tile)
+    table.flags.writeable = False
+    return table
+
+
+@metrics.timed("generate")
+def generate(
+    template: Sequence[schemas.Tile],
+    catalog: board.Catalog,
+    options: schemas.GenerateOptions = schemas.GenerateOptions(),
+    *,
+    seed: Optional[int] = None,
+    weights: Optional[Mapping[str, float]] = None,
+    progress: Optional[Callable[[float, int], None]] = None,
+) -> Generated:
+    """Generate a balanced board by optimizing a randomly populated board.
+
+    The distances used for balancing are measured on the template, through adjacency and hyperlanes.
+    Wormholes and anomalies of the placed tiles are not taken into account.
+
+    The board is a pure function of the arguments when all of 'options.evaluations' are spent, i.e.
+    when the time limit is not reached first.
+
+    Args:
+        template: Map layout with positioned home, system, center and hyperlane tiles.
+        catalog: Tile catalog to draw system tiles from.
+        options (optional): Budget of the optimization and selection of the system tiles.
+        seed (optional): Seed of the random stream, drawn from the system if 'None'.
+        weights (optional): Importance of each attribute in 'ATTRIBUTES', defaults to 'DEFAULT_WEIGHTS'.
+        progress (optional): Report the best score and the number of evaluated swaps, see 'anneal'.
+
+    Returns:
+        The generated board, its balance score and the number of evaluated swaps.
+    """
+    weights = DEFAULT_WEIGHTS if weights is None else {**DEFAULT_WEIGHTS, **weights}
+    seed = secrets.randbits(63) if seed is None else seed
+    rng = np.random.default_rng(seed)
+    stack = select_stack(catalog, options)
+    constraints = solver.TOURNAMENT if options.tournament else ()
+    board_ = board.Board.setup(
+        template, catalog, stack=stack, constraints=constraints, rng=random.Random(int(rng.integers(2**63)))
+    )
+    board_graph = graph.BoardGraph.from_layout(board_.template)
+
+    homes = [board_graph.index[board_.positions[slot]] for slot in board_.slots(schemas.Type.HOME)]
+    slots = board_.slots(schemas.Type.SYSTEM)
+    nodes = [board_graph.index[board_.positions[slot]] for slot in slots]
+    # Tile ids at every position, the system slots followed by the stack.
+    pool = np.concatenate([board_.tiles[slots], board_.stack])
+
+    home_weights = distance_weights(board_graph.distances[np.ix_(homes, nodes)])
+    spare_weights = np.zeros((len(homes), len(board_.stack)))
+    balance = BalanceScore(
+        np.hstack([home_weights, spare_weights]),
+        _attribute_table(catalog)[pool],
+        np.array([weights[attribute] for attribute in ATTRIBUTES]),
+    )
+    allowed = None
+    if constraints:
+        allowed = _allowed_swaps(solver.Solver(board_.template, catalog.index, stack, constraints), balance, pool)
+    result = anneal(
+        balance,
+        len(slots),
+        evaluations=options.evaluations,
+        time_limit=options.time_limit,
+        rng=rng,
+        allowed=allowed,
+        progress=progress,
+    )
+
+    placement = pool[result.placement]
+    board_.tiles[slots] = placement[: len(slots)]
+    stack = placement[len(slots) :]
+    board_.stack = stack[stack != board.EMPTY]
+
+    return Generated(board_, seed, result.score, result.evaluations, symmetry.signature(board_))
+
+
+def unique(boards: Iterable[Generated]) -> Iterator[Generated]:
+    """Skip every board which is equivalent to an earlier board, i.e. which has the same signature."""
+    seen: set[str] = set()
+    for generated in boards:
+        if generated.signature not in seen:
+            seen.add(generated.signature)
+            yield generated
+
+
+def _allowed_swaps(solver_: solver.Solver, balance: BalanceScore, pool: np.ndarray) -> Callable[[int, int], bool]:
+    """Check if a swap of the positions of a balance score keeps the constraints of a solver satisfied."""
+
+    def allowed(first: int, second: int) -> bool:
+        tiles = pool[balance.placement[: solver_.slots]]
+        moved = pool[balance.placement[second]]
+        if second < solver_.slots:
+            tiles[second] = tiles[first]
+        tiles[first] = moved
+        return solver_.allowed(tiles, first) and (second >= solver_.slots or solver_.allowed(tiles, second))
+
+    return allowed
+
+
+def select_stack(catalog: board.Catalog, options: schemas.GenerateOptions) -> np.ndarray:
+    """Select the ids of the system tiles a generation draws from."""
+    criteria: dict[str, Any] = {"type": schemas.Type.SYSTEM}
+    if options.releases is not None:
+        criteria["release"] = options.releases
+    if not options.anomalies:
+        criteria["anomaly"] = None
+    return catalog.select(**criteria)
+
+
+def derive_seed(seed: int, index: int) -> int:
+    """Derive the independent seed of the board at an index of a sequence of boards generated from a seed.
+
+    Derived seeds are 63 bit, so they fit the signed integers accepted by the routes.
+    """
+    state = np.random.SeedSequence(seed, spawn_key=(index,)).generate_state(1, np.uint64)
+    return int(state[0] >> np.uint64(1))
+
+
+# Tile catalog of a batch worker process, set once when the process starts.
+_catalog: board.Catalog
+
+
+def _initialize_worker(catalog: bytes) -> None:
+    """Unpickle the tile catalog of a batch worker process."""
+    global _catalog
+    _catalog = pickle.loads(catalog)
+
+
+class _Result(NamedTuple):
+    """A board generated in a worker process, without the template and catalog it shares with the parent."""
+
+    seed: int
+    score: float
+    evaluations: int
+    signature: str
+    tiles: np.ndarray
+    stack: np.ndarray
+
+
+def _generate_in_worker(
+    template: list[schemas.Tile],
+    seeds: Sequence[int],
+    options: schemas.GenerateOptions,
+    weights: Optional[Mapping[str, float]],
+) -> list[_Result]:
+    """Generate boards in a worker process, each from an independent random stream."""
+    results = []
+    for seed in seeds:
+        generated = generate(template, _catalog, options, seed=seed, weights=weights)
+        results.append(
+            _Result(
+                generated.seed,
+                generated.score,
+                generated.evaluations,
+                generated.signature,
+                generated.board.tiles,
+                generated.board.stack,
+            )
+        )
+    return results
+
+
+def cpu_count() -> int:
+    """Count the processors available to this process."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class BatchPool:
+    """Pool of worker processes for 'generate_batch', e.g. one shared by every request.
+
+    The workers are given the tile catalog once, when they start, and only the much smaller template is
+    sent with every chunk of seeds. A batch over another catalog replaces the workers, and batches still
+    running in the replaced workers finish there. Workers are started on first use.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """Create a pool.
+
+        Args:
+            workers (optional): Number of worker processes, defaults to the number of available processors.
+        """
+        self.workers = workers or cpu_count()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._digest = b""
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        template: list[schemas.Tile],
+        catalog: board.Catalog,
+        chunks: Iterable[Sequence[int]],
+        options: schemas.GenerateOptions,
+        weights: Optional[Mapping[str, float]],
+    ) -> list[Future[list[_Result]]]:
+        """Start generating the boards of chunks of seeds over a template and tile catalog."""
+        pickled = pickle.dumps(catalog, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.blake2b(pickled, digest_size=16).digest()
+        with self._lock:
+            if self._executor is None or digest != self._digest:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(self.workers, initializer=_initialize_worker, initargs=(pickled,))
+                self._digest = digest
+            return [self._executor.submit(_generate_in_worker, template, chunk, options, weights) for chunk in chunks]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers, and cancel the chunks which have not started unless waiting for them."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+def generate_batch(
+    template: Sequence[schemas.Tile],
+    catalog: board.Catalog,
+    options: schemas.GenerateOptions = schemas.GenerateOptions(),
+    *,
+    count: int,
+    top: int = 1,
+    seed: Optional[int] = None,
+    weights: Optional[Mapping[str, float]] = None,
+    workers: Optional[int] = None,
+    pool: Optional[BatchPool] = None,
+) -> list[Generated]:
+    """Generate many boards in parallel and keep the best distinct ones.
+
+    Boards are generated in a pool of worker processes, in chunks of seeds. Only the tile ids of a board
+    are sent back, and the board is rebuilt over the catalog of the caller.
+
+    Every board is generated from its own seed derived from 'seed', so it can be reproduced on its own by
+    'generate'. Boards equivalent to a board generated before them are skipped, so fewer than 'top'
+    boards are returned if there are fewer distinct boards.
+
+    Args:
+        template: Map layout with positioned home, system, center and hyperlane tiles.
+        catalog: Tile catalog to draw system tiles from.
+        options (optional): Budget of the optimization of each board.
+        count: Number of boards to generate.
+        top (optional): Number of best boards to return.
+        seed (optional): Entropy for the seeds of the boards, drawn from the system if 'None'.
+        weights (optional): Importance of each attribute in 'ATTRIBUTES', defaults to 'DEFAULT_WEIGHTS'.
+        workers (optional): Number of worker processes of the pool created for the batch if 'pool' is
+            'None', defaults to the number of available processors.
+        pool (optional): Pool of worker processes to generate the boards in.
+
+    Returns:
+        The 'top' distinct generated boards with the lowest score, best first.
+    """
+    seed = secrets.randbits(63) if seed is None else seed
+    seeds = [derive_seed(seed, index) for index in range(count)]
+    template = list(template)
+
+    if pool is None:
+        pool = BatchPool(min(workers or cpu_count(), count) or 1)
+        try:
+            return generate_batch(
+                template, catalog, options, count=count, top=top, seed=seed, weights=weights, pool=pool
+            )
+        finally:
+            pool.shutdown()
+
+    # Hand out several boards per task when there are many, to amortize the cost of a round trip.
+    chunksize = max(1, count // (pool.workers * 4))
+    chunks = (seeds[start : start + chunksize] for start in range(0, count, chunksize))
+    futures = pool.submit(template, catalog, chunks, options, weights)
+    results = (result for future in futures for result in future.result())
+    generated = (
+        Generated(
+            board.Board.from_ids(template, catalog, result.tiles, result.stack),
+            result.seed,
+            result.score,
+            result.evaluations,
+            result.signature,
+        )
+        for result in results
+    )
+    return heapq.nsmallest(top, unique(generated), key=lambda generated: generated.score)
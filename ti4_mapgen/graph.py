@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import functools
+import types
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Optional
+
+import numpy as np
+
+from ti4_mapgen import board, hex, schemas
+
+# Distance reported between two systems when there is no path between them.
+UNREACHABLE = int(np.iinfo(np.int16).max)
+
+# Anomalies which ships can never move into or through.
+BLOCKING = frozenset({schemas.Anomaly.SUPERNOVA})
+
+
+class BoardGraph:
+    """Movement graph of a board layout.
+
+    Every tile in the layout which is not a hyperlane tile is a node. Nodes are connected when they are
+    adjacent, when they are joined through one or more hyperlane tiles, or when they contain wormholes
+    of the same type. Nodes containing a blocking anomaly have no edges.
+
+    Edges are stored in compressed sparse row form: the neighbors of node 'i' are
+    'indices[indptr[i]:indptr[i + 1]]'.
+    """
+
+    __slots__ = ("positions", "index", "indptr", "indices")
+
+    def __init__(self, positions: Sequence[hex.Cube], indptr: np.ndarray, indices: np.ndarray) -> None:
+        self.positions: tuple[hex.Cube, ...] = tuple(positions)
+        self.index: Mapping[hex.Cube, int] = types.MappingProxyType(
+            {position: node for node, position in enumerate(self.positions)}
+        )
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_board(cls, board_: board.Board, *, blocking: frozenset[schemas.Anomaly] = BLOCKING) -> BoardGraph:
+        """Compile the movement graph of a board, expanding its tiles."""
+        return cls.from_layout(board_.layout, blocking=blocking)
+
+    @classmethod
+    def from_layout(
+        cls, layout: Iterable[schemas.Tile], *, blocking: frozenset[schemas.Anomaly] = BLOCKING
+    ) -> BoardGraph:
+        """Compile the movement graph of a layout of positioned tiles.
+
+        Args:
+            layout: Tiles with a position. Hyperlane vectors are unit vectors relative to the tile.
+            blocking (optional): Anomalies which remove a system from the graph.
+
+        Raises:
+            ValueError: If a tile in the layout does not have a position.
+        """
+        nodes: dict[hex.Cube, schemas.Tile] = {}
+        hyperlanes: dict[hex.Cube, schemas.Tile] = {}
+        for tile in layout:
+            if tile.position is None:
+                raise ValueError(f"tile {tile.number} in layout must have a position")
+            if tile.type is schemas.Type.HYPERLANE:
+                hyperlanes[tile.position] = tile
+            else:
+                nodes[tile.position] = tile
+
+        positions = tuple(nodes)
+        index = {position: node for node, position in enumerate(positions)}
+        blocked = {
+            index[position]
+            for position, tile in nodes.items()
+            if tile.system is not None and tile.system.anomaly in blocking
+        }
+
+        edges: list[set[int]] = [set() for _ in positions]
+        for position, node in index.items():
+            for direction in hex.Adjacent:
+                for target in _follow(position, direction.value, hyperlanes):
+                    if target in index and target != position:
+                        edges[node].add(index[target])
+
+        wormholes: dict[schemas.Wormhole, list[int]] = {}
+        for position, tile in nodes.items():
+            if tile.system is not None and tile.system.wormhole is not None:
+                wormholes.setdefault(tile.system.wormhole, []).append(index[position])
+        for linked in wormholes.values():
+            for node in linked:
+                edges[node].update(other for other in linked if other != node)
+
+        for node in blocked:
+            edges[node].clear()
+        for neighbors in edges:
+            neighbors.difference_update(blocked)
+
+        indptr = np.zeros(len(positions) + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum([len(neighbors) for neighbors in edges])
+        indices = np.fromiter((other for neighbors in edges for other in sorted(neighbors)), dtype=np.int32)
+        return cls(positions, indptr, indices)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def neighbors(self, position: hex.Cube) -> list[hex.Cube]:
+        """Find the positions which can be reached from a position in one move."""
+        node = self.index[position]
+        return [self.positions[other] for other in self.indices[self.indptr[node] : self.indptr[node + 1]]]
+
+    @property
+    def distances(self) -> np.ndarray:
+        """All-pairs shortest path lengths as a read-only (n, n) array indexed by node.
+
+        Pairs without a path have the distance 'UNREACHABLE'. The array is computed once per distinct
+        graph and shared between every board which compiles to the same graph.
+        """
+        return _all_pairs(len(self.positions), self.indptr.tobytes(), self.indices.tobytes())
+
+    def distance(self, position1: hex.Cube, position2: hex.Cube) -> Optional[int]:
+        """Find the number of moves between two positions, or 'None' if there is no path."""
+        distance = int(self.distances[self.index[position1], self.index[position2]])
+        return None if distance == UNREACHABLE else distance
+
+    def distances_from(self, position: hex.Cube) -> np.ndarray:
+        """Find the number of moves from a position to every node, indexed by node."""
+        return self.distances[self.index[position]]
+
+
+def _follow(position: hex.Cube, vector: hex.Cube, hyperlanes: Mapping[hex.Cube, schemas.Tile]) -> set[hex.Cube]:
+    """Find the positions reached by leaving a position in the direction of vector.
+
+    Hyperlane tiles are traversed, so a move into a hyperlane tile continues along every hyperlane which
+    has an end on the side that was entered.
+    """
+    reached: set[hex.Cube] = set()
+    visited: set[tuple[hex.Cube, hex.Cube]] = set()
+    pending = [(position, vector)]
+    while pending:
+        position, vector = pending.pop()
+        target = position + vector
+        if target not in hyperlanes:
+            reached.add(target)
+            continue
+        # The side of the hyperlane tile which faces back towards the previous position.
+        entry = vector * -1
+        if (target, entry) in visited:
+            continue
+        visited.add((target, entry))
+        for hyperlane in hyperlanes[target].hyperlanes:
+            if entry in hyperlane:
+                pending.extend((target, exit) for exit in hyperlane if exit != entry)
+    return reached
+
+
+@functools.lru_cache(maxsize=256)
+def _all_pairs(size: int, indptr: bytes, indices: bytes) -> np.ndarray:
+    """Compute all-pairs shortest path lengths with a breadth first search from every node at once."""
+    indptr_ = np.frombuffer(indptr, dtype=np.int32)
+    indices_ = np.frombuffer(indices, dtype=np.int32)
+    adjacency = np.zeros((size, size), dtype=np.float32)
+    adjacency[np.repeat(np.arange(size), np.diff(indptr_)), indices_] = 1
+
+    distances = np.full((size, size), UNREACHABLE, dtype=np.int16)
+    np.fill_diagonal(distances, 0)
+    frontier = np.eye(size, dtype=bool)
+    visited = frontier.copy()
+    step = 0
+    while frontier.any():
+        step += 1
+        # Row 'i' of the frontier holds the nodes first reached from node 'i' in the previous step.
+        frontier = (frontier.astype(np.float32) @ adjacency > 0) & ~visited
+        visited |= frontier
+        distances[frontier] = step
+
+    distances.flags.writeable = False
+    return distances
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import enum
+import functools
+import types
 from collections import deque
-from collections.abc import Iterator
+from collections.abc import Iterator, Mapping
+from typing import NamedTuple
 
 from pydantic import dataclasses
 
@@ -21,17 +24,17 @@ class Cube:
 
     def __add__(self, other) -> Cube:
         if isinstance(other, Cube):
-            return Cube(q=self.q + other.q, r=self.r + other.r, s=self.s + other.s)
+            return _cube(self.q + other.q, self.r + other.r, self.s + other.s)
         raise TypeError("unsupported operand type(s) for +: " + f"{type(self).__name__!r} and {type(other).__name__!r}")
 
     def __sub__(self, other) -> Cube:
         if isinstance(other, Cube):
-            return Cube(q=self.q - other.q, r=self.r - other.r, s=self.s - other.s)
+            return _cube(self.q - other.q, self.r - other.r, self.s - other.s)
         raise TypeError("unsupported operand type(s) for -: " + f"{type(self).__name__!r} and {type(other).__name__!r}")
 
     def __mul__(self, other) -> Cube:
         if isinstance(other, int):
-            return Cube(q=self.q * other, r=self.r * other, s=self.s * other)
+            return _cube(self.q * other, self.r * other, self.s * other)
         raise TypeError(f"unsupported operand type(s) for *: {type(self).__name__!r} and {type(other).__name__!r}")
 
     def __floordiv__(self, other) -> Cube:
@@ -43,6 +46,31 @@ class Cube:
         return (abs(self.q) + abs(self.r) + abs(self.s)) // 2
 
 
+# Cubes within this distance of the origin are interned by '_cube'. A radius of 8 holds 217 positions,
+# which covers every board layout and the vectors between any two of its positions.
+_INTERN_RADIUS = 8
+_interned: dict[tuple[int, int, int], Cube] = {}
+
+
+def _cube(q: int, r: int, s: int) -> Cube:
+    """Create a cube without validation.
+
+    Only use this for coordinates which sum to 0 by construction, e.g. the sum of two valid cubes.
+    Cubes within '_INTERN_RADIUS' of the origin are cached and shared between calls.
+    """
+    key = (q, r, s)
+    cube = _interned.get(key)
+    if cube is not None:
+        return cube
+
+    cube = object.__new__(Cube)
+    # Set the fields directly, skipping validation and the frozen '__setattr__'.
+    cube.__dict__.update(q=q, r=r, s=s, __pydantic_initialised__=True)
+    if abs(q) <= _INTERN_RADIUS and abs(r) <= _INTERN_RADIUS and abs(s) <= _INTERN_RADIUS:
+        _interned[key] = cube
+    return cube
+
+
 class Adjacent(enum.Enum):
     N = Cube(q=0, r=-1, s=1)
     NE = Cube(q=1, r=-1, s=0)
@@ -106,17 +134,17 @@ def ring(center: Cube, radius: int, *, direction: Adjacent = Adjacent.N, move: M
     for neighbor in neighbors:
         for _ in range(radius):
             yield position
-            position = adjacent(position, direction=Adjacent(neighbor))
+            position = position + neighbor
 
 
 def _rotate_clockwise(hex: Cube) -> Cube:
-    """Rotate a cube vector counterclockwise."""
-    return Cube(q=-hex.r, r=-hex.s, s=-hex.q)
+    """Rotate a cube vector clockwise."""
+    return _cube(-hex.r, -hex.s, -hex.q)
 
 
 def _rotate_counterclockwise(hex: Cube) -> Cube:
     """Rotate a cube vector counterclockwise."""
-    return Cube(q=-hex.s, r=-hex.q, s=-hex.r)
+    return _cube(-hex.s, -hex.q, -hex.r)
 
 
 def rotate(hex: Cube, center: Cube, *, angle: int) -> Cube:
@@ -142,16 +170,31 @@ def rotate(hex: Cube, center: Cube, *, angle: int) -> Cube:
         raise ValueError("argument 'angle' must be in 60 degree increments")
 
     vector = hex - center
-    steps = abs((angle % 360) // 60)
 
     if angle > 0:
-        *_, vector = (_rotate_clockwise(vector) for _ in range(steps))
+        for _ in range((angle % 360) // 60):
+            vector = _rotate_clockwise(vector)
     elif angle < 0:
-        *_, vector = (_rotate_counterclockwise(vector) for _ in range(steps))
+        for _ in range((-angle % 360) // 60):
+            vector = _rotate_counterclockwise(vector)
 
     return center + vector
 
 
+def reflect(hex: Cube, center: Cube) -> Cube:
+    """Reflect a cube position or vector across the north-south axis through a center position.
+
+    Args:
+        hex: Cube position or vector to reflect.
+        center: Cube position on the axis of reflection.
+
+    Returns:
+        Reflected cube position.
+    """
+    vector = hex - center
+    return center + _cube(-vector.q, -vector.s, -vector.r)
+
+
 def length(hex: Cube) -> int:
     """Calculate the length of a cube vector."""
     return abs(hex)
@@ -183,3 +226,67 @@ def spiral(
     for radius in radiuses:
         for position in ring(center, radius, direction=direction, move=move):
             yield position
+
+
+# Default radius of the spiral lookup tables. A radius of 4 covers every standard board layout.
+LOOKUP_RADIUS = 4
+
+
+class SpiralTable(NamedTuple):
+    "Lookup table between spiral indexes and cube positions around the origin."
+    positions: tuple[Cube, ...]
+    indices: Mapping[Cube, int]
+
+
+@functools.lru_cache(maxsize=None)
+def spiral_table(
+    radius: int = LOOKUP_RADIUS, *, direction: Adjacent = Adjacent.N, move: Move = Move.CLOCKWISE
+) -> SpiralTable:
+    """Build the lookup table for a spiral around the origin.
+
+    The table is built on first use and cached for each combination of arguments.
+
+    Args:
+        radius (optional): Spiral distance from the origin.
+        direction (optional): Direction to start from the origin.
+        move (optional): Direction to move around the spiral.
+
+    Returns:
+        Spiral positions in spiral order, and a read-only mapping from position to spiral index.
+    """
+    positions = tuple(spiral(Cube(0, 0, 0), radius, direction=direction, move=move))
+    indices = types.MappingProxyType({position: index for index, position in enumerate(positions)})
+    return SpiralTable(positions, indices)
+
+
+@functools.lru_cache(maxsize=None)
+def ring_table(radius: int, *, direction: Adjacent = Adjacent.N, move: Move = Move.CLOCKWISE) -> tuple[Cube, ...]:
+    """Build the lookup table from ring index to cube position for a ring around the origin.
+
+    The table is built on first use and cached for each combination of arguments.
+    """
+    return tuple(ring(Cube(0, 0, 0), radius, direction=direction, move=move))
+
+
+def spiral_position(index: int, *, radius: int = LOOKUP_RADIUS) -> Cube:
+    """Find the cube position at a spiral index in a default spiral around the origin.
+
+    Raises:
+        IndexError: If 'index' is outside a spiral of radius 'radius'.
+    """
+    positions = spiral_table(radius).positions
+    if not 0 <= index < len(positions):
+        raise IndexError(f"spiral index {index} is outside a spiral of radius {radius}")
+    return positions[index]
+
+
+def spiral_index(position: Cube, *, radius: int = LOOKUP_RADIUS) -> int:
+    """Find the spiral index of a cube position in a default spiral around the origin.
+
+    Raises:
+        ValueError: If 'position' is outside a spiral of radius 'radius'.
+    """
+    try:
+        return spiral_table(radius).indices[position]
+    except KeyError:
+        raise ValueError(f"position {position} is outside a spiral of radius {radius}") from None
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import functools
+import math
+from collections.abc import Iterable, Iterator
+from typing import Union
+
+import numpy as np
+
+from ti4_mapgen import hex
+from ti4_mapgen.hex import Adjacent, Cube, Diagonal, Move
+
+
+class CubeArray:
+    "A batch of cube positions or vectors in a hexagonal grid, stored as an (n, 3) integer array."
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data) -> None:
+        array = np.array(data, dtype=np.int64).reshape(-1, 3)
+        # Perform sanity check on coordinates.
+        sums = array.sum(axis=1)
+        if sums.any():
+            raise ValueError(f"attributes 'q', 'r', 's' must have a sum of 0, not {sums[sums != 0][0]}")
+        self._data = array
+
+    @classmethod
+    def _trusted(cls, array: np.ndarray) -> CubeArray:
+        """Wrap an (n, 3) array whose rows are already known to sum to 0."""
+        instance = object.__new__(cls)
+        instance._data = array
+        return instance
+
+    @classmethod
+    def from_cubes(cls, cubes: Iterable[Cube]) -> CubeArray:
+        """Create a cube array from an iterable of cubes."""
+        array = np.array([(cube.q, cube.r, cube.s) for cube in cubes], dtype=np.int64).reshape(-1, 3)
+        return cls._trusted(array)
+
+    def to_cubes(self) -> list[Cube]:
+        """Convert the cube array to a list of cubes."""
+        return [hex._cube(q, r, s) for q, r, s in self._data.tolist()]
+
+    @property
+    def q(self) -> np.ndarray:
+        return self._data[:, 0]
+
+    @property
+    def r(self) -> np.ndarray:
+        return self._data[:, 1]
+
+    @property
+    def s(self) -> np.ndarray:
+        return self._data[:, 2]
+
+    @property
+    def array(self) -> np.ndarray:
+        "A read-only view of the underlying (n, 3) array."
+        view = self._data.view()
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Cube]:
+        return iter(self.to_cubes())
+
+    def __getitem__(self, index) -> Union[Cube, CubeArray]:
+        if isinstance(index, (int, np.integer)):
+            q, r, s = self._data[index].tolist()
+            return hex._cube(q, r, s)
+        return CubeArray._trusted(self._data[index].reshape(-1, 3))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data.tolist()!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CubeArray):
+            return self._data.shape == other._data.shape and bool((self._data == other._data).all())
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __add__(self, other) -> CubeArray:
+        if isinstance(other, (CubeArray, Cube)):
+            return CubeArray._trusted(self._data + _as_array(other))
+        raise TypeError("unsupported operand type(s) for +: " + f"{type(self).__name__!r} and {type(other).__name__!r}")
+
+    def __sub__(self, other) -> CubeArray:
+        if isinstance(other, (CubeArray, Cube)):
+            return CubeArray._trusted(self._data - _as_array(other))
+        raise TypeError("unsupported operand type(s) for -: " + f"{type(self).__name__!r} and {type(other).__name__!r}")
+
+    def __mul__(self, other) -> CubeArray:
+        if isinstance(other, (int, np.integer)) and not isinstance(other, bool):
+            return CubeArray._trusted(self._data * other)
+        if isinstance(other, np.ndarray) and np.issubdtype(other.dtype, np.integer):
+            return CubeArray._trusted(self._data * other.reshape(-1, 1))
+        raise TypeError(f"unsupported operand type(s) for *: {type(self).__name__!r} and {type(other).__name__!r}")
+
+    def __abs__(self) -> np.ndarray:
+        return np.abs(self._data).sum(axis=1) // 2
+
+
+def _as_array(hexes: Union[CubeArray, Cube]) -> np.ndarray:
+    """Return the coordinates of a cube or cube array as an array which broadcasts against (n, 3)."""
+    if isinstance(hexes, Cube):
+        return np.array([hexes.q, hexes.r, hexes.s], dtype=np.int64)
+    return hexes._data
+
+
+def adjacent(hexes: CubeArray, *, direction: Adjacent) -> CubeArray:
+    """Find the adjacent cube positions in direction from each initial cube position."""
+    return hexes + direction.value
+
+
+def diagonal(hexes: CubeArray, *, direction: Diagonal) -> CubeArray:
+    """Find the diagonal cube positions in direction from each initial cube position."""
+    return hexes + direction.value
+
+
+@functools.lru_cache(maxsize=None)
+def _ring_steps(direction: Adjacent, move: Move) -> np.ndarray:
+    """Return the six unit vectors used to walk around a ring, in walking order."""
+    steps = np.array([(cube.q, cube.r, cube.s) for cube in hex.ring(Cube(0, 0, 0), 1, direction=direction, move=move)])
+    # Each step is the vector from one ring position to the next, wrapping around to the start.
+    steps = np.roll(steps, -1, axis=0) - steps
+    steps.flags.writeable = False
+    return steps
+
+
+def ring(center: Cube, radius: int, *, direction: Adjacent = Adjacent.N, move: Move = Move.CLOCKWISE) -> CubeArray:
+    """Calculate all positions on a ring which is radius distance from a center position.
+
+    The positions are ordered exactly as yielded by 'hex.ring'.
+
+    Args:
+        center: Cube position in center of ring.
+        radius: Ring distance from center position.
+        direction (optional): Direction to start from center position.
+        move (optional): Direction to move around the ring.
+
+    Returns:
+        Cube array of the positions in the ring.
+    """
+    start = _as_array(center) + _as_array(direction.value) * radius
+    steps = np.repeat(_ring_steps(direction, move), radius, axis=0)
+    offsets = np.cumsum(steps, axis=0) - steps
+    return CubeArray._trusted(start + offsets)
+
+
+def spiral(center: Cube, radius: int, *, direction: Adjacent = Adjacent.N, move: Move = Move.CLOCKWISE) -> CubeArray:
+    """Calculate all positions in a spiral pattern which is radius distance from a center position.
+
+    The positions are ordered exactly as yielded by 'hex.spiral'.
+
+    Args:
+        center: Cube position in center of spiral.
+        radius: Spiral distance from center position.
+        direction (optional): Direction to start from center position.
+        move (optional): Direction to move around the spiral.
+
+    Returns:
+        Cube array of the positions in the spiral.
+    """
+    rings = [_as_array(center).reshape(1, 3)]
+    rings.extend(ring(center, radius_, direction=direction, move=move)._data for radius_ in range(1, radius + 1))
+    return CubeArray._trusted(np.concatenate(rings))
+
+
+def rotate(hexes: CubeArray, center: Cube, *, angle: int) -> CubeArray:
+    """Rotate cube positions or vectors around a center position.
+
+    Note:
+        If argument 'angle' is positive rotation is clockwise, if negative rotation is counterclockwise.
+
+    Args:
+        hexes: Cube positions or vectors to rotate around a center.
+        center: Cube position to use as the center of rotation.
+        angle: Degrees to rotate the cube positions or vectors around the center.
+
+    Raises:
+        ValueError: If 'angle' is not divisible by 60.
+
+    Returns:
+        Rotated cube positions.
+    """
+
+    # Check if 'angle' is divisible by 60.
+    if angle % 60 != 0:
+        raise ValueError("argument 'angle' must be in 60 degree increments")
+
+    # A counterclockwise rotation by n steps equals a clockwise rotation by 6 - n steps.
+    steps = (angle % 360) // 60
+    vectors = (hexes - center)._data
+
+    # One clockwise step maps (q, r, s) to (-r, -s, -q), so n steps cycle the columns n times and flip
+    # the sign when n is odd.
+    rotated = np.roll(vectors, -steps, axis=1)
+    if steps % 2:
+        rotated = -rotated
+
+    return CubeArray._trusted(rotated + _as_array(center))
+
+
+# Maps the 'q' and 'r' coordinates of a cube to the 'x' and 'y' pixel coordinates of the center of a
+# flat topped hexagon with a circumradius of 1. The 'y' axis points south, as in SVG.
+_PIXEL_MATRIX = np.array([[1.5, math.sqrt(3) / 2], [0.0, math.sqrt(3)]])
+
+
+def to_pixels(hexes: CubeArray, size: float = 1.0) -> np.ndarray:
+    """Convert cube positions to the pixel coordinates of the hexagon centers, as an (n, 2) float array.
+
+    Args:
+        hexes: Cube positions to convert.
+        size (optional): Circumradius of a hexagon in pixels.
+    """
+    return hexes._data[:, :2] @ (_PIXEL_MATRIX * size)
+
+
+def length(hexes: CubeArray) -> np.ndarray:
+    """Calculate the length of each cube vector."""
+    return abs(hexes)
+
+
+def distance(hexes1: Union[CubeArray, Cube], hexes2: Union[CubeArray, Cube]) -> np.ndarray:
+    """Find the element-wise distance between two sets of cube positions."""
+    return np.abs(_as_array(hexes1) - _as_array(hexes2)).reshape(-1, 3).sum(axis=1) // 2
+
+
+def distance_matrix(hexes1: CubeArray, hexes2: CubeArray) -> np.ndarray:
+    """Find the distance between every pair of cube positions, as an (n, m) array."""
+    difference = hexes1._data[:, np.newaxis, :] - hexes2._data[np.newaxis, :, :]
+    return np.abs(difference).sum(axis=2) // 2
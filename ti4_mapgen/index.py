@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Hashable, Iterable, Mapping
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from ti4_mapgen import schemas
+
+# Value of a field of a tile for every indexed field. 'None' is indexed like any other value, so a
+# selection can ask for tiles without e.g. a letter or an anomaly.
+FIELDS: Mapping[str, Callable[[schemas.Tile], Hashable]] = {
+    "type": lambda tile: tile.type,
+    "number": lambda tile: tile.number,
+    "letter": lambda tile: tile.letter,
+    "release": lambda tile: tile.release,
+    "back": lambda tile: tile.back,
+    "faction": lambda tile: tile.faction,
+    "anomaly": lambda tile: None if tile.system is None else tile.system.anomaly,
+    "wormhole": lambda tile: None if tile.system is None else tile.system.wormhole,
+    "legendary": lambda tile: tile.system is not None and tile.system.legendary,
+}
+
+
+class TileIndex:
+    """Secondary indexes over the ids of a sequence of tiles.
+
+    Every indexed field maps each of its values to a posting bitmap, an integer whose bit 'i' is set
+    when tile 'i' has the value. A selection is answered by intersecting the bitmaps of its fields,
+    without looking at the tiles.
+    """
+
+    __slots__ = ("size", "postings")
+
+    def __init__(self, tiles: Iterable[schemas.Tile]) -> None:
+        self.postings: dict[str, dict[Hashable, int]] = {field: {} for field in FIELDS}
+        size = 0
+        for id, tile in enumerate(tiles):
+            bit = 1 << id
+            for field, value in FIELDS.items():
+                postings = self.postings[field]
+                key = value(tile)
+                postings[key] = postings.get(key, 0) | bit
+            size += 1
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    def bitmap(self, **criteria: Any) -> int:
+        """Find the bitmap of the tiles which match every criterion.
+
+        A criterion is a field name with either a value, or a collection of values of which a tile must
+        have any. Strings are values, not collections.
+
+        Raises:
+            ValueError: If a criterion is not an indexed field.
+        """
+        bitmap = (1 << self.size) - 1
+        for field, values in criteria.items():
+            if field not in self.postings:
+                raise ValueError(f"tiles can not be selected by {field!r}")
+            postings = self.postings[field]
+            if isinstance(values, str) or not isinstance(values, Collection):
+                bitmap &= postings.get(values, 0)
+            else:
+                union = 0
+                for value in values:
+                    union |= postings.get(value, 0)
+                bitmap &= union
+            if not bitmap:
+                break
+        return bitmap
+
+    def ids(self, **criteria: Any) -> np.ndarray:
+        """Find the ids of the tiles which match every criterion, in ascending order."""
+        return bitmap_ids(self.bitmap(**criteria), self.size)
+
+    def query(self, query: schemas.TileQuery) -> np.ndarray:
+        """Find the ids of the tiles which match a query. Fields of the query which are 'None' are ignored."""
+        return self.ids(**query.dict(exclude_none=True))
+
+
+def bitmap_ids(bitmap: int, size: Optional[int] = None) -> np.ndarray:
+    """Expand a bitmap to the ascending ids of its set bits."""
+    size = bitmap.bit_length() if size is None else size
+    data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(data, bitorder="little")).astype(np.int16)
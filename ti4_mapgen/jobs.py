@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+import math
+import multiprocessing
+import secrets
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Optional
+
+from ti4_mapgen import cache, schemas
+
+# Values in the shared progress memory of every worker slot: the best score and the evaluations.
+_FIELDS = 2
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted to a queue which already holds its maximum number of waiting jobs."""
+
+
+@dataclasses.dataclass(eq=False)
+class Job:
+    """Job of a queue, the function it runs in a worker process and its state.
+
+    The function is called with a keyword argument 'progress', a callable which reports the best score
+    and the number of evaluations so far, like the argument of 'generator.generate'.
+    """
+
+    id: str
+    function: Callable[..., Any]
+    # Called on the event loop with the return value of the function, the result of the job is its value.
+    finish: Optional[Callable[[Any], Awaitable[Any]]] = None
+    status: schemas.JobStatus = schemas.JobStatus.QUEUED
+    score: Optional[float] = None
+    evaluations: int = 0
+    result: Any = None
+    error: Optional[str] = None
+    # Worker slot of the job while it runs.
+    slot: Optional[int] = None
+    done: asyncio.Event = dataclasses.field(default_factory=asyncio.Event)
+
+
+class JobQueue:
+    """Queue of jobs run by a bounded pool of worker processes.
+
+    Jobs wait in an asyncio queue of at most 'depth' jobs, and a job submitted to a full queue is refused.
+    Each of 'workers' tasks on the event loop takes the next job and runs it in the process pool, so at
+    most 'workers' jobs run at a time. A running job reports its progress to shared memory, in the slot
+    of the task which runs it, and the progress is read when the job is looked up. Finished jobs are
+    kept for 'ttl' seconds.
+    """
+
+    def __init__(self, workers: int, depth: int, *, ttl: float = 3600.0, retained: int = 1024) -> None:
+        """Create a job queue. No worker is started before 'start'.
+
+        Args:
+            workers: Number of worker processes, i.e. jobs which run at a time.
+            depth: Number of jobs which can wait for a worker.
+            ttl (optional): Number of seconds a finished job is kept.
+            retained (optional): Number of finished jobs which are kept, the oldest are dropped first.
+        """
+        self.workers = workers
+        self.depth = depth
+        self._active: dict[str, Job] = {}
+        self._finished: cache.TTLCache[str, Job] = cache.TTLCache(retained, ttl)
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._progress: Any = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Start the tasks which take jobs from the queue. Worker processes are started on first use."""
+        self._queue = asyncio.Queue(self.depth)
+        self._progress = multiprocessing.RawArray("d", _FIELDS * self.workers)
+        self._executor = self._create_executor()
+        self._tasks = [asyncio.create_task(self._drain(slot)) for slot in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop taking jobs and shut down the worker processes without waiting for running jobs."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, function: Callable[..., Any], *, finish: Optional[Callable[[Any], Awaitable[Any]]] = None) -> Job:
+        """Add a job to the queue.
+
+        Raises:
+            QueueFull: If 'depth' jobs are already waiting.
+            RuntimeError: If the queue is not started.
+        """
+        if self._queue is None:
+            raise RuntimeError("job queue is not started")
+        job = Job(secrets.token_urlsafe(16), function, finish)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(f"the job queue is full with {self.depth} waiting jobs, try again later") from None
+        self._active[job.id] = job
+        return job
+
+    def get(self, id: str) -> Optional[Job]:
+        """Find a job by id, with the progress of a running job read from its worker slot."""
+        job = self._active.get(id)
+        if job is None:
+            return self._finished.get(id)
+        if job.slot is not None:
+            self._read_progress(job)
+        return job
+
+    async def wait(self, job: Job, timeout: float) -> None:
+        """Wait until a job is finished, or at most 'timeout' seconds."""
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    @property
+    def queued(self) -> int:
+        """Count the jobs which wait for a worker."""
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(self.workers, initializer=_initialize_worker, initargs=(self._progress,))
+
+    async def _drain(self, slot: int) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status = schemas.JobStatus.RUNNING
+            job.slot = slot
+            self._progress[_FIELDS * slot : _FIELDS * (slot + 1)] = [math.nan, 0.0]
+            executor = self._executor
+            try:
+                result = await loop.run_in_executor(executor, _run, slot, job.function)
+                if job.finish is not None:
+                    result = await job.finish(result)
+            except BrokenProcessPool as error:
+                # A worker process died, e.g. it ran out of memory, so the pool can not run any more jobs. Every
+                # job which ran in the pool fails, and only the first of them replaces the pool.
+                if self._executor is executor:
+                    assert executor is not None
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._create_executor()
+                job.status, job.error = schemas.JobStatus.FAILED, str(error)
+            except Exception as error:
+                job.status, job.error = schemas.JobStatus.FAILED, str(error)
+            else:
+                job.status, job.result = schemas.JobStatus.DONE, result
+            finally:
+                self._read_progress(job)
+                job.slot = None
+                del self._active[job.id]
+                self._finished.put(job.id, job)
+                job.done.set()
+
+    def _read_progress(self, job: Job) -> None:
+        assert job.slot is not None
+        score, evaluations = self._progress[_FIELDS * job.slot : _FIELDS * (job.slot + 1)]
+        if not math.isnan(score):
+            job.score, job.evaluations = score, int(evaluations)
+
+
+# Shared progress memory of every worker slot, set once per worker process by '_initialize_worker'.
+_worker: dict[str, Any] = {}
+
+
+def _initialize_worker(progress: Any) -> None:
+    _worker["progress"] = progress
+
+
+def _report(slot: int, score: float, evaluations: int) -> None:
+    _worker["progress"][_FIELDS * slot : _FIELDS * (slot + 1)] = [score, float(evaluations)]
+
+
+def _run(slot: int, function: Callable[..., Any]) -> Any:
+    """Run the function of a job in a worker process, reporting its progress to the slot."""
+    return function(progress=functools.partial(_report, slot))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import functools
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from ti4_mapgen import board, hex, schemas
+
+CENTER = hex.Cube(0, 0, 0)
+
+# Number of the center tile a map string leaves out, Mecatol Rex. Another center tile is written first
+# in braces, e.g. '{82}'.
+DEFAULT_CENTER = 18
+
+# Tokens of a home system slot without a tile, and of a position without a tile.
+HOME = "0"
+NONE = "-1"
+
+# Tile id of a decoded home system slot without a tile. A position without a tile is 'board.EMPTY'.
+HOME_SLOT = -2
+
+# Rotations of a tile, in clockwise steps of 60 degrees.
+ROTATIONS = 6
+
+# Decoded tokens are packed to 'id * _PACK + rotation' so a map is decoded to a single integer list.
+_PACK = 8
+
+
+class Decoded(NamedTuple):
+    """Decoded map strings, as arrays of shape (maps, positions) by spiral index, the center first.
+
+    A tile is the id of a catalog tile, 'HOME_SLOT' or 'board.EMPTY'. A rotation is the number of
+    clockwise steps of 60 degrees a tile is turned.
+    """
+
+    tiles: np.ndarray
+    rotations: np.ndarray
+
+
+def encode(layout: Sequence[schemas.Tile], catalog: board.Catalog) -> str:
+    """Encode a layout to a map string.
+
+    A map string holds the token of each position in spiral order around the center, without the center.
+    A token is the tile number and letter, followed by the rotation of a tile with hyperlanes, e.g. '83A2'.
+    Trailing positions without a tile are left out.
+
+    Args:
+        layout: Tiles with positions.
+        catalog: Tile catalog to find the rotation of hyperlane tiles in.
+
+    Raises:
+        ValueError: If a tile does not have a position, a system slot has no tile, or a hyperlane tile is
+            not a rotation of a catalog tile.
+    """
+    positions: dict[hex.Cube, schemas.Tile] = {}
+    for tile in layout:
+        if tile.position is None:
+            raise ValueError(f"tile {tile.number} in layout must have a position")
+        positions[tile.position] = tile
+    radius = max((hex.length(position) for position in positions), default=0)
+    table = hex.spiral_table(radius)
+
+    tokens = [NONE] * len(table.positions)
+    for position, tile in positions.items():
+        tokens[table.indices[position]] = _token(tile, catalog)
+    while len(tokens) > 1 and tokens[-1] == NONE:
+        tokens.pop()
+
+    center = tokens[0]
+    prefix = [] if center == str(DEFAULT_CENTER) else [f"{{{center}}}"]
+    return " ".join(prefix + tokens[1:])
+
+
+def decode(map_string: str, catalog: board.Catalog) -> list[schemas.Tile]:
+    """Decode a map string to a layout of positioned tiles, see 'encode'.
+
+    Raises:
+        ValueError: If a token is not a catalog tile or the center tile is not in the catalog.
+    """
+    return expand(decode_all([map_string], catalog), 0, catalog)
+
+
+def decode_all(map_strings: Iterable[str], catalog: board.Catalog) -> Decoded:
+    """Decode many map strings at once, e.g. every line of a file, without creating tile models.
+
+    Tokens are looked up in a table of every token of the catalog, built once for each catalog, so a map
+    string is decoded with one lookup per position. Maps shorter than the longest map are padded with
+    positions without a tile.
+
+    Raises:
+        ValueError: If a token is not a catalog tile or the center tile is not in the catalog.
+    """
+    lookup = _lookup(catalog)
+    rows = []
+    for line, map_string in enumerate(map_strings, start=1):
+        tokens = map_string.split()
+        center = str(DEFAULT_CENTER)
+        if tokens and tokens[0].startswith("{") and tokens[0].endswith("}"):
+            center = tokens.pop(0)[1:-1]
+        try:
+            rows.append([lookup[center], *(lookup[token] for token in tokens)])
+        except KeyError as error:
+            raise ValueError(f"tile {error.args[0]!r} in map string {line} is not in the catalog") from None
+
+    width = max((len(row) for row in rows), default=1)
+    empty = board.EMPTY * _PACK
+    packed = np.array([row + [empty] * (width - len(row)) for row in rows], dtype=np.int32).reshape(-1, width)
+    tiles, rotations = np.divmod(packed, _PACK)
+    return Decoded(tiles.astype(np.int16), rotations.astype(np.int8))
+
+
+def expand(decoded: Decoded, index: int, catalog: board.Catalog) -> list[schemas.Tile]:
+    """Expand a decoded map to positioned tile models, turning the hyperlanes of each rotated tile."""
+    ids = decoded.tiles[index].tolist()
+    radius = _radius(len(ids))
+    positions = hex.spiral_table(radius).positions
+    layout = []
+    for position, id, rotation in zip(positions, ids, decoded.rotations[index].tolist()):
+        if id == board.EMPTY:
+            continue
+        if id == HOME_SLOT:
+            tile = schemas.Tile(type=schemas.Type.HOME, number=0, release=schemas.Release.BASE, position=position)
+        else:
+            tile = catalog[id]
+            update = {"position": position}
+            if rotation:
+                update["hyperlanes"] = [
+                    [hex.rotate(end, CENTER, angle=60 * rotation) for end in lane] for lane in tile.hyperlanes
+                ]
+            tile = tile.copy(update=update)
+        layout.append(tile)
+    return layout
+
+
+def _token(tile: schemas.Tile, catalog: board.Catalog) -> str:
+    if tile.number == 0:
+        if tile.type is schemas.Type.HOME:
+            return HOME
+        raise ValueError(f"{tile.type.value} slot at {tile.position} has no tile, a map string only holds tiles")
+    token = f"{tile.number}{tile.letter.value if tile.letter is not None else ''}"
+    if not tile.hyperlanes:
+        return token
+    return f"{token}{_rotation(tile, catalog)}"
+
+
+def _rotation(tile: schemas.Tile, catalog: board.Catalog) -> int:
+    """Find the rotation of a hyperlane tile relative to the catalog tile with its number and letter."""
+    lanes = _lanes(tile.hyperlanes)
+    for id in catalog.select(number=tile.number, letter=tile.letter).tolist():
+        original = catalog[id].hyperlanes
+        for rotation in range(ROTATIONS):
+            turned = [[hex.rotate(end, CENTER, angle=60 * rotation) for end in lane] for lane in original]
+            if _lanes(turned) == lanes:
+                return rotation
+    raise ValueError(f"hyperlanes of tile {tile.number} are not a rotation of a catalog tile")
+
+
+def _lanes(hyperlanes: Iterable[Iterable[hex.Cube]]) -> frozenset:
+    return frozenset(frozenset(lane) for lane in hyperlanes)
+
+
+@functools.lru_cache(maxsize=8)
+def _lookup(catalog: board.Catalog) -> dict[str, int]:
+    """Tabulate the packed id and rotation of every token of a catalog, in upper and lower case."""
+    lookup = {HOME: HOME_SLOT * _PACK, NONE: board.EMPTY * _PACK}
+    for id, tile in enumerate(catalog.tiles):
+        for letter in {tile.letter.value, tile.letter.value.lower()} if tile.letter is not None else {""}:
+            token = f"{tile.number}{letter}"
+            lookup.setdefault(token, id * _PACK)
+            if tile.hyperlanes:
+                for rotation in range(ROTATIONS):
+                    lookup.setdefault(f"{token}{rotation}", id * _PACK + rotation)
+    return lookup
+
+
+def _radius(positions: int) -> int:
+    """Find the radius of the smallest spiral with at least a number of positions."""
+    radius = 0
+    while 3 * radius * (radius + 1) + 1 < positions:
+        radius += 1
+    return radius
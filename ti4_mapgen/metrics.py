@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, Optional, TypeVar
+
+from fastapi import HTTPException
+from fastapi.responses import PlainTextResponse
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Upper bounds in seconds of the histogram buckets, the Prometheus client defaults.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Media type of the Prometheus text format, the response adds the charset.
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+class Histogram:
+    """Histogram of observations by label values, e.g. request latency by route."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Count of observations in each bucket, not cumulative, with a last bucket for '+Inf', and the sum.
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            pairs = list(zip(self.labels, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels([*pairs, ('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{_labels(pairs)} {total!r}"
+            yield f"{self.name}_count{_labels(pairs)} {cumulative}"
+
+
+class Gauge:
+    """Value which goes up and down, e.g. the number of requests in flight."""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: int) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.value}"
+
+
+class Registry:
+    """Metrics of the app. Requests and stages are not recorded while the registry is disabled."""
+
+    def __init__(self, *, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.requests = Histogram(
+            "ti4_mapgen_request_duration_seconds", "Latency of HTTP requests.", ("method", "route", "status")
+        )
+        self.in_flight = Gauge("ti4_mapgen_requests_in_flight", "HTTP requests being handled.")
+        self.stages = Histogram("ti4_mapgen_stage_duration_seconds", "Latency of request stages.", ("stage",))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines = [*self.requests.render(), *self.in_flight.render(), *self.stages.render()]
+        return "\n".join(lines) + "\n"
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as a named stage, e.g. 'fetch', 'validate', 'generate' or 'serialize'."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.observe(time.perf_counter() - start, name)
+
+
+REGISTRY = Registry()
+
+
+def stage(name: str) -> contextlib.AbstractContextManager[None]:
+    """Time the enclosed block as a named stage of the default registry."""
+    return REGISTRY.stage(name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Time every call of a function as a named stage of the default registry."""
+
+    def decorate(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with REGISTRY.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class TimingMiddleware:
+    """ASGI middleware which records the latency of every HTTP request by route, and the requests in flight.
+
+    Requests are labelled with the path template of the route which handled them, so the number of series
+    does not grow with the requested paths.
+    """
+
+    def __init__(self, app: Any, registry: Optional[Registry] = None) -> None:
+        self.app = app
+        self.registry = REGISTRY if registry is None else registry
+        self._routes: Optional[dict[Any, str]] = None
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight.add(1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.in_flight.add(-1)
+            self.registry.requests.observe(elapsed, scope["method"], self._route(scope), str(status))
+
+    def _route(self, scope: dict) -> str:
+        """Find the path template of the route which handled a request, from the endpoint the router set."""
+        if self._routes is None:
+            self._routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+
+async def read_metrics() -> PlainTextResponse:
+    if not REGISTRY.enabled:
+        raise HTTPException(status_code=404, detail="metrics are disabled")
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _labels(pairs: Sequence[tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import functools
+from collections.abc import Sequence
+from typing import Optional
+
+import numpy as np
+
+from ti4_mapgen import board, hexarray, metrics, responses, schemas
+
+try:
+    import cairosvg
+except ImportError:
+    cairosvg = None
+
+# Circumradius of a tile in pixels.
+DEFAULT_SIZE = 60
+
+# Fill of a tile by the color of its back, or by its type if it has no back.
+_BACKS = {schemas.Color.BLUE: "#27476e", schemas.Color.GREEN: "#2f5d3a", schemas.Color.RED: "#6e2727"}
+_TYPES = {
+    schemas.Type.CENTER: "#8a6d1f",
+    schemas.Type.HOME: "#2f5d3a",
+    schemas.Type.HYPERLANE: "#2b2b2b",
+    schemas.Type.SYSTEM: "#3a3a3a",
+    schemas.Type.EXTERIOR: "#1e1e1e",
+}
+_WORMHOLES = {
+    schemas.Wormhole.ALPHA: "α",
+    schemas.Wormhole.BETA: "β",
+    schemas.Wormhole.DELTA: "δ",
+    schemas.Wormhole.GAMMA: "γ",
+}
+_ANOMALIES = {
+    schemas.Anomaly.ASTEROID_FIELD: "asteroids",
+    schemas.Anomaly.GRAVITY_RIFT: "rift",
+    schemas.Anomaly.NEBULA: "nebula",
+    schemas.Anomaly.SUPERNOVA: "supernova",
+}
+
+
+def svg(board_: board.Board, *, size: float = DEFAULT_SIZE) -> str:
+    """Render a board as an SVG document.
+
+    Every distinct tile is drawn once as a glyph in the definitions and placed with a 'use' element at
+    the center of each of its positions. Glyphs are cached by the fields they show, so the glyphs of the
+    tiles of a catalog are only drawn for the first board they appear on.
+
+    Args:
+        board_: Board to render.
+        size (optional): Circumradius of a tile in pixels.
+    """
+    keys = _catalog_keys(board_.catalog)
+    centers = np.round(hexarray.to_pixels(board_.positions, size), 1)
+    # The view box holds the origin and every tile, which reaches 'size' from its center, with a margin of
+    # half a tile.
+    low = centers.min(axis=0, initial=0) - size * 1.5
+    extent = centers.max(axis=0, initial=0) + size * 1.5 - low
+
+    glyphs: dict[tuple, str] = {}
+    uses = []
+    for template_tile, id, (x, y) in zip(board_.template, board_.tiles.tolist(), centers.tolist()):
+        key = _key(template_tile) if id == board.EMPTY else keys[id]
+        name = glyphs.get(key)
+        if name is None:
+            name = glyphs[key] = f"t{len(glyphs)}"
+        uses.append(f'<use xlink:href="#{name}" x="{x:g}" y="{y:g}"/>')
+
+    definitions = "".join(f'<g id="{name}">{_glyph(key, size)}</g>' for key, name in glyphs.items())
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'viewBox="{low[0]:g} {low[1]:g} {extent[0]:g} {extent[1]:g}" width="{extent[0]:g}" height="{extent[1]:g}" '
+        f'font-family="sans-serif" text-anchor="middle"><defs>{definitions}</defs>{"".join(uses)}</svg>'
+    )
+
+
+def png(document: str) -> bytes:
+    """Convert an SVG document to PNG.
+
+    Raises:
+        RuntimeError: If the optional 'cairosvg' package is not installed.
+    """
+    if cairosvg is None:
+        raise RuntimeError("PNG rendering needs the optional 'cairosvg' package")
+    return cairosvg.svg2png(bytestring=document.encode())
+
+
+@metrics.timed("render")
+def encode(board_: board.Board, format: schemas.ImageFormat, *, size: float = DEFAULT_SIZE) -> responses.Encoded:
+    """Render a board as an encoded response body.
+
+    Raises:
+        RuntimeError: If the format is PNG and the optional 'cairosvg' package is not installed.
+    """
+    document = svg(board_, size=size)
+    if format is schemas.ImageFormat.PNG:
+        # PNG is compressed already, so it is always sent as is.
+        return responses.Encoded(png(document), media_type=schemas.MEDIA_TYPES[format], compressible=False)
+    return responses.Encoded(document.encode(), media_type=schemas.MEDIA_TYPES[format])
+
+
+def from_layout(layout: Sequence[schemas.Tile], catalog: Optional[board.Catalog] = None) -> board.Board:
+    """Create a board which shows a layout of positioned tiles, e.g. the layout of a stored map.
+
+    Raises:
+        ValueError: If a tile does not have a position.
+    """
+    template = tuple(layout)
+    for tile in template:
+        if tile.position is None:
+            raise ValueError(f"tile {tile.number} in layout must have a position")
+    positions = hexarray.CubeArray.from_cubes(tile.position for tile in template)
+    tiles = np.full(len(template), board.EMPTY, dtype=np.int16)
+    catalog = board.Catalog(()) if catalog is None else catalog
+    return board.Board(template, positions, catalog, tiles, np.array([], dtype=np.int16))
+
+
+def _key(tile: schemas.Tile) -> tuple:
+    """Describe a tile by the fields its glyph shows, as a hashable tuple."""
+    system = tile.system
+    lanes = tuple(sorted(tuple(sorted((end.q, end.r, end.s) for end in lane)) for lane in tile.hyperlanes))
+    if system is None:
+        return tile.type, tile.number, tile.letter, tile.back, lanes
+    return (
+        tile.type,
+        tile.number,
+        tile.letter,
+        tile.back,
+        lanes,
+        system.resources,
+        system.influence,
+        system.planets,
+        system.anomaly,
+        system.wormhole,
+        system.legendary,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _catalog_keys(catalog: board.Catalog) -> tuple[tuple, ...]:
+    """Describe every tile in a catalog by tile id, see '_key'."""
+    return tuple(_key(tile) for tile in catalog.tiles)
+
+
+@functools.lru_cache(maxsize=1024)
+def _glyph(key: tuple, size: float) -> str:
+    """Draw a tile around the origin as an SVG fragment."""
+    type, number, letter, back, lanes, *system = key
+    fill = _BACKS[back] if back is not None else _TYPES[type]
+    parts = [f'<polygon points="{_corners(size)}" fill="{fill}" stroke="#000" stroke-width="{size / 30:g}"/>']
+
+    for lane in lanes:
+        (x1, y1), (x2, y2) = _edge_midpoints(lane, size)
+        parts.append(
+            f'<path d="M{x1:g} {y1:g}Q0 0 {x2:g} {y2:g}" fill="none" stroke="#e0e0e0" '
+            f'stroke-width="{size / 12:g}" stroke-linecap="round"/>'
+        )
+
+    font = size / 4
+    if number:
+        label = f"{number}{letter.value if letter is not None else ''}"
+        parts.append(f'<text y="{-size * 0.6:g}" font-size="{font:g}" fill="#fff">{label}</text>')
+    if system:
+        resources, influence, planets, anomaly, wormhole, legendary = system
+        if planets:
+            parts.append(
+                f'<text y="{font / 3:g}" font-size="{font * 1.2:g}" fill="#fff">{resources}/{influence}</text>'
+            )
+        marks = [_ANOMALIES[anomaly]] if anomaly is not None else []
+        if wormhole is not None:
+            marks.append(_WORMHOLES[wormhole])
+        if legendary:
+            marks.append("★")
+        if marks:
+            parts.append(f'<text y="{size * 0.7:g}" font-size="{font:g}" fill="#fc6">{" ".join(marks)}</text>')
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=16)
+def _corners(size: float) -> str:
+    """Find the corners of a flat topped hexagon around the origin, as the points of an SVG polygon."""
+    angles = np.radians(np.arange(0, 360, 60))
+    corners = np.round(np.stack([np.cos(angles), np.sin(angles)], axis=1) * size, 2)
+    return " ".join(f"{x:g},{y:g}" for x, y in corners.tolist())
+
+
+def _edge_midpoints(lane: tuple[tuple[int, int, int], ...], size: float) -> list[tuple[float, float]]:
+    """Find the midpoints of the edges a hyperlane joins, from the unit vectors of its ends.
+
+    The midpoint of an edge is half way to the center of the tile across it.
+    """
+    ends = hexarray.CubeArray(lane)
+    return [(round(x, 2), round(y, 2)) for x, y in (hexarray.to_pixels(ends, size) / 2).tolist()]
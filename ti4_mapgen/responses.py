@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import math
+from collections.abc import Callable, Hashable, Mapping
+from typing import Any, Optional
+
+import orjson
+from fastapi import Request, Response
+from pydantic.json import pydantic_encoder
+
+from ti4_mapgen import cache, metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed, since compression would barely shrink them.
+MINIMUM_COMPRESSED_SIZE = 512
+
+
+class Encoded:
+    """Response body encoded once and shared by every request, with a strong ETag of its bytes.
+
+    Compressed variants of the body are created on first use and kept with it. Bodies which are not
+    compressible, e.g. images in a compressed format, are always sent as they are.
+    """
+
+    __slots__ = ("body", "etag", "headers", "media_type", "compressible", "_compressed")
+
+    def __init__(
+        self,
+        body: bytes,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: str = "application/json",
+        compressible: bool = True,
+    ) -> None:
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        self.headers = dict(headers or {})
+        self.media_type = media_type
+        self.compressible = compressible
+        self._compressed: dict[str, bytes] = {}
+
+    @classmethod
+    def json(cls, content: Any, *, headers: Optional[Mapping[str, str]] = None) -> Encoded:
+        """Encode content to JSON. Models are encoded like FastAPI encodes a response model."""
+        with metrics.stage("serialize"):
+            return cls(orjson.dumps(content, default=pydantic_encoder), headers=headers)
+
+    def compressed(self, coding: str) -> bytes:
+        """Find the body compressed with a content coding, 'gzip' or 'br'."""
+        body = self._compressed.get(coding)
+        if body is None:
+            body = brotli.compress(self.body) if coding == "br" else gzip.compress(self.body, mtime=0)
+            self._compressed[coding] = body
+        return body
+
+    def response(self, request: Request) -> Response:
+        """Create the response to a request, which is 304 Not Modified if the client has the body."""
+        coding = None
+        if self.compressible and len(self.body) >= MINIMUM_COMPRESSED_SIZE:
+            coding = negotiate(request.headers.get("accept-encoding", ""))
+        # Every representation has its own strong ETag, since their bytes differ.
+        etag = self.etag if coding is None else f'{self.etag[:-1]}-{coding}"'
+        headers = {**self.headers, "ETag": etag, "Vary": "Accept-Encoding"}
+        if matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if coding is None:
+            return Response(self.body, media_type=self.media_type, headers=headers)
+        headers["Content-Encoding"] = coding
+        return Response(self.compressed(coding), media_type=self.media_type, headers=headers)
+
+
+class EncodedCache:
+    """Encoded responses by key, each derived from a source such as a catalog.
+
+    An entry is only used while its source is the same object, so responses are encoded again after the
+    catalog they were derived from is reloaded.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._entries: cache.TTLCache[Hashable, tuple[Any, Encoded]] = cache.TTLCache(maxsize, math.inf)
+
+    def get(self, key: Hashable, source: Any, encode: Callable[[], Encoded]) -> Encoded:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is source:
+            return entry[1]
+        encoded = encode()
+        self._entries.put(key, (source, encoded))
+        return encoded
+
+    def stats(self) -> cache.CacheStats:
+        return self._entries.stats()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Choose the content coding of a response from an Accept-Encoding header, preferring brotli to gzip."""
+    weights: dict[str, float] = {}
+    for element in accept_encoding.split(","):
+        coding, _, parameters = element.strip().partition(";")
+        weight = 1.0
+        name, _, value = parameters.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    available = ("br", "gzip") if brotli is not None else ("gzip",)
+    accepted = [coding for coding in available if weights.get(coding, weights.get("*", 0.0)) > 0]
+    return max(accepted, key=lambda coding: weights.get(coding, weights.get("*", 0.0)), default=None)
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check if an If-None-Match header matches an ETag, with the weak comparison RFC 7232 asks for."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
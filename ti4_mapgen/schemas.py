@@ -89,6 +89,22 @@ class Name(str, Enum):
     YSSARIL = "The Yssaril Tribes"
 
 
+class ImageFormat(str, Enum):
+    SVG = "svg"
+    PNG = "png"
+
+
+# Media type of a rendered image by its format.
+MEDIA_TYPES = {ImageFormat.SVG: "image/svg+xml", ImageFormat.PNG: "image/png"}
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
 class Players(IntEnum):
     ONE = 1
     TWO = 2
@@ -124,6 +140,7 @@ class Tile(BaseModel):
     back: Optional[Color] = None
     system: Optional[System] = None
     hyperlanes: list[list[hex.Cube]] = Field(default_factory=list)
+    position: Optional[hex.Cube] = None
 
 
 class TileInDB(Tile):
@@ -156,8 +173,89 @@ class MapInDB(Map):
     key: str
 
 
+class MapGenerated(Map):
+    seed: int
+    score: float
+    evaluations: int
+    # Equal for maps which are rotations or reflections of each other.
+    signature: str
+
+
+class Job(BaseModel):
+    """Class representing a background generation job."""
+
+    id: str
+    status: JobStatus
+    # Best score and evaluations so far while the job runs, and of the result when it is done.
+    score: Optional[float] = None
+    evaluations: int = 0
+    result: Optional[MapGenerated] = None
+    error: Optional[str] = None
+
+
+class MapString(BaseModel):
+    """Class representing a layout as a map string, see 'mapstring.encode'."""
+
+    map_string: str
+
+
+class GenerateOptions(BaseModel):
+    """Options of a map generation."""
+
+    # The routes limit the budget, see 'views.MAX_EVALUATIONS'.
+    evaluations: int = Field(default=200_000, ge=0)
+    # Safety cap on the run time. The default budget of evaluations is spent well within it, so the board
+    # of a seed is reproducible and can be cached.
+    time_limit: float = Field(default=5.0, gt=0)
+    # Releases to draw system tiles from, every release if 'None'.
+    releases: Optional[tuple[Release, ...]] = None
+    anomalies: bool = True
+    # Keep the board valid for tournament play, see 'solver.TOURNAMENT'.
+    tournament: bool = False
+
+    class Config:
+        frozen = True
+
+
 class Faction(BaseModel):
     """Class representing a faction."""
 
     name: Name
     release: Release
+
+
+class DraftOptions(BaseModel):
+    """Options of a slice draft."""
+
+    evaluations: int = Field(default=20_000, ge=0, le=1_000_000)
+    time_limit: float = Field(default=0.5, gt=0, le=10)
+    # Releases to draw system tiles from, every release if 'None'.
+    releases: Optional[tuple[Release, ...]] = None
+    # Limits on the systems of every slice.
+    max_anomalies: int = Field(default=2, ge=0, le=5)
+    max_wormholes: int = Field(default=1, ge=0, le=5)
+    max_legendaries: int = Field(default=1, ge=0, le=5)
+    min_resources: int = Field(default=0, ge=0)
+    min_influence: int = Field(default=0, ge=0)
+
+    class Config:
+        frozen = True
+
+
+class Slice(BaseModel):
+    """Class representing a draft slice, the systems next to a home system."""
+
+    tiles: list[Tile]
+    resources: int
+    influence: int
+
+
+class Draft(BaseModel):
+    """Class representing a draft package, the slices and factions the players choose from."""
+
+    players: Players
+    slices: list[Slice]
+    factions: list[Name]
+    seed: int
+    score: float
+    evaluations: int
@@ -0,0 +1,384 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import struct
+from collections.abc import Iterable, Sequence
+from enum import Enum
+from typing import Any, Optional
+
+import numpy as np
+
+from ti4_mapgen import board, hex, schemas
+
+MAGIC = b"TI4SNAP\0"
+VERSION = 1
+
+# Index in the string table of a missing string, e.g. the key of a layout tile.
+NO_STRING = np.iinfo(np.uint32).max
+
+# Flags of a tile record.
+HAS_SYSTEM = 1
+LEGENDARY = 2
+HAS_POSITION = 4
+
+TILE = np.dtype(
+    [
+        ("key", np.uint32),
+        ("type", np.uint8),
+        ("number", np.int16),
+        ("letter", np.uint8),
+        ("release", np.uint8),
+        ("faction", np.uint8),
+        ("back", np.uint8),
+        ("flags", np.uint8),
+        ("resources", np.int8),
+        ("influence", np.int8),
+        ("planets", np.int8),
+        ("anomaly", np.uint8),
+        ("wormhole", np.uint8),
+        # Count of each trait and tech, 4 bits per member in enum order.
+        ("traits", np.uint16),
+        ("techs", np.uint16),
+        ("position", np.int8, (3,)),
+        ("lanes", np.uint32),
+        ("lane_count", np.uint16),
+    ]
+)
+
+MAP = np.dtype(
+    [
+        ("key", np.uint32),
+        ("players", np.uint8),
+        ("style", np.uint32),
+        ("description", np.uint32),
+        ("source", np.uint32),
+        ("layout", np.uint32),
+        ("layout_count", np.uint16),
+    ]
+)
+
+FACTION = np.dtype([("name", np.uint8), ("release", np.uint8)])
+
+# Enums stored as codes, where code 0 is 'None' and code 'i + 1' is the member at index 'i'.
+ENUMS: dict[str, type[Enum]] = {
+    "type": schemas.Type,
+    "letter": schemas.Letter,
+    "release": schemas.Release,
+    "faction": schemas.Name,
+    "back": schemas.Color,
+    "anomaly": schemas.Anomaly,
+    "wormhole": schemas.Wormhole,
+}
+
+_HEADER = struct.Struct("<8sI16sI")
+_SECTION = struct.Struct("<16sQQ")
+_ALIGNMENT = 8
+
+
+def fingerprint() -> bytes:
+    """Digest of the record layouts and enum members, which a snapshot must have been built with."""
+    digest = hashlib.blake2b(digest_size=16)
+    for dtype in (TILE, MAP, FACTION):
+        digest.update(repr(dtype.descr).encode())
+    for enum in (*ENUMS.values(), schemas.Trait, schemas.Tech, schemas.Name):
+        digest.update(repr([member.value for member in enum]).encode())
+    return digest.digest()
+
+
+class _Strings:
+    """String table under construction, storing each distinct string once."""
+
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return int(NO_STRING)
+        return self.index.setdefault(value, len(self.index))
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        encoded = [value.encode() for value in self.index]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        offsets[1:] = np.cumsum([len(value) for value in encoded])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class _Tiles:
+    """Tile records under construction, sharing one hyperlane table."""
+
+    def __init__(self, strings: _Strings, lanes: list[int], ends: list[tuple[int, int, int]]) -> None:
+        self.records: list[tuple] = []
+        self._strings = strings
+        self._lanes = lanes
+        self._ends = ends
+
+    def add(self, tile: schemas.Tile, key: Optional[str] = None) -> None:
+        system = tile.system
+        flags = (HAS_SYSTEM if system is not None else 0) | (HAS_POSITION if tile.position is not None else 0)
+        if system is not None and system.legendary:
+            flags |= LEGENDARY
+        position = (0, 0, 0) if tile.position is None else (tile.position.q, tile.position.r, tile.position.s)
+        first_lane = len(self._lanes) - 1
+        for hyperlane in tile.hyperlanes:
+            self._ends.extend((end.q, end.r, end.s) for end in hyperlane)
+            self._lanes.append(len(self._ends))
+        self.records.append(
+            (
+                self._strings.add(key),
+                _code(tile.type, schemas.Type),
+                tile.number,
+                _code(tile.letter, schemas.Letter),
+                _code(tile.release, schemas.Release),
+                _code(tile.faction, schemas.Name),
+                _code(tile.back, schemas.Color),
+                flags,
+                0 if system is None else system.resources,
+                0 if system is None else system.influence,
+                0 if system is None else system.planets,
+                _code(None if system is None else system.anomaly, schemas.Anomaly),
+                _code(None if system is None else system.wormhole, schemas.Wormhole),
+                0 if system is None else _counts(system.traits, schemas.Trait),
+                0 if system is None else _counts(system.techs, schemas.Tech),
+                position,
+                first_lane,
+                len(tile.hyperlanes),
+            )
+        )
+
+    def array(self) -> np.ndarray:
+        return np.array(self.records, dtype=TILE)
+
+
+def write(
+    path: str,
+    tiles: Iterable[schemas.TileInDB],
+    maps: Iterable[schemas.MapInDB],
+    factions: Iterable[schemas.Faction],
+) -> None:
+    """Compile the tile, map and faction catalogs to a snapshot file.
+
+    Raises:
+        ValueError: If a value does not fit its fixed-width field.
+    """
+    strings = _Strings()
+    lanes: list[int] = [0]
+    ends: list[tuple[int, int, int]] = []
+    tile_records = _Tiles(strings, lanes, ends)
+    layout_records = _Tiles(strings, lanes, ends)
+    for tile in tiles:
+        tile_records.add(tile, tile.key)
+
+    map_records = []
+    for map_ in maps:
+        start = len(layout_records.records)
+        for tile in map_.layout:
+            layout_records.add(schemas.Tile.parse_obj(tile))
+        map_records.append(
+            (
+                strings.add(map_.key),
+                int(map_.players),
+                strings.add(map_.style),
+                strings.add(map_.description),
+                strings.add(map_.source),
+                start,
+                len(map_.layout),
+            )
+        )
+    faction_records = [
+        (_code(faction.name, schemas.Name), _code(faction.release, schemas.Release)) for faction in factions
+    ]
+
+    try:
+        sections = {
+            "tiles": tile_records.array(),
+            "layout_tiles": layout_records.array(),
+            "maps": np.array(map_records, dtype=MAP),
+            "factions": np.array(faction_records, dtype=FACTION),
+            "lanes": np.array(lanes, dtype=np.uint32),
+            "lane_ends": np.array(ends, dtype=np.int8).reshape(-1, 3),
+        }
+    except OverflowError as error:
+        raise ValueError(f"catalog value does not fit the snapshot format: {error}") from error
+    sections["strings"], sections["string_offsets"] = strings.arrays()
+
+    directory_size = _HEADER.size + _SECTION.size * len(sections)
+    offset = _align(directory_size)
+    entries = []
+    for name, array in sections.items():
+        entries.append((name, offset, array.nbytes))
+        offset = _align(offset + array.nbytes)
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, VERSION, fingerprint(), len(sections)))
+        for name, offset, size in entries:
+            file.write(_SECTION.pack(name.encode(), offset, size))
+        for (name, offset, _), array in zip(entries, sections.values()):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(np.ascontiguousarray(array).tobytes())
+
+
+class Snapshot:
+    """Catalog snapshot mapped into memory.
+
+    The records are read-only views of the mapped file, so loading does not parse anything, and forked
+    worker processes share the pages. Models are only created when the catalogs are requested.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Map a snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot, or was built with different record layouts or enums.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, digest, count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path!r} is not a version {VERSION} catalog snapshot")
+        if digest != fingerprint():
+            raise ValueError(f"{path!r} was built with a different schema, rebuild the snapshot")
+
+        dtypes = {"tiles": TILE, "layout_tiles": TILE, "maps": MAP, "factions": FACTION, "lane_ends": np.int8}
+        self.sections: dict[str, np.ndarray] = {}
+        for index in range(count):
+            name, offset, size = _SECTION.unpack_from(self._buffer, _HEADER.size + index * _SECTION.size)
+            name = name.rstrip(b"\0").decode()
+            dtype = dtypes.get(name, np.uint8 if name == "strings" else np.uint32)
+            self.sections[name] = np.frombuffer(
+                self._buffer, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=offset
+            )
+        self.sections["lane_ends"] = self.sections["lane_ends"].reshape(-1, 3)
+        self._strings = bytes(self.sections["strings"])
+        self._string_offsets = self.sections["string_offsets"].tolist()
+
+    @property
+    def tiles(self) -> np.ndarray:
+        return self.sections["tiles"]
+
+    @property
+    def maps(self) -> np.ndarray:
+        return self.sections["maps"]
+
+    @property
+    def factions(self) -> np.ndarray:
+        return self.sections["factions"]
+
+    def string(self, index: int) -> Optional[str]:
+        if index == NO_STRING:
+            return None
+        return self._strings[self._string_offsets[index] : self._string_offsets[index + 1]].decode()
+
+    def catalog(self) -> board.Catalog:
+        """Create the tile catalog, with the tiles in the order they were written."""
+        return SnapshotCatalog(self.path, self._tiles(self.tiles, schemas.TileInDB))
+
+    def map_list(self) -> list[schemas.MapInDB]:
+        layout_tiles = self._tiles(self.sections["layout_tiles"], schemas.Tile)
+        maps = []
+        for values in self.maps.tolist():
+            record = dict(zip(MAP.names, values))
+            start = record["layout"]
+            maps.append(
+                schemas.MapInDB.construct(
+                    key=self.string(record["key"]),
+                    players=schemas.Players(record["players"]),
+                    style=self.string(record["style"]),
+                    description=self.string(record["description"]),
+                    source=self.string(record["source"]),
+                    layout=layout_tiles[start : start + record["layout_count"]],
+                )
+            )
+        return maps
+
+    def faction_list(self) -> list[schemas.Faction]:
+        names, releases = _members(schemas.Name), _members(schemas.Release)
+        return [
+            schemas.Faction.construct(name=names[name], release=releases[release])
+            for name, release in self.factions.tolist()
+        ]
+
+    def _tiles(self, records: np.ndarray, model: type[schemas.Tile]) -> list[Any]:
+        """Create tile models from records, without validation since they were validated when written."""
+        members = {field: _members(enum) for field, enum in ENUMS.items()}
+        lanes = self.sections["lanes"].tolist()
+        ends = [hex._cube(*end) for end in self.sections["lane_ends"].tolist()]
+        tiles = []
+        for values in records.tolist():
+            record = dict(zip(TILE.names, values))
+            flags = record["flags"]
+            system = None
+            if flags & HAS_SYSTEM:
+                system = schemas.System.construct(
+                    resources=record["resources"],
+                    influence=record["influence"],
+                    planets=record["planets"],
+                    traits=_expand(record["traits"], schemas.Trait),
+                    techs=_expand(record["techs"], schemas.Tech),
+                    anomaly=members["anomaly"][record["anomaly"]],
+                    wormhole=members["wormhole"][record["wormhole"]],
+                    legendary=bool(flags & LEGENDARY),
+                )
+            first = record["lanes"]
+            hyperlanes = [ends[lanes[lane] : lanes[lane + 1]] for lane in range(first, first + record["lane_count"])]
+            fields = dict(
+                type=members["type"][record["type"]],
+                number=record["number"],
+                letter=members["letter"][record["letter"]],
+                release=members["release"][record["release"]],
+                faction=members["faction"][record["faction"]],
+                back=members["back"][record["back"]],
+                system=system,
+                hyperlanes=hyperlanes,
+                position=hex._cube(*record["position"]) if flags & HAS_POSITION else None,
+            )
+            if model is schemas.TileInDB:
+                fields["key"] = self.string(record["key"])
+            tiles.append(model.construct(**fields))
+        return tiles
+
+
+class SnapshotCatalog(board.Catalog):
+    """Tile catalog loaded from a snapshot, which is pickled as the path of the snapshot.
+
+    Worker processes which are not forked map the snapshot themselves instead of receiving every tile.
+    """
+
+    def __init__(self, path: str, tiles: Iterable[schemas.Tile]) -> None:
+        super().__init__(tiles)
+        self.path = path
+
+    def __reduce__(self) -> tuple:
+        return _load_catalog, (self.path,)
+
+
+def _load_catalog(path: str) -> board.Catalog:
+    return Snapshot(path).catalog()
+
+
+def _code(value: Optional[Enum], enum: type[Enum]) -> int:
+    return 0 if value is None else list(enum).index(enum(value)) + 1
+
+
+def _members(enum: type[Enum]) -> list[Optional[Enum]]:
+    return [None, *enum]
+
+
+def _counts(values: Sequence[Enum], enum: type[Enum]) -> int:
+    """Pack the count of each member of an enum in a sequence, 4 bits per member."""
+    packed = 0
+    for shift, member in enumerate(enum):
+        count = sum(value == member for value in values)
+        if count > 15:
+            raise ValueError(f"a system can have at most 15 of {member.value!r}, not {count}")
+        packed |= count << (4 * shift)
+    return packed
+
+
+def _expand(packed: int, enum: type[Enum]) -> list[Enum]:
+    return [member for shift, member in enumerate(enum) for _ in range((packed >> (4 * shift)) & 15)]
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
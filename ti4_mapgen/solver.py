@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import random
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from ti4_mapgen import hex, index, schemas
+
+# Tile id of a slot without a tile, the same as 'board.EMPTY'.
+EMPTY = -1
+
+# Default number of tile placements the search tries before it gives up.
+DEFAULT_LIMIT = 100_000
+
+
+@dataclasses.dataclass(frozen=True)
+class Apart:
+    """Constraint which keeps the tiles of a selection out of each other's neighborhood.
+
+    The selection holds criteria of 'index.TileIndex.bitmap' on the fields of the system of a tile, e.g.
+    '{"wormhole": schemas.Wormhole.ALPHA}' or '{"anomaly": tuple(schemas.Anomaly)}'. The neighborhood of a
+    slot is every slot within 'distance' steps in 'directions', or from which the slot is within
+    'distance' steps, on the grid. Hyperlanes do not connect slots.
+    """
+
+    selection: Mapping[str, Any]
+    distance: int = 1
+    directions: tuple[hex.Adjacent, ...] = tuple(hex.Adjacent)
+
+
+# Constraints of tournament play: no adjacent anomalies, no adjacent wormholes of the same type and
+# legendary planets at least three moves apart.
+TOURNAMENT: tuple[Apart, ...] = (
+    Apart({"anomaly": tuple(schemas.Anomaly)}),
+    *(Apart({"wormhole": wormhole}) for wormhole in schemas.Wormhole),
+    Apart({"legendary": True}, distance=2),
+)
+
+
+class Solver:
+    """Placement of tiles on the system slots of a template which satisfies a set of constraints.
+
+    The domain of every slot is a bitmap of the tile ids it can still hold, like the postings of
+    'index.TileIndex'. The search places a tile on the slot with the smallest domain, then removes the
+    tile from every other domain and the tiles of each selection it belongs to from the domains of the
+    slots in its neighborhood. A placement which empties a domain is undone at once.
+
+    The tiles for the board are drawn at random from the stack first, like 'board.Board.setup' draws
+    them, and the search tries them before the other tiles. Drawn tiles which belong to a selection are
+    tried first, since they are the hardest to place.
+    """
+
+    def __init__(
+        self,
+        template: Sequence[schemas.Tile],
+        tiles: index.TileIndex,
+        stack: Union[Sequence[int], np.ndarray],
+        constraints: Sequence[Apart],
+    ) -> None:
+        """Create a solver.
+
+        Args:
+            template: Map layout with positioned tiles, the slots are its system tiles in layout order.
+            tiles: Index of the tile catalog the ids refer to.
+            stack: Ids of the tiles to place, each tile is placed at most once.
+            constraints: Constraints every placement must satisfy.
+
+        Raises:
+            ValueError: If a template tile does not have a position.
+        """
+        positions = []
+        for tile in template:
+            if tile.position is None:
+                raise ValueError(f"tile {tile.number} in template must have a position")
+            if tile.type is schemas.Type.SYSTEM:
+                positions.append(tile.position)
+        self.slots = len(positions)
+        self.stack = 0
+        for id in np.asarray(stack).tolist():
+            self.stack |= 1 << id
+
+        # The selection bitmap and the neighboring slots of each constraint, by slot.
+        self.rules: list[list[tuple[int, tuple[int, ...]]]] = [[] for _ in positions]
+        # Tiles of the stack which belong to any selection.
+        self.constrained = 0
+        neighborhoods: dict[tuple[int, tuple[hex.Adjacent, ...]], tuple[tuple[int, ...], ...]] = {}
+        for constraint in constraints:
+            selection = tiles.bitmap(**constraint.selection) & self.stack
+            if not selection:
+                continue
+            key = (constraint.distance, constraint.directions)
+            if key not in neighborhoods:
+                neighborhoods[key] = _neighborhoods(tuple(positions), constraint.distance, constraint.directions)
+            for slot, neighborhood in enumerate(neighborhoods[key]):
+                if neighborhood:
+                    self.rules[slot].append((selection, neighborhood))
+            self.constrained |= selection
+
+    def solve(self, rng: Any = None, *, limit: int = DEFAULT_LIMIT) -> Optional[np.ndarray]:
+        """Find a placement which satisfies every constraint.
+
+        Tiles are drawn at random, so every call finds a different placement.
+
+        Args:
+            rng (optional): Random number generator, defaults to the 'random' module.
+            limit (optional): Number of tile placements to try before giving up.
+
+        Returns:
+            The tile id on each slot, or 'None' if there is no placement or none was found within 'limit'.
+        """
+        rng = random if rng is None else rng
+        if _count(self.stack) < self.slots:
+            return None
+        ids = _ids(self.stack)
+        rng.shuffle(ids)
+        # Order in which tiles are tried: drawn before spare, constrained before free, then at random.
+        order = {id: (rank >= self.slots, not (1 << id) & self.constrained, rank) for rank, id in enumerate(ids)}
+        placement = [EMPTY] * self.slots
+        budget = [limit]
+        if not self._search([self.stack] * self.slots, placement, order, budget):
+            return None
+        return np.array(placement, dtype=np.int16)
+
+    def allowed(self, tiles: Union[Sequence[int], np.ndarray], slot: int) -> bool:
+        """Check if the tile on a slot satisfies every constraint, given the tiles on the other slots."""
+        id = int(tiles[slot])
+        if id == EMPTY:
+            return True
+        bit = 1 << id
+        for selection, neighborhood in self.rules[slot]:
+            if bit & selection:
+                for other in neighborhood:
+                    neighbor = int(tiles[other])
+                    if neighbor != EMPTY and (1 << neighbor) & selection:
+                        return False
+        return True
+
+    def check(self, tiles: Union[Sequence[int], np.ndarray]) -> bool:
+        """Check if a placement, the tile id on each slot, satisfies every constraint."""
+        return all(self.allowed(tiles, slot) for slot in range(self.slots))
+
+    def _search(self, domains: list[int], placement: list[int], order: Mapping[int, tuple], budget: list[int]) -> bool:
+        open_ = [slot for slot in range(self.slots) if placement[slot] == EMPTY]
+        if not open_:
+            return True
+        # The most constrained slot, i.e. the one with the fewest tiles left.
+        slot = min(open_, key=lambda slot: _count(domains[slot]))
+        for id in sorted(_ids(domains[slot]), key=order.__getitem__):
+            if budget[0] <= 0:
+                return False
+            budget[0] -= 1
+            pruned = self._forward(domains, open_, slot, id)
+            if pruned is None:
+                continue
+            placement[slot] = id
+            if self._search(pruned, placement, order, budget):
+                return True
+            placement[slot] = EMPTY
+        return False
+
+    def _forward(self, domains: list[int], open_: list[int], slot: int, id: int) -> Optional[list[int]]:
+        """Prune the domains of the open slots after placing a tile, or 'None' if a domain is emptied."""
+        bit = 1 << id
+        pruned = list(domains)
+        pruned[slot] = bit
+        for other in open_:
+            if other != slot:
+                pruned[other] &= ~bit
+        for selection, neighborhood in self.rules[slot]:
+            if bit & selection:
+                for other in neighborhood:
+                    pruned[other] &= ~selection
+        remaining = 0
+        for other in open_:
+            if other == slot:
+                continue
+            if not pruned[other]:
+                return None
+            remaining |= pruned[other]
+        # Every open slot needs a tile of its own.
+        if _count(remaining) < len(open_) - 1:
+            return None
+        return pruned
+
+
+@functools.lru_cache(maxsize=64)
+def _neighborhoods(
+    positions: tuple[hex.Cube, ...], distance: int, directions: tuple[hex.Adjacent, ...]
+) -> tuple[tuple[int, ...], ...]:
+    """Find the neighborhood of every slot, the other slots within distance of it along the directions.
+
+    A slot is also in the neighborhood of every slot within distance of it, so neighborhoods are symmetric.
+    The neighborhoods are cached for each template.
+    """
+    slots = {position: slot for slot, position in enumerate(positions)}
+    neighborhoods: list[set[int]] = [set() for _ in positions]
+    for slot, position in enumerate(positions):
+        reached = {position}
+        frontier = [position]
+        for _ in range(distance):
+            frontier = [hex.adjacent(hex_, direction=direction) for hex_ in frontier for direction in directions]
+            frontier = [hex_ for hex_ in frontier if hex_ not in reached]
+            reached.update(frontier)
+        for hex_ in reached:
+            other = slots.get(hex_)
+            if other is not None and other != slot:
+                neighborhoods[slot].add(other)
+                neighborhoods[other].add(slot)
+    return tuple(tuple(sorted(neighborhood)) for neighborhood in neighborhoods)
+
+
+def _count(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+
+def _ids(bitmap: int) -> list[int]:
+    ids = []
+    while bitmap:
+        low = bitmap & -bitmap
+        ids.append(low.bit_length() - 1)
+        bitmap ^= low
+    return ids
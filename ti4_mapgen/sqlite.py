@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import secrets
+import sqlite3
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Any, NamedTuple, Optional, Union
+
+from pydantic.json import pydantic_encoder
+
+# Record fields stored in indexed columns, by table. Other fields are queried from the JSON document.
+INDEXES: Mapping[str, tuple[str, ...]] = {
+    "tile": ("type", "number", "letter", "release", "back"),
+    "map": ("players", "style"),
+    "faction": ("name", "release"),
+}
+
+# SQL comparison of each Deta query operator, e.g. '{"number?lt": 19}'.
+OPERATORS: Mapping[str, str] = {"ne": "!=", "lt": "<", "gt": ">", "lte": "<=", "gte": ">="}
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+Query = Union[Mapping[str, Any], Sequence[Mapping[str, Any]], None]
+
+
+class FetchResponse(NamedTuple):
+    """Page of records, shaped like the fetch response of a Deta base."""
+
+    count: int
+    last: Optional[str]
+    items: list[dict]
+
+
+class SQLite:
+    """Embedded storage engine with the interface of 'deta.Deta', storing every base in one SQLite file.
+
+    The connection is shared by every base and used from worker threads one statement at a time.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+
+    def AsyncBase(self, name: str) -> AsyncBase:
+        return AsyncBase(self, name)
+
+    def execute(self, statements: Sequence[tuple[str, Sequence[Any]]]) -> list[list[tuple]]:
+        """Execute statements in one transaction and return the rows of each."""
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN")
+            try:
+                rows = [cursor.execute(sql, parameters).fetchall() for sql, parameters in statements]
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return rows
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class AsyncBase:
+    """Table of JSON records with the async interface of a Deta base.
+
+    Records are ordered by key. Queries are Deta queries: a mapping of fields to values, which must all
+    match, or a list of such mappings, of which any must match. Nested fields are joined by dots, and
+    fields may end with a comparison operator from 'OPERATORS' or '?pfx' for a prefix match.
+    """
+
+    def __init__(self, engine: SQLite, name: str) -> None:
+        if not _FIELD.match(name) or "." in name:
+            raise ValueError(f"base name {name!r} must be an identifier")
+        self.name = name
+        self._engine = engine
+        self._columns = INDEXES.get(name, ())
+        self._created = False
+
+    async def fetch(self, query: Query = None, *, limit: int = 1000, last: Optional[str] = None) -> FetchResponse:
+        """Fetch a page of at most 'limit' records matching a query, starting after the key 'last'."""
+        where, parameters = self._where(query)
+        if last is not None:
+            where = f"({where}) AND key > ?"
+            parameters.append(last)
+        sql = f'SELECT key, data FROM "{self.name}" WHERE {where} ORDER BY key LIMIT ?'
+        (rows,) = await self._execute((sql, [*parameters, limit + 1]))
+        items = [json.loads(data) for _, data in rows[:limit]]
+        return FetchResponse(len(items), rows[limit - 1][0] if len(rows) > limit else None, items)
+
+    async def get(self, key: str) -> Optional[dict]:
+        (rows,) = await self._execute((f'SELECT data FROM "{self.name}" WHERE key = ?', [key]))
+        return json.loads(rows[0][0]) if rows else None
+
+    async def put(self, data: Mapping[str, Any], key: Optional[str] = None) -> dict:
+        """Store a record, replacing the record with the same key. A key is generated if there is none."""
+        (item,) = await self.put_many([data if key is None else {**data, "key": key}])
+        return item
+
+    async def put_many(self, items: Sequence[Mapping[str, Any]]) -> list[dict]:
+        stored = [{**item, "key": item.get("key") or secrets.token_hex(6)} for item in items]
+        sql = f'INSERT OR REPLACE INTO "{self.name}" (key, data) VALUES (?, ?)'
+        await self._execute(*((sql, [item["key"], _dumps(item)]) for item in stored))
+        return stored
+
+    async def insert(self, data: Mapping[str, Any], key: Optional[str] = None) -> dict:
+        """Store a record, raising 'KeyError' if a record with the same key exists."""
+        item = {**data, "key": (data.get("key") if key is None else key) or secrets.token_hex(6)}
+        sql = f'INSERT INTO "{self.name}" (key, data) VALUES (?, ?)'
+        try:
+            await self._execute((sql, [item["key"], _dumps(item)]))
+        except sqlite3.IntegrityError as error:
+            raise KeyError(f"record with key {item['key']!r} already exists") from error
+        return item
+
+    async def delete(self, key: str) -> None:
+        await self._execute((f'DELETE FROM "{self.name}" WHERE key = ?', [key]))
+
+    async def close(self) -> None:
+        """Close the base. The connection belongs to the engine, so there is nothing to release."""
+
+    async def _execute(self, *statements: tuple[str, Sequence[Any]]) -> list[list[tuple]]:
+        # The table is created by the first statement of each base, in the same transaction.
+        schema = [] if self._created else self._schema()
+        rows = await asyncio.to_thread(self._engine.execute, [*schema, *statements])
+        self._created = True
+        return rows[len(schema) :]
+
+    def _schema(self) -> list[tuple[str, Sequence[Any]]]:
+        """Statements creating the table and its indexed columns, which are generated from the record."""
+        columns = "".join(
+            f", \"{column}\" GENERATED ALWAYS AS (json_extract(data, '$.{column}')) VIRTUAL" for column in self._columns
+        )
+        statements = [
+            (f'CREATE TABLE IF NOT EXISTS "{self.name}" (key TEXT PRIMARY KEY, data TEXT NOT NULL{columns})', ())
+        ]
+        statements.extend(
+            (f'CREATE INDEX IF NOT EXISTS "{self.name}_{column}" ON "{self.name}" ("{column}")', ())
+            for column in self._columns
+        )
+        return statements
+
+    def _where(self, query: Query) -> tuple[str, list[Any]]:
+        """Translate a Deta query to an SQL condition and its parameters."""
+        if query is None:
+            return "1", []
+        if isinstance(query, Mapping):
+            query = [query]
+        clauses, parameters = [], []
+        for conditions in query:
+            terms = []
+            for field, value in conditions.items():
+                field, _, operator = field.partition("?")
+                if not _FIELD.match(field):
+                    raise ValueError(f"field {field!r} in query must be a dotted identifier")
+                column = f'"{field}"' if field in self._columns else f"json_extract(data, '$.{field}')"
+                if operator == "pfx":
+                    terms.append(f"substr({column}, 1, ?) = ?")
+                    parameters.extend([len(value), value])
+                elif operator in OPERATORS:
+                    terms.append(f"{column} {OPERATORS[operator]} ?")
+                    parameters.append(_sql_value(value))
+                elif operator:
+                    raise ValueError(f"query operator {operator!r} is not supported")
+                elif value is None:
+                    terms.append(f"{column} IS NULL")
+                else:
+                    terms.append(f"{column} = ?")
+                    parameters.append(_sql_value(value))
+            clauses.append(" AND ".join(terms) or "1")
+        return " OR ".join(f"({clause})" for clause in clauses) or "0", parameters
+
+
+def _dumps(item: Mapping[str, Any]) -> str:
+    return json.dumps(item, default=pydantic_encoder)
+
+
+def _sql_value(value: Any) -> Any:
+    """Convert a query value to the value 'json_extract' returns for it."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if isinstance(value, str):
+        # String enums compare by their value.
+        return str.__str__(value)
+    return value
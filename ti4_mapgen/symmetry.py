@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+
+from ti4_mapgen import board, hex, schemas
+
+ORIGIN = hex.Cube(0, 0, 0)
+
+# The symmetry group of a hexagonal board, as the angle of a rotation around the origin and whether the
+# rotation is preceded by a reflection across the north-south axis. The first symmetry is the identity.
+SYMMETRIES: tuple[tuple[int, bool], ...] = tuple(
+    (angle, reflected) for reflected in (False, True) for angle in range(0, 360, 60)
+)
+
+# Letter of a tile in its stable code, see '_codes'.
+_LETTERS = {None: 0, schemas.Letter.A: 1, schemas.Letter.B: 2}
+
+
+class Symmetries(NamedTuple):
+    """Symmetries of a template, as permutations of its layout indexes, and a digest of the template."""
+
+    permutations: np.ndarray
+    digest: bytes
+
+
+def transform(hex_: hex.Cube, *, angle: int, reflected: bool) -> hex.Cube:
+    """Apply a symmetry of 'SYMMETRIES' to a cube position or vector around the origin."""
+    if reflected:
+        hex_ = hex.reflect(hex_, ORIGIN)
+    return hex.rotate(hex_, ORIGIN, angle=angle)
+
+
+@functools.lru_cache(maxsize=None)
+def spiral_permutations(radius: int = hex.LOOKUP_RADIUS) -> np.ndarray:
+    """Tabulate every symmetry as a permutation of the indexes of a spiral around the origin.
+
+    The table is built on first use and cached for each radius.
+
+    Returns:
+        Read-only (symmetries, positions) array, where row k holds the spiral index every spiral index
+        is moved to by symmetry k of 'SYMMETRIES'.
+    """
+    table = hex.spiral_table(radius)
+    permutations = np.empty((len(SYMMETRIES), len(table.positions)), dtype=np.intp)
+    for row, (angle, reflected) in enumerate(SYMMETRIES):
+        for index, position in enumerate(table.positions):
+            permutations[row, index] = table.indices[transform(position, angle=angle, reflected=reflected)]
+    permutations.flags.writeable = False
+    return permutations
+
+
+def symmetries(template: Sequence[schemas.Tile]) -> Symmetries:
+    """Find the symmetries of a template around the origin, cached for each distinct template.
+
+    Only symmetries which map the template onto itself are kept. Every tile must be moved to a position
+    which holds a tile of the same type, number and letter, with the hyperlanes of the moved tile.
+    """
+    return _symmetries(tuple(_key(tile) for tile in template))
+
+
+def canonical(board_: board.Board) -> np.ndarray:
+    """Find the canonical form of a board's layout, the same for every board equivalent to it.
+
+    Tiles are replaced by stable codes which do not depend on the order of the catalog. Every symmetry of
+    the template is applied to the coded layout, and the lexicographically smallest result is the
+    canonical form.
+    """
+    return _canonical(board_, symmetries(board_.template))
+
+
+def signature(board_: board.Board) -> str:
+    """Find the signature of a board, equal for boards which are rotations or reflections of each other.
+
+    The signature is a digest of the template and the canonical form of the layout, so boards of
+    different templates never share a signature.
+    """
+    symmetries_ = symmetries(board_.template)
+    digest = hashlib.blake2b(symmetries_.digest, digest_size=16)
+    digest.update(_canonical(board_, symmetries_).tobytes())
+    return digest.hexdigest()
+
+
+def digest(board_: board.Board) -> str:
+    """Find a digest of the exact layout of a board, which unlike the signature differs between rotations.
+
+    Like the signature it does not depend on the order of the catalog.
+    """
+    digest_ = hashlib.blake2b(symmetries(board_.template).digest, digest_size=16)
+    digest_.update(_codes(board_.catalog)[board_.tiles].tobytes())
+    return digest_.hexdigest()
+
+
+def _canonical(board_: board.Board, symmetries_: Symmetries) -> np.ndarray:
+    # The images are gathered through each permutation instead of scattered, which yields the same set
+    # of layouts, since the inverse of every symmetry of a template is a symmetry of it as well.
+    images = _codes(board_.catalog)[board_.tiles][symmetries_.permutations]
+    # 'lexsort' sorts by the last key first, so the columns are passed in reverse.
+    return images[np.lexsort(images.T[::-1])[0]]
+
+
+def _key(tile: schemas.Tile) -> tuple:
+    """Describe a template tile by the fields a symmetry must preserve, as a hashable tuple."""
+    if tile.position is None:
+        raise ValueError(f"tile {tile.number} in template must have a position")
+    lanes = frozenset(frozenset(hyperlane) for hyperlane in tile.hyperlanes)
+    return tile.position, tile.type, tile.number, tile.letter, lanes
+
+
+@functools.lru_cache(maxsize=64)
+def _symmetries(keys: tuple[tuple, ...]) -> Symmetries:
+    positions = [position for position, *_ in keys]
+    radius = max((hex.length(position) for position in positions), default=0)
+    indices = hex.spiral_table(radius).indices
+    # Layout index of every spiral index, or -1 for spiral indexes without a tile.
+    layout = np.full(len(indices), -1, dtype=np.intp)
+    layout[[indices[position] for position in positions]] = np.arange(len(positions))
+
+    rows = []
+    for row, (angle, reflected) in zip(spiral_permutations(radius), SYMMETRIES):
+        permutation = layout[row[[indices[position] for position in positions]]]
+        if np.any(permutation < 0):
+            continue
+        moved = [
+            (
+                transform(position, angle=angle, reflected=reflected),
+                type,
+                number,
+                letter,
+                frozenset(
+                    frozenset(transform(end, angle=angle, reflected=reflected) for end in lane) for lane in lanes
+                ),
+            )
+            for position, type, number, letter, lanes in keys
+        ]
+        if all(moved[index] == keys[target] for index, target in enumerate(permutation.tolist())):
+            rows.append(permutation)
+
+    permutations = np.array(rows, dtype=np.intp)
+    permutations.flags.writeable = False
+    digest = hashlib.blake2b(digest_size=16)
+    for position, type, number, letter, lanes in keys:
+        ends = sorted(sorted((end.q, end.r, end.s) for end in lane) for lane in lanes)
+        digest.update(repr((indices[position], type.value, number, letter and letter.value, ends)).encode())
+    return Symmetries(permutations, digest.digest())
+
+
+@functools.lru_cache(maxsize=8)
+def _codes(catalog: board.Catalog) -> np.ndarray:
+    """Tabulate a stable code of every tile in a catalog by tile id, from its number and letter.
+
+    The table ends with the code -1, so the id 'board.EMPTY' selects the code of a template tile.
+    """
+    codes = np.full(len(catalog) + 1, -1, dtype=np.int32)
+    for id, tile in enumerate(catalog.tiles):
+        codes[id] = tile.number * len(_LETTERS) + _LETTERS[tile.letter]
+    codes.flags.writeable = False
+    return codes
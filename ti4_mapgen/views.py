@@ -1,40 +1,640 @@
-from typing import Optional
+import asyncio
+import functools
+import secrets
+from collections.abc import AsyncIterator, Callable, Hashable, Iterable
+from typing import TYPE_CHECKING, Any, Optional, TypeVar, Union
 
-from deta import Deta
-from fastapi import APIRouter, Form, Query
+from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from . import config
+from . import cache, catalog, config
 from . import database as db
-from . import schemas
+from . import jobs, metrics, responses, schemas
 
-SETTINGS = config.get_settings()
-PROJECT_KEY = SETTINGS.deta_project_key
+# The modules which build boards import numpy, so they are imported by the routes which use them, and
+# importing the app stays fast.
+if TYPE_CHECKING:
+    from . import board, generator, snapshot
 
-engine = Deta(PROJECT_KEY)
 router = APIRouter()
 
+# Content of the image routes for the OpenAPI schema.
+IMAGE_RESPONSES: dict[Union[int, str], dict[str, Any]] = {
+    200: {"content": {media_type: {} for media_type in schemas.MEDIA_TYPES.values()}}
+}
+
+T = TypeVar("T")
+
+# Limits of the budget of a generation which the request waits for, background jobs have the limits of
+# the settings.
+MAX_EVALUATIONS = 5_000_000
+MAX_TIME_LIMIT = 10.0
+
+
+async def load_maps(database: db.Database) -> list[schemas.MapInDB]:
+    results = [result async for result in database.base("map").iterate()]
+    with metrics.stage("validate"):
+        return [schemas.MapInDB(**result) for result in results]
+
+
+async def load_factions(database: db.Database) -> list[schemas.Faction]:
+    results = [result async for result in database.base("faction").iterate()]
+    with metrics.stage("validate"):
+        return [schemas.Faction(**result) for result in results]
+
+
+async def load_tiles(database: db.Database) -> "board.Catalog":
+    from . import board
+
+    results = [result async for result in database.base("tile").iterate()]
+    with metrics.stage("validate"):
+        return board.Catalog([schemas.TileInDB(**result) for result in results])
+
+
+async def load_from_snapshot(path: str, load: Callable[["snapshot.Snapshot"], T]) -> T:
+    from . import snapshot
+
+    return await asyncio.to_thread(lambda: load(snapshot.Snapshot(path)))
+
+
+class Catalogs:
+    """In-process caches of the map, faction and tile tables, loaded from the database or a snapshot."""
+
+    def __init__(self, database: db.Database, ttl: float, *, snapshot_path: Optional[str] = None) -> None:
+        if snapshot_path is None:
+            loaders = [functools.partial(load, database) for load in (load_maps, load_factions, load_tiles)]
+        else:
+            from . import snapshot
+
+            loaders = [
+                functools.partial(load_from_snapshot, snapshot_path, load)
+                for load in (snapshot.Snapshot.map_list, snapshot.Snapshot.faction_list, snapshot.Snapshot.catalog)
+            ]
+        self.maps = catalog.CatalogCache(loaders[0], ttl)
+        self.factions = catalog.CatalogCache(loaders[1], ttl)
+        self.tiles = catalog.CatalogCache(loaders[2], ttl)
+        # Encoded catalog responses, encoded again when their catalog is reloaded.
+        self.encoded = responses.EncodedCache(maxsize=256)
+
+    async def refresh(self) -> None:
+        await asyncio.gather(self.maps.refresh(), self.factions.refresh(), self.tiles.refresh())
+
+
+def get_settings(request: Request) -> config.Settings:
+    return request.app.state.settings
+
+
+def get_database(request: Request) -> db.Database:
+    return request.app.state.database
+
+
+def get_catalogs(request: Request) -> Catalogs:
+    return request.app.state.catalogs
+
+
+def get_generated_maps(request: Request) -> cache.TTLCache[tuple, responses.Encoded]:
+    """Find the encoded generated maps by (style, players, seed, options)."""
+    return request.app.state.generated_maps
+
+
+def get_generated_store(request: Request) -> Optional[db.UniqueBase]:
+    """Find the table distinct generated maps are stored in, 'None' if they are not stored."""
+    return request.app.state.generated_store
+
+
+def get_rendered(request: Request) -> cache.TTLCache[Hashable, responses.Encoded]:
+    """Find the rendered board images by (layout digest, format), or (style, players, seed, options, format)."""
+    return request.app.state.rendered
+
+
+async def render_board(
+    rendered: cache.TTLCache[Hashable, responses.Encoded], board_: "board.Board", format: schemas.ImageFormat
+) -> responses.Encoded:
+    """Render a board, or find it in the cache if a board with the same layout was rendered before."""
+    from . import render, symmetry
+
+    key = (symmetry.digest(board_), format)
+    if (encoded := rendered.get(key)) is None:
+        try:
+            encoded = await run_in_threadpool(render.encode, board_, format)
+        except RuntimeError as error:
+            raise HTTPException(status_code=501, detail=str(error)) from None
+        rendered.put(key, encoded)
+    return encoded
+
+
+def get_batch_pool(request: Request) -> "generator.BatchPool":
+    """Find the worker processes shared by every batch generation."""
+    return request.app.state.batch_pool
+
+
+def get_jobs(request: Request) -> jobs.JobQueue:
+    return request.app.state.jobs
+
+
+def to_job(job: jobs.Job) -> schemas.Job:
+    return schemas.Job(
+        id=job.id,
+        status=job.status,
+        score=job.score,
+        evaluations=job.evaluations,
+        result=job.result,
+        error=job.error,
+    )
+
+
+async def store_generated(store: Optional[db.UniqueBase], generated_map: schemas.MapGenerated) -> None:
+    if store is not None and generated_map.signature not in store:
+        await store.put(jsonable_encoder(generated_map), generated_map.signature)
+
+
+async def json_array(chunks: AsyncIterator[Iterable[str]]) -> AsyncIterator[str]:
+    """Join chunks of JSON values to a JSON array, sending each chunk as soon as it is available."""
+    yield "["
+    separator = ""
+    async for chunk in chunks:
+        values = ",".join(chunk)
+        if values:
+            yield separator + values
+            separator = ","
+    yield "]"
+
 
 @router.get("/maps/", response_model=list[schemas.Map])
-async def read_maps() -> list[schemas.MapInDB]:
-    async with db.AsyncBase(engine, "map") as base:
-        results = await base.fetch()
-    db_maps = [schemas.MapInDB(**result) for result in results.items]
-    return db_maps
+async def read_maps(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=db.PAGE_SIZE),
+    cursor: Optional[str] = None,
+    catalogs: Catalogs = Depends(get_catalogs),
+    database: db.Database = Depends(get_database),
+) -> Response:
+    """List the stored maps.
+
+    Without a limit or cursor every map is listed from the map catalog. With a limit or cursor the maps
+    are streamed page by page from the database as they are fetched. With a limit a single page is
+    listed, and the cursor of the next page is sent in the 'X-Next-Cursor' header when there are more maps.
+    """
+    if limit is None and cursor is None:
+        maps = await catalogs.maps.get()
+        encoded = catalogs.encoded.get(
+            "maps", maps, lambda: responses.Encoded.json([map_.dict(exclude={"key"}) for map_ in maps])
+        )
+        return encoded.response(request)
+
+    base = database.base("map")
+    headers = {}
+    if limit is None:
+        pages = base.pages(last=cursor)
+    else:
+        page = await base.fetch(limit=limit, last=cursor)
+        if page.last is not None:
+            headers["X-Next-Cursor"] = page.last
+
+        async def single() -> AsyncIterator[Any]:
+            yield page
+
+        pages = single()
+    chunks = ([schemas.Map(**item).json() for item in page.items] async for page in pages)
+    return StreamingResponse(json_array(chunks), media_type="application/json", headers=headers)
+
+
+@router.get("/maps/render", response_class=Response, responses=IMAGE_RESPONSES)
+async def read_map_render(
+    request: Request,
+    players: schemas.Players,
+    style: str,
+    format: schemas.ImageFormat = schemas.ImageFormat.SVG,
+    catalogs: Catalogs = Depends(get_catalogs),
+    rendered: cache.TTLCache[Hashable, responses.Encoded] = Depends(get_rendered),
+) -> Response:
+    """Render a stored map as an image."""
+    from . import render
+
+    _, template = await fetch_template(catalogs, players, style)
+    try:
+        board_ = render.from_layout(template)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    encoded = await render_board(rendered, board_, format)
+    return encoded.response(request)
+
+
+@router.post("/mapstring/encode", response_model=schemas.MapString)
+async def encode_map_string(
+    layout: list[schemas.Tile], catalogs: Catalogs = Depends(get_catalogs)
+) -> schemas.MapString:
+    """Encode a layout to a map string of tile numbers in spiral order, as used by Tabletop Simulator."""
+    from . import mapstring
+
+    tiles = await catalogs.tiles.get()
+    try:
+        return schemas.MapString(map_string=mapstring.encode(layout, tiles))
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
 
 
-@router.get("/factions/")
-async def read_factions():
-    ...
+@router.get("/mapstring/decode", response_model=list[schemas.Tile])
+async def decode_map_string(
+    request: Request, map_string: str = Query(max_length=1024), catalogs: Catalogs = Depends(get_catalogs)
+) -> Response:
+    """Decode a map string to a layout of positioned tiles."""
+    from . import mapstring
+
+    tiles = await catalogs.tiles.get()
+    try:
+        layout = mapstring.decode(map_string, tiles)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    # The layout is encoded directly, since a response model would validate the interned positions again and
+    # FastAPI validates pydantic dataclasses as dictionaries.
+    return responses.Encoded.json(layout).response(request)
+
+
+@router.get("/factions/", response_model=list[schemas.Faction])
+async def read_factions(request: Request, catalogs: Catalogs = Depends(get_catalogs)) -> Response:
+    factions = await catalogs.factions.get()
+    encoded = catalogs.encoded.get("factions", factions, lambda: responses.Encoded.json(factions))
+    return encoded.response(request)
 
 
 @router.get("/tiles/", response_model=list[schemas.TileRead])
-async def read_tiles(query: Optional[schemas.TileQuery] = None, test: Optional[int] = None):
-    async with db.AsyncBase(engine, "tile") as base:
-        results = await base.fetch()
-    db_tiles = [schemas.TileInDB(**result) for result in results.items]
-    return db_tiles
+async def read_tiles(
+    request: Request,
+    query: schemas.TileQuery = Depends(),
+    limit: Optional[int] = Query(default=None, ge=1, le=db.PAGE_SIZE),
+    cursor: Optional[str] = None,
+    catalogs: Catalogs = Depends(get_catalogs),
+) -> Response:
+    """List the tiles matching a query.
+
+    With a limit a single page is listed, and the cursor of the next page is sent in the 'X-Next-Cursor'
+    header when there are more tiles. The cursor is the key of the last tile of the previous page.
+    """
+    tiles = await catalogs.tiles.get()
+    key = ("tiles", query.json(), limit, cursor)
+    return catalogs.encoded.get(key, tiles, lambda: encode_tiles(tiles, query, limit, cursor)).response(request)
+
+
+def encode_tiles(
+    tiles: "board.Catalog", query: schemas.TileQuery, limit: Optional[int], cursor: Optional[str]
+) -> responses.Encoded:
+    matches = tiles.query(query)
+    start = 0
+    if cursor is not None:
+        start = next((index + 1 for index, tile in enumerate(matches) if tile.key == cursor), None)
+        if start is None:
+            raise HTTPException(status_code=400, detail=f"cursor {cursor!r} does not match a tile")
+    end = len(matches) if limit is None else start + limit
+    page = matches[start:end]
+    headers = {"X-Next-Cursor": page[-1].key} if end < len(matches) else {}
+    return responses.Encoded.json([tile.dict(exclude={"key"}) for tile in page], headers=headers)
+
+
+async def fetch_template(
+    catalogs: Catalogs, players: schemas.Players, style: str
+) -> tuple[schemas.MapInDB, list[schemas.Tile]]:
+    """Find a map by players and style, together with its layout parsed to tiles."""
+    db_maps = await catalogs.maps.get()
+    db_map = next((db_map for db_map in db_maps if db_map.players == players and db_map.style == style), None)
+    if db_map is None:
+        raise HTTPException(status_code=404, detail=f"map with {players} players and style {style!r} not found")
+    template = [schemas.Tile.parse_obj(tile) for tile in db_map.layout]
+    return db_map, template
+
+
+@metrics.timed("serialize")
+def to_generated(db_map: schemas.MapInDB, generated: "generator.Generated") -> schemas.MapGenerated:
+    return schemas.MapGenerated(
+        **db_map.dict(exclude={"key", "layout"}),
+        layout=generated.board.layout,
+        seed=generated.seed,
+        score=generated.score,
+        evaluations=generated.evaluations,
+        signature=generated.signature,
+    )
+
+
+def unlimited_generate_options(
+    evaluations: int = Query(default=200_000, ge=0),
+    time_limit: float = Query(default=5.0, gt=0),
+    release: Optional[list[schemas.Release]] = Query(default=None),
+    anomalies: bool = True,
+    tournament: bool = False,
+) -> schemas.GenerateOptions:
+    """Read the options of a generation, without limits on its budget."""
+    # Releases are sorted, so options which select the same tiles are equal as cache keys.
+    releases = None if release is None else tuple(sorted(set(release)))
+    return schemas.GenerateOptions(
+        evaluations=evaluations, time_limit=time_limit, releases=releases, anomalies=anomalies, tournament=tournament
+    )
+
+
+def check_budget(options: schemas.GenerateOptions, max_evaluations: int, max_time_limit: float) -> None:
+    """Refuse a generation with status 422 if its budget exceeds the limits."""
+    if options.evaluations > max_evaluations:
+        raise HTTPException(status_code=422, detail=f"evaluations must be at most {max_evaluations}")
+    if options.time_limit > max_time_limit:
+        raise HTTPException(status_code=422, detail=f"time_limit must be at most {max_time_limit}")
+
+
+def generate_options(
+    options: schemas.GenerateOptions = Depends(unlimited_generate_options),
+) -> schemas.GenerateOptions:
+    """Read the options of a generation which the request waits for."""
+    check_budget(options, MAX_EVALUATIONS, MAX_TIME_LIMIT)
+    return options
+
+
+@router.get(
+    "/generate/",
+    response_model=schemas.MapGenerated,
+    responses={
+        202: {"model": schemas.Job, "description": "Generation job queued"},
+        429: {"description": "Too many jobs"},
+    },
+)
+async def generate(
+    request: Request,
+    players: schemas.Players,
+    style: str,
+    seed: Optional[int] = Query(default=None, ge=0, lt=2**63),
+    background: bool = False,
+    options: schemas.GenerateOptions = Depends(unlimited_generate_options),
+    settings: config.Settings = Depends(get_settings),
+    catalogs: Catalogs = Depends(get_catalogs),
+    generated_maps: cache.TTLCache[tuple, responses.Encoded] = Depends(get_generated_maps),
+    store: Optional[db.UniqueBase] = Depends(get_generated_store),
+    jobs_: jobs.JobQueue = Depends(get_jobs),
+) -> Any:
+    """Generate a balanced map.
+
+    With 'background' the map is generated by a background job, and the job is sent with status 202 and
+    its location in the 'Location' header, see '/jobs/{id}'. A job may have a larger budget than a request
+    which waits for its map, up to the 'job_max_evaluations' and 'job_max_time_limit' settings. A job is
+    refused with status 429 when too many jobs are waiting. A map which is cached is sent at once either
+    way, as the body it was encoded to when it was generated.
+    """
+    from . import generator
+
+    if background:
+        check_budget(options, settings.job_max_evaluations, settings.job_max_time_limit)
+    else:
+        check_budget(options, MAX_EVALUATIONS, MAX_TIME_LIMIT)
+    seed = secrets.randbits(63) if seed is None else seed
+    key = (style, players, seed, options)
+    if (encoded := generated_maps.get(key)) is not None:
+        return encoded.response(request)
+
+    db_map, template = await fetch_template(catalogs, players, style)
+    tiles = await catalogs.tiles.get()
+
+    async def encode(generated: "generator.Generated") -> tuple[schemas.MapGenerated, responses.Encoded]:
+        generated_map = to_generated(db_map, generated)
+        encoded = responses.Encoded.json(generated_map)
+        # A generation which ran out of time before spending its evaluations can not be reproduced.
+        if generated.evaluations == options.evaluations:
+            generated_maps.put(key, encoded)
+        await store_generated(store, generated_map)
+        return generated_map, encoded
+
+    async def finish(generated: "generator.Generated") -> schemas.MapGenerated:
+        generated_map, _ = await encode(generated)
+        return generated_map
+
+    if background:
+        try:
+            job = jobs_.submit(
+                functools.partial(generator.generate, template, tiles, options, seed=seed), finish=finish
+            )
+        except jobs.QueueFull as error:
+            raise HTTPException(status_code=429, detail=str(error)) from None
+        content = jsonable_encoder(to_job(job))
+        return JSONResponse(content, status_code=202, headers={"Location": router.url_path_for("read_job", id=job.id)})
+
+    try:
+        generated = await run_in_threadpool(generator.generate, template, tiles, options, seed=seed)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    _, encoded = await encode(generated)
+    return encoded.response(request)
+
+
+@router.get("/jobs/{id}", response_model=schemas.Job)
+async def read_job(
+    id: str, wait: float = Query(default=0, ge=0, le=30), jobs_: jobs.JobQueue = Depends(get_jobs)
+) -> schemas.Job:
+    """Find a background job, with the best score so far while it runs and the map when it is done.
+
+    With 'wait' the response is held until the job is finished, or at most 'wait' seconds.
+    """
+    job = jobs_.get(id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"job {id!r} not found")
+    if wait and not job.done.is_set():
+        await jobs_.wait(job, wait)
+        job = jobs_.get(id) or job
+    return to_job(job)
+
+
+@router.get("/generate/render", response_class=Response, responses=IMAGE_RESPONSES)
+async def generate_render(
+    request: Request,
+    players: schemas.Players,
+    style: str,
+    seed: Optional[int] = Query(default=None, ge=0, lt=2**63),
+    format: schemas.ImageFormat = schemas.ImageFormat.SVG,
+    options: schemas.GenerateOptions = Depends(generate_options),
+    catalogs: Catalogs = Depends(get_catalogs),
+    rendered: cache.TTLCache[Hashable, responses.Encoded] = Depends(get_rendered),
+) -> Response:
+    """Render a generated map as an image.
+
+    The image of a seed is cached like the map of '/generate/', so a shared map is generated and rendered once.
+    """
+    from . import generator
+
+    seed = secrets.randbits(63) if seed is None else seed
+    key = (style, players, seed, options, format)
+    if (encoded := rendered.get(key)) is not None:
+        return encoded.response(request)
+
+    _, template = await fetch_template(catalogs, players, style)
+    tiles = await catalogs.tiles.get()
+    try:
+        generated = await run_in_threadpool(generator.generate, template, tiles, options, seed=seed)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    encoded = await render_board(rendered, generated.board, format)
+    # A generation which ran out of time before spending its evaluations can not be reproduced.
+    if generated.evaluations == options.evaluations:
+        rendered.put(key, encoded)
+    return encoded.response(request)
+
+
+@router.get("/generate/cache", response_model=cache.CacheStats)
+async def read_generate_cache(
+    generated_maps: cache.TTLCache[tuple, responses.Encoded] = Depends(get_generated_maps)
+) -> cache.CacheStats:
+    return generated_maps.stats()
+
+
+@router.get("/generate/batch", response_model=list[schemas.MapGenerated])
+async def generate_batch(
+    request: Request,
+    players: schemas.Players,
+    style: str,
+    count: int = Query(default=16, ge=1, le=1000),
+    top: int = Query(default=1, ge=1, le=100),
+    seed: Optional[int] = Query(default=None, ge=0, lt=2**63),
+    options: schemas.GenerateOptions = Depends(generate_options),
+    catalogs: Catalogs = Depends(get_catalogs),
+    store: Optional[db.UniqueBase] = Depends(get_generated_store),
+) -> list[schemas.MapGenerated]:
+    from . import generator
+
+    # The pool is not a dependency, since FastAPI would import the generator for the annotation.
+    pool = get_batch_pool(request)
+    db_map, template = await fetch_template(catalogs, players, style)
+    tiles = await catalogs.tiles.get()
+
+    try:
+        batch = await run_in_threadpool(
+            generator.generate_batch,
+            template,
+            tiles,
+            options,
+            count=count,
+            top=top,
+            seed=seed,
+            pool=pool,
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+    generated_maps = [to_generated(db_map, generated) for generated in batch]
+    for generated_map in generated_maps:
+        await store_generated(store, generated_map)
+    return generated_maps
+
+
+@router.get("/generate/stream")
+async def generate_stream(
+    players: schemas.Players,
+    style: str,
+    count: int = Query(default=100, ge=1, le=100_000),
+    seed: Optional[int] = Query(default=None, ge=0, lt=2**63),
+    options: schemas.GenerateOptions = Depends(generate_options),
+    catalogs: Catalogs = Depends(get_catalogs),
+    store: Optional[db.UniqueBase] = Depends(get_generated_store),
+) -> StreamingResponse:
+    """Stream generated maps as newline delimited JSON, one map per line.
+
+    A map is only generated after the previous line has been sent, so a slow client slows down the
+    generation instead of buffering maps in memory. Maps equivalent to a map sent before are skipped.
+
+    The first map is generated before the response is started, so a stack which can not be placed is
+    refused with status 422 instead of ending the stream.
+    """
+    from . import generator
+
+    seed = secrets.randbits(63) if seed is None else seed
+    db_map, template = await fetch_template(catalogs, players, style)
+    tiles = await catalogs.tiles.get()
+    try:
+        first = await run_in_threadpool(
+            generator.generate, template, tiles, options, seed=generator.derive_seed(seed, 0)
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
+
+    async def lines() -> AsyncIterator[str]:
+        seen: set[str] = set()
+        for index in range(count):
+            if index == 0:
+                generated = first
+            else:
+                try:
+                    generated = await run_in_threadpool(
+                        generator.generate, template, tiles, options, seed=generator.derive_seed(seed, index)
+                    )
+                except ValueError:
+                    # The stack was placed for the first map, so a seed which fails is skipped like a duplicate.
+                    continue
+            if generated.signature in seen:
+                continue
+            seen.add(generated.signature)
+            generated_map = to_generated(db_map, generated)
+            await store_generated(store, generated_map)
+            yield generated_map.json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def to_slice(tiles: list[schemas.Tile]) -> schemas.Slice:
+    systems = [tile.system for tile in tiles if tile.system is not None]
+    return schemas.Slice(
+        tiles=tiles,
+        resources=sum(system.resources for system in systems),
+        influence=sum(system.influence for system in systems),
+    )
+
+
+def draft_options(
+    evaluations: int = Query(default=20_000, ge=0, le=1_000_000),
+    time_limit: float = Query(default=0.5, gt=0, le=10),
+    release: Optional[list[schemas.Release]] = Query(default=None),
+    max_anomalies: int = Query(default=2, ge=0, le=5),
+    max_wormholes: int = Query(default=1, ge=0, le=5),
+    max_legendaries: int = Query(default=1, ge=0, le=5),
+    min_resources: int = Query(default=0, ge=0),
+    min_influence: int = Query(default=0, ge=0),
+) -> schemas.DraftOptions:
+    releases = None if release is None else tuple(sorted(set(release)))
+    return schemas.DraftOptions(
+        evaluations=evaluations,
+        time_limit=time_limit,
+        releases=releases,
+        max_anomalies=max_anomalies,
+        max_wormholes=max_wormholes,
+        max_legendaries=max_legendaries,
+        min_resources=min_resources,
+        min_influence=min_influence,
+    )
+
+
+@router.get("/draft/", response_model=schemas.Draft)
+async def generate_draft(
+    players: schemas.Players,
+    slices: Optional[int] = Query(default=None, ge=1, le=12),
+    factions: Optional[int] = Query(default=None, ge=1, le=len(schemas.Name)),
+    seed: Optional[int] = Query(default=None, ge=0, lt=2**63),
+    options: schemas.DraftOptions = Depends(draft_options),
+    catalogs: Catalogs = Depends(get_catalogs),
+) -> schemas.Draft:
+    """Generate a draft package of balanced slices and factions, by default one of each for every player."""
+    from . import draft
+
+    seed = secrets.randbits(63) if seed is None else seed
+    tiles = await catalogs.tiles.get()
+    candidates = await catalogs.factions.get()
+    if options.releases is not None:
+        candidates = [faction for faction in candidates if faction.release in options.releases]
 
+    try:
+        chosen = draft.choose_factions(candidates, players if factions is None else factions, seed=seed)
+        result = await run_in_threadpool(
+            draft.generate, tiles, players if slices is None else slices, options, seed=seed
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error)) from None
 
-@router.get("/generate/")
-async def generate():
-    ...
+    with metrics.stage("serialize"):
+        return schemas.Draft(
+            players=players,
+            slices=[to_slice([tiles[id] for id in ids]) for ids in result.tiles.tolist()],
+            factions=chosen,
+            seed=result.seed,
+            score=result.score,
+            evaluations=result.evaluations,
+        )